@@ -0,0 +1,57 @@
+"""
+CompactVideo 内存基准：以 JSONL 读入的形式构造 N 条记录，对比只保留 Video 与只保留 CompactVideo 时的内存占用。
+用法：uv run python -m benchmarks.bench_compact_video [记录数，默认 200000]
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+from src.models import CompactVideo, Video
+
+
+def make_line(i: int) -> str:
+    return json.dumps(
+        Video(
+            parsed_number=f"ABC-{i:06d}",
+            file_path=f"/videos/studio{i % 30}/ABC-{i:06d}.mp4",
+            title=f"标题 {i}",
+            release_date=f"20{10 + i % 15}-0{1 + i % 9}-1{i % 10}",
+            director=f"导演{i % 200}",
+            studio=f"片商{i % 300}",
+            series=f"系列{i % 2000}",
+            category=["剧情", "单体作品", f"类别{i % 400}"],
+            actors=[f"演员{i % 5000}", f"演员{(i + 7) % 5000}"],
+            cover_url=["Javdb", f"https://img.example/covers/{i}.jpg"],
+            trailer_url=["Javbus", f"https://v.example/trailers/{i}.mp4"],
+            image_urls=["Javdb"] + [f"https://img.example/{i}-{n}.jpg" for n in range(8)],
+            scrape_status="SUCCESS",
+        ).to_dict(),
+        ensure_ascii=False,
+    )
+
+
+def measure(build, count: int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = [build(json.loads(make_line(i))) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size, elapsed
+
+
+def main(count: int = 200_000):
+    results = {}
+    for name, build in (("Video", Video.from_dict), ("CompactVideo", CompactVideo.from_dict)):
+        size, elapsed = measure(build, count)
+        results[name] = size
+        print(f"{name:<13} {size / 2**20:8.1f} MB  {size / count:6.0f} 字节/条  构造 {elapsed:.1f} 秒")
+    print(f"节省 {1 - results['CompactVideo'] / results['Video']:.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,39 @@
+"""
+番号提取基准：标注语料的准确率 + parse_many 的吞吐量。
+用法：uv run python -m benchmarks.bench_number_parser [文件名数量，默认 1000000]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+from src.number_parser import NumberParser
+
+CORPUS = Path(__file__).parent.parent / "tests" / "data" / "filenames.tsv"
+
+
+def load_corpus():
+    for line in CORPUS.read_text(encoding="utf-8").splitlines():
+        if line.strip() and not line.startswith("#"):
+            filename, expected = line.split("\t")
+            yield filename, None if expected == "-" else expected
+
+
+def main(count: int = 1_000_000):
+    parser = NumberParser()
+    corpus = list(load_corpus())
+    wrong = [(f, e, parser.extract(f)) for f, e in corpus if parser.extract(f) != e]
+    print(f"准确率：{len(corpus) - len(wrong)}/{len(corpus)}")
+    for filename, expected, got in wrong:
+        print(f"  {filename!r}: 期望 {expected}，得到 {got}")
+
+    rng = random.Random(0)
+    filenames = [rng.choice(corpus)[0] for _ in range(count)]
+    start = time.perf_counter()
+    hits = sum(1 for m in parser.parse_many(filenames) if m)
+    elapsed = time.perf_counter() - start
+    print(f"吞吐量：{count} 个文件名 {elapsed:.2f} 秒，{count / elapsed:,.0f} 个/秒（识别 {hits} 个）")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
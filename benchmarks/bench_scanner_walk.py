@@ -0,0 +1,91 @@
+"""
+并行目录遍历基准：在合成目录树上为每次 scandir / stat 注入固定延迟（模拟 SMB/NFS），
+对比单线程 os.walk + stat 与 Scanner 并行遍历在不同线程数下的耗时。
+用法：uv run python -m benchmarks.bench_scanner_walk [延迟毫秒，默认 2]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.scanner import Scanner
+
+DIRS, FILES_PER_DIR = 60, 20
+_scandir = os.scandir
+
+
+class SlowEntry:
+    """包装 os.DirEntry，stat() 时注入延迟。"""
+
+    def __init__(self, entry, delay):
+        self._entry, self._delay = entry, delay
+        self.name, self.path = entry.name, entry.path
+
+    def is_dir(self, **kwargs):
+        return self._entry.is_dir(**kwargs)
+
+    def is_file(self, **kwargs):
+        return self._entry.is_file(**kwargs)
+
+    def stat(self, **kwargs):
+        time.sleep(self._delay)
+        return self._entry.stat(**kwargs)
+
+
+class SlowScandir:
+    def __init__(self, path, delay):
+        time.sleep(delay)
+        self._it, self._delay = _scandir(path), delay
+
+    def __enter__(self):
+        return (SlowEntry(entry, self._delay) for entry in self._it)
+
+    def __exit__(self, *exc):
+        self._it.close()
+
+
+def build_tree(root: Path):
+    for d in range(DIRS):
+        folder = root / f"studio{d % 6}" / f"batch{d}"
+        folder.mkdir(parents=True)
+        for f in range(FILES_PER_DIR):
+            (folder / f"ABC-{d * FILES_PER_DIR + f + 100}.mp4").write_bytes(b"x")
+
+
+def baseline(root: Path, delay: float) -> int:
+    """改造前的做法：os.walk + 每个文件一次 stat，全部串行。"""
+    count = 0
+    for dirpath, _, filenames in os.walk(root):
+        time.sleep(delay)
+        for name in filenames:
+            time.sleep(delay)
+            os.stat(os.path.join(dirpath, name))
+            count += 1
+    return count
+
+
+def main(delay_ms: float = 2.0):
+    delay = delay_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root)
+        start = time.perf_counter()
+        count = baseline(root, delay)
+        print(f"os.walk + stat（串行）：{count} 个文件 {time.perf_counter() - start:.2f} 秒")
+
+        os.scandir = lambda path: SlowScandir(path, delay)
+        try:
+            scanner = Scanner()
+            scanner.min_size_mb = 0
+            for workers in (1, 4, 8, 16):
+                scanner.workers = workers
+                start = time.perf_counter()
+                count = sum(1 for _ in scanner._walk(root))
+                print(f"并行遍历 workers={workers}：{count} 个文件 {time.perf_counter() - start:.2f} 秒")
+        finally:
+            os.scandir = _scandir
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
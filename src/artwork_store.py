@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from src.config import config
+from src.utils import logger
+from src.crawlers.base import BaseCrawler
+from src.deadline import expired
+from src.metrics import metrics
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtworkStore:
+    """
+    内容寻址的图片仓库：每张图片按内容的 SHA-256 只保存一份（objects/ab/abcdef....jpg），
+    另有 URL -> 内容哈希 的索引；视频目录中的封面、剧照均为指向仓库文件的硬链接（不支持时回退为复制）。
+    同一 URL 只下载一次，不同 URL 但内容相同的图片也只占一份磁盘空间。
+
+    索引同时记录每个 URL 的 ETag / Last-Modified / 长度：
+    - 常规运行只在本地比对长度，不发起任何请求；
+    - base.revalidate_artwork 开启时发送条件 GET（If-None-Match / If-Modified-Since），远端未变化则返回 304；
+    - 下载中断留下的 partial/*.part 会在下次通过 Range 请求续传。
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        if root is None:
+            configured = config.get("base.artwork_store", "")
+            root = (
+                Path(configured)
+                if configured
+                else Path(config.get("base.output_path", "javoutp")) / ".artwork"
+            )
+        self.root = root
+        self.index_path = self.root / "index.jsonl"
+        self.revalidate = bool(config.get("base.revalidate_artwork", False))
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """索引为追加写入的 JSONL，每行一条记录；同一 URL 以最后一行为准。"""
+        if self._index is not None:
+            return self._index
+        index: Dict[str, Dict[str, Any]] = {}
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        index[record["url"]] = record
+                    except (ValueError, KeyError):
+                        # 中断时可能留下半行，忽略即可
+                        continue
+        self._index = index
+        return index
+
+    def _append_index(self, record: Dict[str, Any]):
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._load_index()[record["url"]] = record
+
+    def blob_path(self, digest: str, suffix: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}{suffix}"
+
+    def _record(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load_index().get(url)
+
+    def _valid_blob(self, record: Optional[Dict[str, Any]]) -> Optional[Path]:
+        """仓库文件存在且长度与记录一致时返回其路径（截断的文件视为无效）。"""
+        if not record:
+            return None
+        blob = self.blob_path(record["hash"], record["suffix"])
+        try:
+            size = blob.stat().st_size
+        except OSError:
+            return None
+        if record.get("length") is not None and size != record["length"]:
+            return None
+        return blob
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """返回 URL 已缓存且完整的仓库文件；未缓存、丢失或截断时返回 None。不发起请求。"""
+        return self._valid_blob(self._record(url))
+
+    def is_current(self, url: str, dest: Path) -> bool:
+        """
+        本地校验 dest 是否为 URL 对应的完整文件（同一文件，或长度一致），不发起请求。
+        """
+        record = self._record(url)
+        if not record or not dest.exists():
+            return False
+        blob = self._valid_blob(record)
+        if blob and os.path.samefile(blob, dest):
+            return True
+        return dest.stat().st_size == record.get("length")
+
+    def _get(
+        self,
+        crawler: BaseCrawler,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        method: str = "GET",
+    ) -> Optional[requests.Response]:
+        # 图片站点通常校验 Referer，本次请求改为详情页（请求级请求头覆盖各代理 Session 的默认值）
+        headers = {"Referer": crawler.detail_page or crawler.base_url, **(headers or {})}
+        return crawler._request(url, headers=headers, stream=stream, method=method)
+
+    def _ingest(
+        self, url: str, path: Path, resp: Optional[requests.Response], keep: bool
+    ) -> Path:
+        """
+        把下载完成（或已有）的文件按内容哈希放入仓库并记录元数据。
+        keep=True 时以硬链接方式入库、保留原文件；否则直接移动进仓库。
+        仓库中已有同名文件但内容不符（如经硬链接被截断的封面）时，以新文件替换。
+        """
+        digest = _file_sha256(path)
+        length = path.stat().st_size
+        suffix = Path(urlparse(url).path).suffix.lower() or ".jpg"
+        blob = self.blob_path(digest, suffix)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        intact = (
+            blob.exists()
+            and blob.stat().st_size == length
+            and _file_sha256(blob) == digest
+        )
+        if intact:
+            if not keep:
+                path.unlink()
+        elif keep:
+            # 先在临时路径建立链接再 rename，替换损坏的仓库文件时不影响正在读取的一方
+            tmp_path = blob.with_name(f".{blob.name}.tmp")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            try:
+                os.link(path, tmp_path)
+            except OSError:
+                shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, blob)
+        else:
+            os.replace(path, blob)
+        headers = resp.headers if resp is not None else {}
+        self._append_index(
+            {
+                "url": url,
+                "hash": digest,
+                "suffix": suffix,
+                "length": length,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+            }
+        )
+        return blob
+
+    def _download(
+        self,
+        crawler: BaseCrawler,
+        url: str,
+        record: Optional[Dict[str, Any]],
+        cached: Optional[Path] = None,
+    ) -> Optional[Path]:
+        """
+        流式下载到 partial/<url 哈希>.part：
+        - 已有部分数据时发送 Range 续传（带 If-Range，远端变化时服务器返回完整内容，自动整体重下）；
+        - 传入 cached（已有完整缓存）时发送条件请求，304 直接返回 cached。
+        响应体不完整时保留 .part 以便下次续传，并返回 None。
+        """
+        part_dir = self.root / "partial"
+        part_dir.mkdir(parents=True, exist_ok=True)
+        part_path = part_dir / f"{hashlib.sha1(url.encode()).hexdigest()}.part"
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        etag = (record or {}).get("etag")
+        last_modified = (record or {}).get("last_modified")
+
+        headers: Dict[str, str] = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if etag or last_modified:
+                headers["If-Range"] = etag or last_modified
+        elif cached is not None:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        resp = self._get(crawler, url, headers=headers, stream=True)
+        if resp is None and offset:
+            # 416 等续传失败：丢弃残留数据后整体重下
+            part_path.unlink()
+            offset = 0
+            resp = self._get(crawler, url, stream=True)
+        if resp is None:
+            return None
+        if resp.status_code == 304 and cached is not None:
+            resp.close()
+            return cached
+
+        if resp.status_code == 206:
+            logger.debug(f"续传图片 {url}：从第 {offset} 字节开始")
+            mode = "ab"
+        else:
+            mode = "wb"
+        # 有 Content-Encoding 时 Content-Length 是压缩后的长度，无法与解码后的字节数比较
+        expected = (
+            None
+            if resp.headers.get("Content-Encoding")
+            else resp.headers.get("Content-Length")
+        )
+        written = 0
+        host = urlparse(url).netloc
+        with resp, open(part_path, mode) as f:
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                written += len(chunk)
+                metrics.add_bytes(host, len(chunk))
+                if expired():
+                    break
+        if expired():
+            logger.warning(f"时间预算用尽，图片下载中止 {url}，下次运行将续传。")
+            return None
+        if expected is not None and written != int(expected):
+            logger.warning(
+                f"图片下载不完整 {url}：{written}/{expected} 字节，下次运行将续传。"
+            )
+            return None
+        return self._ingest(url, part_path, resp, keep=False)
+
+    def fetch(self, crawler: BaseCrawler, url: str) -> Optional[Path]:
+        """
+        获取 URL 对应的仓库文件：
+        - 已缓存且完整：不发起请求（开启 revalidate 时发送条件 GET，304 则沿用缓存）；
+        - 未缓存、丢失或截断：下载（有残留数据时续传）并入库。
+        下载失败返回 None。
+        """
+        record = self._record(url)
+        blob = self._valid_blob(record)
+        if blob and not self.revalidate:
+            return blob
+        return self._download(crawler, url, record, cached=blob)
+
+    def adopt(self, crawler: BaseCrawler, url: str, path: Path) -> bool:
+        """
+        接管索引中没有记录的已有文件（如旧版本直接下载的封面）：
+        用 HEAD 请求比对 Content-Length，一致则把文件入库并记录元数据，之后的校验不再需要请求；
+        不一致（截断或远端已更新）返回 False，由调用方重新下载。
+        """
+        resp = self._get(crawler, url, method="HEAD")
+        if resp is None:
+            return False
+        expected = resp.headers.get("Content-Length")
+        if resp.headers.get("Content-Encoding") or expected is None:
+            return False
+        if int(expected) != path.stat().st_size:
+            return False
+        self._ingest(url, path, resp, keep=True)
+        return True
+
+    def place(self, blob: Path, dest: Path):
+        """
+        在 dest 放置仓库文件：优先硬链接，跨设备或文件系统不支持时回退为复制。
+        dest 已是同一文件时不做任何操作；先在临时路径创建再 rename，替换过程对读取方是原子的。
+        """
+        if dest.exists() and os.path.samefile(blob, dest):
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = dest.with_name(f".{dest.name}.tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+        os.replace(tmp_path, dest)
+
+
+artwork_store = ArtworkStore()
@@ -0,0 +1,308 @@
+import json
+import pickle
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from src.config import config
+from src.utils import logger, atomic_write_bytes
+from src.models import CompactVideo, Video
+
+# 倒排索引的维度
+INDEX_FIELDS = ("actor", "studio", "series", "genre")
+# 本地资源状态（记录时按磁盘上的实际文件判断）
+ASSETS = ("nfo", "cover", "trailer", "stills")
+# 快照格式版本，结构变化时递增以使旧快照失效
+SNAPSHOT_VERSION = 2
+
+
+def _key(value: str) -> str:
+    return value.strip().casefold()
+
+
+def local_assets(video: Video) -> List[str]:
+    """按 nfo_gen 的命名规则检查视频旁已存在的资源文件。"""
+    if not video.file_path:
+        return []
+    video_path = Path(video.file_path)
+    prefix = (
+        ""
+        if video_path.parent.name == video.parsed_number
+        else f"{video.parsed_number}-"
+    )
+    stills_dir = video_path.parent / "backdrops"
+    checks = {
+        "nfo": video_path.with_suffix(".nfo").exists(),
+        "cover": video_path.with_suffix(".jpg").exists(),
+        "trailer": video_path.with_name(f"{video_path.stem}-trailer.mp4").exists(),
+        "stills": stills_dir.is_dir() and any(stills_dir.glob(f"{prefix}[0-9]*")),
+    }
+    return [name for name in ASSETS if checks[name]]
+
+
+class Catalog:
+    """
+    本地影片目录：由刮削结果构建，保存为追加写入的 JSONL（同一番号以最后一条为准），
+    内存中以 CompactVideo 存放，并按演员/片商/系列/类别/资源状态建立倒排索引（键 -> 记录序号集合）。
+    为避免每次查询都重新解析 JSONL，会在旁边保存一份索引快照（.idx），JSONL 变化后自动重建。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            configured = config.get("base.catalog_path", "")
+            path = (
+                Path(configured)
+                if configured
+                else Path(config.get("base.output_path", "javoutp")) / "catalog.jsonl"
+            )
+        self.path = path
+        self.snapshot_path = path.with_suffix(".idx")
+        self._lock = threading.Lock()
+        self._loaded = False
+        # 加载后是否有新增记录尚未写入快照
+        self._dirty = False
+        self.records: List[Optional[CompactVideo]] = []
+        self._by_number: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[str, Set[int]]] = {}
+        self._assets: Dict[str, Set[int]] = {}
+        # 多分段视频（CD1/CD2...）的全部文件路径：记录序号 -> 路径元组；单文件视频不占用
+        self._parts: Dict[int, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._by_number)
+
+    # ---- 加载 / 持久化 ----
+
+    def _file_signature(self):
+        stat = self.path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._reset()
+            if self.path.exists():
+                if not self._load_snapshot():
+                    self._load_jsonl()
+                    self._write_snapshot()
+            self._loaded = True
+
+    def _reset(self):
+        self.records = []
+        self._by_number = {}
+        self._indexes = {name: {} for name in INDEX_FIELDS}
+        self._assets = {name: set() for name in ASSETS}
+        self._parts = {}
+
+    def _load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                version, signature, state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            return False
+        if version != SNAPSHOT_VERSION or signature != self._file_signature():
+            return False
+        (
+            self.records,
+            self._by_number,
+            self._indexes,
+            self._assets,
+            self._parts,
+        ) = state
+        return True
+
+    def save_snapshot(self):
+        """
+        保存索引快照，下次加载时若 JSONL 未变化则直接使用快照。
+        本次运行没有新增记录时不做任何操作（目录未加载时内存中是空索引，不能以它覆盖快照）。
+        """
+        with self._lock:
+            if not (self._loaded and self._dirty):
+                return
+            self._write_snapshot()
+            self._dirty = False
+
+    def _write_snapshot(self):
+        try:
+            state = (
+                self.records,
+                self._by_number,
+                self._indexes,
+                self._assets,
+                self._parts,
+            )
+            data = pickle.dumps(
+                (SNAPSHOT_VERSION, self._file_signature(), state),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            atomic_write_bytes(self.snapshot_path, data)
+        except OSError as e:
+            logger.warning(f"保存目录索引快照失败：{e}")
+
+    def _load_jsonl(self):
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    record = CompactVideo.from_dict(data)
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"跳过无法解析的目录记录：{e}")
+                    continue
+                lines += 1
+                self._put(record, data.get("assets") or (), data.get("parts") or ())
+        # 重复记录过多时压缩文件，只保留每个番号的最新一条
+        if lines > 2 * len(self._by_number) + 1000:
+            self._compact()
+
+    def _line(
+        self, record: CompactVideo, assets: Iterable[str], parts: Sequence[str] = ()
+    ) -> str:
+        """
+        每行为 CompactVideo.to_dict() 加上 assets 字段（本地已有的资源）；
+        多分段视频另有 parts 字段（按分段顺序的全部文件路径，file_path 为第一段）。
+        """
+        data = {**record.to_dict(), "assets": list(assets)}
+        if len(parts) > 1:
+            data["parts"] = list(parts)
+        return json.dumps(data, ensure_ascii=False) + "\n"
+
+    def _compact(self):
+        data = "".join(
+            self._line(record, self.assets_of(idx), self._parts.get(idx, ()))
+            for idx, record in enumerate(self.records)
+            if record is not None
+        )
+        atomic_write_bytes(self.path, data.encode("utf-8"))
+        logger.info(f"已压缩影片目录：{len(self._by_number)} 条记录")
+
+    # ---- 索引维护 ----
+
+    def _keys(self, record: CompactVideo) -> Dict[str, Iterable[str]]:
+        return {
+            "actor": record.actors,
+            "studio": [record.studio] if record.studio else [],
+            "series": [record.series] if record.series else [],
+            "genre": record.category,
+        }
+
+    def assets_of(self, idx: int) -> List[str]:
+        return [name for name in ASSETS if idx in self._assets[name]]
+
+    def parts_of(self, record: CompactVideo) -> List[str]:
+        """视频的全部文件路径（按分段顺序）；单文件视频只有 file_path 一项。"""
+        self.load()
+        idx = self._by_number.get(record.parsed_number)
+        if idx is not None and idx in self._parts:
+            return list(self._parts[idx])
+        return [record.file_path] if record.file_path else []
+
+    def _put(
+        self, record: CompactVideo, assets: Iterable[str], parts: Sequence[str] = ()
+    ):
+        old = self._by_number.get(record.parsed_number)
+        if old is not None:
+            self._unindex(old)
+        idx = len(self.records)
+        self.records.append(record)
+        self._by_number[record.parsed_number] = idx
+        for name, values in self._keys(record).items():
+            index = self._indexes[name]
+            for value in values:
+                index.setdefault(_key(value), set()).add(idx)
+        for name in assets:
+            if name in self._assets:
+                self._assets[name].add(idx)
+        if len(parts) > 1:
+            self._parts[idx] = tuple(parts)
+
+    def _unindex(self, idx: int):
+        record = self.records[idx]
+        for name, values in self._keys(record).items():
+            index = self._indexes[name]
+            for value in values:
+                ids = index.get(_key(value))
+                if ids is not None:
+                    ids.discard(idx)
+                    if not ids:
+                        del index[_key(value)]
+        for ids in self._assets.values():
+            ids.discard(idx)
+        self._parts.pop(idx, None)
+        self.records[idx] = None
+
+    def add(self, video: Video, parts: Sequence[str] = ()):
+        """
+        记录（或更新）一条刮削结果：追加写入 JSONL 并同步更新内存索引。
+        parts 为多分段视频按顺序的全部文件路径（video 为第一段），单文件视频可省略。
+        """
+        self.load()
+        record = CompactVideo.from_video(video)
+        assets = local_assets(video)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(self._line(record, assets, parts))
+            self._put(record, assets, parts)
+            self._dirty = True
+
+    # ---- 查询 ----
+
+    def get(self, parsed_number: str) -> Optional[CompactVideo]:
+        self.load()
+        idx = self._by_number.get(parsed_number)
+        return self.records[idx] if idx is not None else None
+
+    def query(
+        self,
+        actor: Optional[str] = None,
+        studio: Optional[str] = None,
+        series: Optional[str] = None,
+        genre: Optional[str] = None,
+        has: Iterable[str] = (),
+        missing: Iterable[str] = (),
+    ) -> List[CompactVideo]:
+        """
+        按条件组合查询（条件之间为“且”），名称匹配忽略大小写。
+        has / missing 为资源名列表：nfo、cover、trailer、stills。
+        """
+        self.load()
+        candidates: List[Set[int]] = []
+        for name, value in (
+            ("actor", actor),
+            ("studio", studio),
+            ("series", series),
+            ("genre", genre),
+        ):
+            if value:
+                candidates.append(self._indexes[name].get(_key(value), set()))
+        for name in has:
+            if name not in ASSETS:
+                raise ValueError(f"未知的资源类型：{name}（可选：{'/'.join(ASSETS)}）")
+            candidates.append(self._assets[name])
+
+        if candidates:
+            # 从最小的集合开始求交集
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for ids in candidates[1:]:
+                result &= ids
+        else:
+            result = set(self._by_number.values())
+        for name in missing:
+            if name not in ASSETS:
+                raise ValueError(f"未知的资源类型：{name}（可选：{'/'.join(ASSETS)}）")
+            result -= self._assets[name]
+
+        return sorted(
+            (self.records[idx] for idx in result), key=lambda r: r.parsed_number
+        )
+
+
+catalog = Catalog()
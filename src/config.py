@@ -16,15 +16,42 @@ class Config:
                 "scan_path": "./videos",
                 "log_level": "DEBUG",
                 "move_files": True,
+                "organize_mode": "move",
                 "generate_nfo": True,
                 "download_cover": True,
                 "download_trailer": True,
-                "download_stills": True
+                "download_stills": True,
+                "artwork_store": "",
+                "revalidate_artwork": False,
+                "catalog": True,
+                "dashboard": True,
+                "catalog_path": ""
             },
             "scraper": {
                 "proxy": "",
                 "timeout": 30,
                 "max_retries": 3,
+                "fallback_mode": "full",
+                "video_budget": 300,
+                "negative_cache": {
+                "enabled": True,
+                "ttl_hours": 24,
+                "max_days": 90,
+                "path": ""
+                },
+                "breaker": {
+                "threshold": 5,
+                "cooldown": 300
+                },
+                "proxy_pool": {
+                "rate": 0,
+                "eject_error_rate": 0.5,
+                "cooldown": 600
+                },
+                "cassette": {
+                "mode": "off",
+                "path": "cassettes"
+                },
                 "groups": {
                 "javdb": {
                     "base_url": "https://javdb.com",
@@ -92,6 +119,12 @@ class Config:
             },
             "scanner": {
                 "min_size_mb": 0,
+                "workers": 8,
+                "duplicate_policy": "size",
+                "queue_size": 256,
+                "exclude": [
+                "backdrops"
+                ],
                 "extensions": [
                 ".mp4",
                 ".mkv",
@@ -99,6 +132,28 @@ class Config:
                 ".wmv",
                 ".mov"
                 ]
+            },
+            "mover": {
+                "workers": 2,
+                "queue_size": 8,
+                "chunk_mb": 64,
+                "verify": True
+            },
+            "watch": {
+                "use_inotify": True,
+                "poll_interval": 30,
+                "settle_seconds": 10
+            },
+            "scheduler": {
+                "order": "mtime",
+                "fair": True,
+                "priority_paths": []
+            },
+            "serve": {
+                "host": "127.0.0.1",
+                "port": 8710,
+                "cache_size": 10000,
+                "cache_ttl": 3600
             }
             }
         if not self.config_path.exists():
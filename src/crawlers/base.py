@@ -1,18 +1,59 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional, Dict, List
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, ClassVar, Optional, Dict, List
 import requests
 import time
+from urllib.parse import urlparse
 from bs4 import BeautifulSoup
 
 from src.utils import logger
+from src.crawlers.cassette import Cassette
+from src.crawlers.breaker import CircuitBreaker
+from src.crawlers.proxy_pool import ProxyPool
+from src.deadline import clamp_timeout, expired
+from src.metrics import metrics
+
+
+@dataclass(frozen=True)
+class Capability:
+    """
+    爬虫对某个字段的能力声明：
+    - reliability：详情页上能取到该字段的大致比例（0~1），规划时作为该字段的收益；
+    - requires_auth：是否需要登录（配置了 Cookie）才能取到，未登录时视为不提供。
+    """
+
+    reliability: float = 1.0
+    requires_auth: bool = False
+
+
+# 每个爬虫缓存的已解析页面数（LRU）：一个视频的搜索页与详情页足够，长时间运行时内存不随处理量增长
+SOUP_CACHE_SIZE = 16
+
+
+def is_challenge(response: requests.Response) -> bool:
+    """是否为 Cloudflare 等反爬验证页（重试无法通过）。"""
+    if response.status_code not in (403, 429, 503):
+        return False
+    if response.headers.get("cf-mitigated") == "challenge":
+        return True
+    if "cloudflare" not in response.headers.get("Server", "").lower():
+        return False
+    text = response.text[:20000]
+    return "challenge-platform" in text or "Just a moment" in text
 
 
 class BaseCrawler(ABC):
     """
     所有爬虫的基类。
     定义了搜索和获取详情的接口。
+    子类通过 CAPABILITIES 声明能提供的字段（plan 模式不会请求未声明的字段），SEARCH_COST 为找到并打开详情页所需的请求数；
+    各字段都从同一详情页（有缓存）解析，不额外计费。
     """
 
+    CAPABILITIES: ClassVar[Dict[str, Capability]] = {}
+    SEARCH_COST: ClassVar[int] = 2
+
     def __init__(self, config: Dict[str, Any]) -> None:
         """
         初始化类,配置基础信息。
@@ -30,50 +71,176 @@ class BaseCrawler(ABC):
         self.timeout = self.config.get("timeout", 10)
         # 最大重试次数
         self.max_retries = self.config.get("max_retries", 3)
-        # 代理地址 如果有
-        self.proxy = self.config.get("proxy", None)
-        # 配置代理地址
-        self.proxies = (
-            {
-                "http": self.proxy,
-                "https": self.proxy,
-            }
-            if self.proxy
-            else None
-        )
-        # 简单的Soup缓存
-        self._soup_cache = {}
+        # 简单的Soup缓存（LRU，最多 SOUP_CACHE_SIZE 页）
+        self._soup_cache: "OrderedDict[str, BeautifulSoup]" = OrderedDict()
         # 详情页URL
         self.detail_page = None
-        # 初始化 Session
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
-        if self.proxies:
-            self.session.proxies.update(self.proxies)
-        # 先访问首页获取cookie
-        response = self._request(self.base_url)
-        logger.debug(f"首页响应状态码: {response.status_code}")
+        # 请求录制/回放（scraper.cassette），用于离线复现与调试解析逻辑
+        self.cassette = Cassette.from_config(
+            self.config.get("cassette"), self.__class__.__name__
+        )
+        # 熔断器（scraper.breaker）：站点连续失败后暂时跳过，冷却后探测恢复
+        self.breaker = CircuitBreaker.from_config(
+            self.config.get("breaker"), self.__class__.__name__
+        )
+        # 最近一次请求是否得到站点的明确答复（成功或 404 等）；网络错误、验证页、熔断、预算用尽时为 False。
+        # 用于区分“站点上没有”与“没能问到”，只有前者会写入未找到缓存
+        self.last_request_ok = True
+        # 代理池（scraper.proxy 可为单个地址或列表，未配置时直连）：每个代理一个 Session，按健康度分配请求
+        self.proxy_pool = ProxyPool.from_config(
+            self.config.get("proxy_pool"),
+            self.__class__.__name__,
+            self.config.get("proxy", None),
+            self.headers,
+        )
+        if len(self.proxy_pool) > 1:
+            metrics.register(f"代理 {self.__class__.__name__}", self.proxy_pool.summary)
+        # 先访问首页获取cookie（轮转到每个代理各一次）
+        for _ in range(len(self.proxy_pool)):
+            response = self._request(self.base_url)
+            logger.debug(
+                f"首页响应状态码: {response.status_code if response is not None else None}"
+            )
         logger.info(f"初始化爬虫 {self.__class__.__name__} 完成")
 
-    def _request(self, url: str) -> Optional[requests.Response]:
+    @property
+    def proxy(self) -> Optional[str]:
+        """当前最健康的代理地址（直连时为 None），供 yt-dlp 下载预告片使用。"""
+        return self.proxy_pool.best().proxy
+
+    @property
+    def authenticated(self) -> bool:
+        """是否配置了登录 Cookie。"""
+        return bool(self.headers.get("Cookie"))
+
+    def capability(self, field: str) -> Optional[Capability]:
+        """该字段在当前登录状态下的能力声明；不提供时返回 None。"""
+        cap = self.CAPABILITIES.get(field)
+        if cap is None or (cap.requires_auth and not self.authenticated):
+            return None
+        return cap
+
+    def provides(self, field: str) -> bool:
+        return self.capability(field) is not None
+
+    def _request(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        method: str = "GET",
+    ) -> Optional[requests.Response]:
         """
-        统一封装get请求,返回Response对象。
+        统一封装请求,返回Response对象。
         实现重试机制,根据max_retries配置重试次数。
+        headers 为本次请求附加的请求头（如 Range、If-None-Match）；stream=True 时由调用方按块读取响应体。
+        录制模式下每次响应（含错误状态码）都会保存；回放模式下从录制中返回，不发起网络请求。
+        熔断器打开期间直接返回 None；网络错误、5xx/429 重试耗尽或遇到验证页时计为站点失败，
+        404 等其余错误状态码说明站点可正常响应，不计入失败。
+        每次请求经代理池选出代理并记录其延迟与结果；某个代理遇到验证页时剔除该代理并换用其他代理重试，
+        没有其他健康代理时才按站点遇到验证页处理。
+        当前视频的时间预算（见 src.deadline）用尽时不再发起请求或重试，超时也不超过剩余预算。
         """
+        self.last_request_ok = False
+        if expired():
+            logger.debug(f"时间预算已用尽，跳过请求 {url}")
+            return None
+        if not self.breaker.allow():
+            logger.debug(f"站点 {self.__class__.__name__} 熔断中，跳过请求 {url}")
+            return None
+        try:
+            return self._send(url, headers, stream, method)
+        except Exception:
+            # 意外异常（录制写盘失败、读取响应出错等）没有得出结果，归还半开状态的探测名额，否则站点会一直被拒绝
+            self.breaker.release()
+            raise
+
+    def _send(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        stream: bool,
+        method: str,
+    ) -> Optional[requests.Response]:
+        """_request 的重试循环；调用前熔断器已放行本次请求。"""
+        site = self.__class__.__name__
         retries = 0
+        site_failure = False
         while retries < self.max_retries:
+            if expired():
+                logger.warning(f"时间预算已用尽，停止重试 {url}")
+                self.breaker.release()
+                return None
+            endpoint = None
             try:
-                response = self.session.get(url, timeout=self.timeout)
+                if self.cassette.mode == "replay":
+                    response = self.cassette.play(method, url, headers)
+                    if response is None:
+                        # 没有录制不代表站点故障，归还探测名额
+                        self.breaker.release()
+                        return None
+                else:
+                    endpoint = self.proxy_pool.acquire()
+                    started = time.monotonic()
+                    metrics.incr(f"requests:{site}")
+                    metrics.add("requests_in_flight", 1)
+                    try:
+                        response = endpoint.session.request(
+                            method,
+                            url,
+                            headers=headers,
+                            stream=stream,
+                            timeout=clamp_timeout(self.timeout),
+                        )
+                    finally:
+                        metrics.add("requests_in_flight", -1)
+                    if not stream:
+                        metrics.add_bytes(urlparse(url).netloc, len(response.content))
+                    if self.cassette.mode == "record":
+                        self.cassette.record(method, url, headers, response)
+                if is_challenge(response):
+                    metrics.incr(f"errors:{site}")
+                    logger.error(f"请求 {url} 遇到验证页（状态码 {response.status_code}）")
+                    if endpoint is not None:
+                        self.proxy_pool.report(
+                            endpoint, time.monotonic() - started, ok=False, challenge=True
+                        )
+                        if self.proxy_pool.has_alternative(endpoint):
+                            # 只是该代理被识别，换用其他代理重试；重试耗尽时仍计为站点失败
+                            site_failure = True
+                            retries += 1
+                            continue
+                    self.breaker.record_failure("遇到验证页", challenge=True)
+                    return None
                 response.raise_for_status()
 
+                if endpoint is not None:
+                    self.proxy_pool.report(endpoint, time.monotonic() - started, ok=True)
+                self.breaker.record_success()
+                self.last_request_ok = True
                 return response
             except requests.RequestException as e:
+                metrics.incr(f"errors:{site}")
+                status = getattr(e.response, "status_code", None)
+                site_failure = status is None or status >= 500 or status == 429
+                if endpoint is not None:
+                    self.proxy_pool.report(
+                        endpoint, time.monotonic() - started, ok=not site_failure
+                    )
                 # 重试：对请求异常做短暂退避
                 time.sleep(0.1)
 
                 retries += 1
                 logger.error(f"请求 {url} 失败,第 {retries} 次重试: {e}")
         logger.error(f"请求 {url} 失败,超过最大重试次数 {self.max_retries}")
+        if expired():
+            # 预算耗尽导致的超时不代表站点故障
+            self.breaker.release()
+        elif site_failure:
+            self.breaker.record_failure(f"请求 {url} 失败")
+        else:
+            self.breaker.record_success()
+            self.last_request_ok = True
         return None
 
     def _get_soup(self, url: str) -> Optional[BeautifulSoup]:
@@ -84,6 +251,9 @@ class BaseCrawler(ABC):
         """
         # 检查缓存
         if url in self._soup_cache:
+            self._soup_cache.move_to_end(url)
+            # 缓存中的页面是站点此前的明确答复，不能沿用无关请求留下的 last_request_ok
+            self.last_request_ok = True
             return self._soup_cache[url]
         # 获取响应内容
         resp = self._request(url)
@@ -91,6 +261,8 @@ class BaseCrawler(ABC):
             return None
         soup = BeautifulSoup(resp.text, "lxml")
         self._soup_cache[url] = soup
+        while len(self._soup_cache) > SOUP_CACHE_SIZE:
+            self._soup_cache.popitem(last=False)
         return soup
 
     @abstractmethod
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from src.utils import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    单个站点的熔断器：
+    - closed：正常请求；连续失败达到 threshold 次（或遇到 Cloudflare 验证页）后熔断为 open；
+    - open：直接拒绝请求，不再等待超时与重试；冷却 cooldown 秒后转为 half_open；
+    - half_open：只放行一个探测请求，成功则恢复 closed，失败则重新 open。
+    状态变化记录日志并计数（transitions），被拒绝的请求计入 rejected。
+    """
+
+    def __init__(self, name: str, threshold: int = 5, cooldown: float = 300):
+        self.name = name
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.transitions: Counter = Counter()
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]], name: str) -> "CircuitBreaker":
+        """options 为 scraper.breaker 配置。"""
+        options = options or {}
+        return cls(
+            name,
+            threshold=options.get("threshold") or 5,
+            cooldown=options.get("cooldown") or 300,
+        )
+
+    def _transition(self, state: str, reason: str = ""):
+        if state == self.state:
+            return
+        self.transitions[f"{self.state}->{state}"] += 1
+        log = logger.warning if state == OPEN else logger.info
+        log(f"站点 {self.name} 熔断器 {self.state} -> {state}{('：' + reason) if reason else ''}")
+        self.state = state
+
+    def available(self) -> bool:
+        """站点当前是否可用（不改变状态）：open 且仍在冷却期内时返回 False。"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.cooldown
+            return not (self.state == HALF_OPEN and self._probing)
+
+    def allow(self) -> bool:
+        """请求前调用：返回是否放行；冷却结束后放行一个探测请求。"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self._transition(HALF_OPEN, "冷却结束，发送探测请求")
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self._transition(CLOSED, "探测成功")
+
+    def record_failure(self, reason: str = "", challenge: bool = False):
+        """
+        记录一次失败；challenge=True（遇到验证页）时立即熔断，重试也无法通过。
+        """
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or challenge or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                if self.state == OPEN:
+                    return
+                self._transition(
+                    OPEN,
+                    f"{reason}（连续失败 {self.failures} 次，{self.cooldown:.0f} 秒后重试）",
+                )
+
+    def release(self):
+        """请求被取消（如时间预算用尽）而未得出结果：不计成功或失败，只归还探测名额。"""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+            }
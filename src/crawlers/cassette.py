@@ -0,0 +1,118 @@
+import hashlib
+import io
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from src.utils import logger, atomic_write_bytes
+
+# 录制/回放模式：off 正常联网；record 联网并保存每一对请求/响应；replay 只从录制中回放，不联网
+CASSETTE_MODES = ("off", "record", "replay")
+# 参与匹配的请求头：影响响应内容的条件请求/续传头
+MATCH_HEADERS = ("Range", "If-Range", "If-None-Match", "If-Modified-Since")
+
+
+class Cassette:
+    """
+    HTTP 录制/回放（仿 VCR“磁带”）：以 方法 + URL + 条件请求头 的哈希为键，
+    每次响应保存为 <键>-<序号>.json（状态码、响应头等）与 <键>-<序号>.body（原始响应体）。
+    回放时同一请求按录制顺序依次返回，超出录制次数后重复最后一次，因此重复运行的结果是确定的。
+    """
+
+    def __init__(self, root: Path, mode: str = "off"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(
+                f"scraper.cassette.mode 配置错误：{mode}（可选：{'/'.join(CASSETTE_MODES)}）"
+            )
+        self.root = root
+        self.mode = mode
+        self._lock = threading.Lock()
+        # 本次运行中每个键已录制/回放的次数
+        self._counters: Dict[str, int] = {}
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict[str, Any]], name: str) -> "Cassette":
+        """options 为 scraper.cassette 配置；每个爬虫使用独立的子目录 <path>/<name>。"""
+        options = options or {}
+        return cls(
+            Path(options.get("path") or "cassettes") / name,
+            options.get("mode") or "off",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def _key(
+        self, method: str, url: str, headers: Optional[Dict[str, str]]
+    ) -> str:
+        headers = CaseInsensitiveDict(headers or {})
+        parts = [method.upper(), url] + [
+            f"{name}:{headers[name]}" for name in MATCH_HEADERS if name in headers
+        ]
+        return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _next_index(self, key: str) -> int:
+        with self._lock:
+            index = self._counters.get(key, 0)
+            self._counters[key] = index + 1
+            return index
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        response: requests.Response,
+    ):
+        """保存一次响应（会读取完整响应体；之后 response.content / iter_content 仍可正常使用）。"""
+        key = self._key(method, url, headers)
+        index = self._next_index(key)
+        body = response.content
+        meta = {
+            "method": method.upper(),
+            "url": url,
+            "request_headers": dict(headers or {}),
+            "status": response.status_code,
+            "reason": response.reason,
+            "final_url": response.url,
+            "encoding": response.encoding,
+            "headers": dict(response.headers),
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.root / f"{key}-{index}.body", body)
+        atomic_write_bytes(
+            self.root / f"{key}-{index}.json",
+            json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"),
+        )
+
+    def play(
+        self, method: str, url: str, headers: Optional[Dict[str, str]]
+    ) -> Optional[requests.Response]:
+        """回放录制的响应；没有录制时返回 None。"""
+        key = self._key(method, url, headers)
+        index = self._next_index(key)
+        meta_path = self.root / f"{key}-{index}.json"
+        while index > 0 and not meta_path.exists():
+            index -= 1
+            meta_path = self.root / f"{key}-{index}.json"
+        if not meta_path.exists():
+            logger.warning(f"回放模式下没有录制：{method.upper()} {url}")
+            return None
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        body = (self.root / f"{key}-{index}.body").read_bytes()
+
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta.get("reason")
+        response.url = meta.get("final_url") or url
+        response.encoding = meta.get("encoding")
+        response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        return response
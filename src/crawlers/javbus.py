@@ -2,7 +2,7 @@ from typing import Optional
 from urllib.parse import urljoin
 from typing import List
 
-from src.crawlers.base import BaseCrawler
+from src.crawlers.base import BaseCrawler, Capability
 
 
 class Javbus(BaseCrawler):
@@ -11,13 +11,28 @@ class Javbus(BaseCrawler):
     说明：该站点部分字段通过固定索引定位（find_all("p")[N]），站点改版时需要优先核对索引是否仍正确。
     """
 
+    # 搜索地址即详情页，一次请求；页面不提供简介，预告片很少
+    SEARCH_COST = 1
+    CAPABILITIES = {
+        "title": Capability(),
+        "release_date": Capability(0.9),
+        "director": Capability(0.6),
+        "studio": Capability(0.9),
+        "series": Capability(0.6),
+        "category": Capability(0.9),
+        "actors": Capability(0.9),
+        "cover_url": Capability(),
+        "trailer_url": Capability(0.2),
+        "image_urls": Capability(0.8),
+    }
+
     def search(self, keyword: str) -> Optional[str]:
         """
         根据番号或关键字返回详情页 URL。
         """
         url = self.search_url.format(keyword)
-        resp = self._request(url)
-        if resp and resp.status_code == 200:
+        # 搜索地址即详情页：经 _get_soup 请求并缓存，后续解析字段时不再重复请求
+        if self._get_soup(url) is not None:
             return url
         return None
 
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from src.utils import logger
-from src.crawlers.base import BaseCrawler
+from src.crawlers.base import BaseCrawler, Capability
 from typing import List
 
 
@@ -10,6 +10,21 @@ class Javdb(BaseCrawler):
     Javdb 爬虫实现。
     """
 
+    # 搜索页 + 详情页；页面不提供简介，预告片需要登录
+    SEARCH_COST = 2
+    CAPABILITIES = {
+        "title": Capability(),
+        "release_date": Capability(),
+        "director": Capability(0.8),
+        "studio": Capability(0.9),
+        "series": Capability(0.6),
+        "category": Capability(),
+        "actors": Capability(0.95),
+        "cover_url": Capability(),
+        "trailer_url": Capability(0.8, requires_auth=True),
+        "image_urls": Capability(0.9),
+    }
+
     def _get_info(self, soup, key):
         """
         辅助函数：从详情页的信息面板中获取指定字段的节点。
@@ -174,10 +189,7 @@ class Javdb(BaseCrawler):
         if not soup:
             return None
 
-        # 调试用：保存详情页 HTML 到本地以便分析选择器/结构变化（会覆盖 debug_detail.html，建议仅在本地排查时启用）。
-        if logger.isEnabledFor(10):
-            with open("debug_detail.html", "w", encoding="utf-8") as f:
-                f.write(str(soup))
+        # 排查选择器/结构变化时使用 scraper.cassette 录制详情页，再以回放模式离线复现
         # 策略 1: 直接查找 id="preview-video" 的 video 标签
         # 登录后的页面通常会有这个标签
         video_node = soup.select_one("#preview-video")
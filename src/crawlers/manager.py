@@ -1,7 +1,27 @@
-from typing import List, Optional, Dict, Any
+import threading
+from typing import Mapping, Optional, Dict, Any, List, Set, Tuple
 from src.crawlers.javbus import Javbus
 from src.crawlers.javdb import Javdb
+from src.crawlers.base import BaseCrawler
+from src.crawlers.negative_cache import negative_cache
 from src.utils import logger
+from src.settings import Settings, settings
+from src.deadline import expired
+
+# 聚合的字段（与 BaseCrawler 的 get_<field> 方法一一对应）
+FIELDS = (
+    "title",
+    "description",
+    "release_date",
+    "director",
+    "studio",
+    "series",
+    "category",
+    "actors",
+    "cover_url",
+    "trailer_url",
+    "image_urls",
+)
 
 
 class CrawlerManager:
@@ -12,6 +32,11 @@ class CrawlerManager:
     def __init__(self, config):
         self.crawlers = {}
         self.config = config
+        # 爬虫实例（会话、详情页地址、Soup 缓存、last_request_ok）不是线程安全的：并发调用 scrape 时串行执行；
+        # 刮削流程在一个视频的搜索与图片/预告片下载期间整体持有（可重入），避免并发查询改写 detail_page
+        self.lock = threading.RLock()
+        # True 时忽略未找到缓存，重新搜索已知缺失的番号（--retry-missing）
+        self.retry_missing = False
         # 注册javdb爬虫
         crawlers_config = {
             "base_url": self.config.get("scraper.groups.javdb.base_url"),
@@ -33,6 +58,9 @@ class CrawlerManager:
             "proxy": self.config.get(
                 "scraper.groups.javdb.proxy", self.config.get("scraper.proxy")
             ),
+            "cassette": self.config.get("scraper.cassette"),
+            "breaker": self.config.get("scraper.breaker"),
+            "proxy_pool": self.config.get("scraper.proxy_pool"),
         }
         self.crawlers["Javdb"] = Javdb(crawlers_config)
 
@@ -57,65 +85,131 @@ class CrawlerManager:
             "proxy": self.config.get(
                 "scraper.groups.javbus.proxy", self.config.get("scraper.proxy")
             ),
+            "cassette": self.config.get("scraper.cassette"),
+            "breaker": self.config.get("scraper.breaker"),
+            "proxy_pool": self.config.get("scraper.proxy_pool"),
         }
         self.crawlers["Javbus"] = Javbus(crawlers_config)
 
+    def apply_settings(self, current: Settings):
+        """配置热加载：更新各爬虫的超时与重试次数（站点级配置优先）及代理池参数。"""
+        pool = current.scraper.proxy_pool
+        for name, crawler in self.crawlers.items():
+            crawler.proxy_pool.apply_settings(
+                pool.rate, pool.eject_error_rate, pool.cooldown
+            )
+            site = name.lower()
+            crawler.timeout = self.config.get(
+                f"scraper.groups.{site}.timeout", current.scraper.timeout
+            )
+            crawler.max_retries = self.config.get(
+                f"scraper.groups.{site}.max_retries", current.scraper.max_retries
+            )
+
+    def breaker_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各站点熔断器的状态与计数。"""
+        return {name: crawler.breaker.snapshot() for name, crawler in self.crawlers.items()}
+
+    def proxy_stats(self) -> Dict[str, List[Dict[str, Any]]]:
+        """各站点代理池中每个代理的健康度。"""
+        return {name: crawler.proxy_pool.snapshot() for name, crawler in self.crawlers.items()}
+
     def scrape(self, keyword: str) -> Optional[Dict[str, Any]]:
         """
-        遍历启用的爬虫，收集各站点返回的字段结果，并按配置的字段优先级进行聚合。
+        按配置的字段优先级聚合各站点的结果。
+        scraper.fallback_mode：
+        - full（默认）：完整刮削每个启用的站点，再按字段优先级聚合；
+        - need：按需回退，逐字段按优先级向站点取值，只有当某字段在高优先级站点为空时才会联系低优先级站点；
+        - plan：按各爬虫的能力声明规划请求最少的站点组合（见 _fill_by_plan）。
+        只有 plan 模式按能力声明跳过站点（如 Javdb 不提供简介，未登录时不计预告片）；
+        full / need 仍向优先级列表中的每个站点取值，由爬虫自行回退（如 Javdb 未登录时从预览区取预告片）。
         只要聚合结果中任意字段非空即返回聚合 dict；若所有站点均无结果则返回 None。
         """
+        # 取当前配置快照（热加载后自动使用新值）
+        current = settings.current.scraper
         # 字段优先级配置：可指定多个站点，按顺序尝试
-        self.field_priority: Dict[str, List[str]] = self.config.get("scraper.priority")
+        self.field_priority: Mapping[str, Tuple[str, ...]] = current.priority
         # 启用的爬虫列表，可按需增删
-        self.enabled_crawlers: List[str] = self.config.get("scraper.enabled_crawlers")
+        self.enabled_crawlers: Tuple[str, ...] = current.enabled_crawlers
         # 根据字段优先级，聚合各爬虫数据
-        merged: Dict[str, Any] = {
-            "title": None,
-            "description": None,
-            "release_date": None,
-            "director": None,
-            "studio": None,
-            "series": None,
-            "category": None,
-            "actors": None,
-            "cover_url": None,
-            "trailer_url": None,
-            "image_urls": None,
-        }
+        merged: Dict[str, Any] = {field: None for field in FIELDS}
+
+        with self.lock:
+            if current.fallback_mode == "need":
+                self._fill_on_demand(keyword, merged)
+            elif current.fallback_mode == "plan":
+                self._fill_by_plan(keyword, merged)
+            else:
+                self._fill_from_all(keyword, merged)
+
+        if expired():
+            missing = [field for field, value in merged.items() if value is None]
+            logger.warning(f"{keyword} 时间预算用尽，保留已获取的字段，未获取：{missing}")
+
+        # 只要有一个字段有值就返回
+        if any(value is not None for value in merged.values()):
+            logger.info("成功聚合字段")
+            return merged
+
+        logger.warning(f"所有爬虫均未找到：{keyword}")
+        return None
+
+    def _search(
+        self, crawler_name: str, crawler: BaseCrawler, keyword: str
+    ) -> Optional[str]:
+        """
+        在单个站点搜索，返回详情页 URL 并记录到 crawler.detail_page（下载图片时作为 Referer）。
+        已知该站点没有此番号（未找到缓存仍在有效期内）时不发起请求；
+        站点明确答复未找到时写入缓存，因网络等原因没有得到答复时不写入。
+        """
+        site = crawler_name.lower()
+        if not self.retry_missing and negative_cache.is_missing(site, keyword):
+            logger.info(f"爬虫 {crawler_name} 此前未找到 {keyword}，本次跳过。")
+            return None
+        logger.info(f"尝试使用爬虫 {crawler_name} 搜索：{keyword}")
+        try:
+            detail_url = crawler.search(keyword)
+        except Exception as e:
+            logger.error(f"爬虫 {crawler_name} 运行出错：{e}")
+            return None
+        if not detail_url:
+            logger.debug(f"爬虫 {crawler_name} 未找到结果")
+            if crawler.last_request_ok:
+                negative_cache.record_miss(site, keyword)
+            return None
+        negative_cache.record_found(site, keyword)
+        logger.info(f"爬虫 {crawler_name} 找到链接：{detail_url}")
+        # 更新详情页地址
+        crawler.detail_page = detail_url
+        return detail_url
+
+    def _fill_from_all(self, keyword: str, merged: Dict[str, Any]):
+        """完整刮削所有启用的站点，再按字段优先级填充 merged。"""
         # 先收集所有爬虫结果
         crawler_results: Dict[str, Dict[str, Any]] = {}
         for name, crawler in self.crawlers.items():
             crawler_name = name
             if crawler_name.lower() not in self.enabled_crawlers:
                 continue
-            logger.info(f"尝试使用爬虫 {crawler_name} 搜索：{keyword}")
+            if not crawler.breaker.available():
+                logger.info(f"站点 {crawler_name} 熔断中，本次跳过。")
+                continue
+            if expired():
+                break
+            detail_url = self._search(crawler_name, crawler, keyword)
+            if not detail_url:
+                continue
+            # 逐字段解析；预算用尽时停止，已解析的字段保留
+            data: Dict[str, Any] = {}
             try:
-                detail_url = crawler.search(keyword)
-                if not detail_url:
-                    logger.debug(f"爬虫 {crawler_name} 未找到结果")
-                    continue
-
-                logger.info(f"爬虫 {crawler_name} 找到链接：{detail_url}")
-                # 更新详情页地址
-                crawler.detail_page = detail_url
-                data: Dict[str, Any] = {
-                    "title": crawler.get_title(detail_url),
-                    "description": crawler.get_description(detail_url),
-                    "release_date": crawler.get_release_date(detail_url),
-                    "director": crawler.get_director(detail_url),
-                    "studio": crawler.get_studio(detail_url),
-                    "series": crawler.get_series(detail_url),
-                    "category": crawler.get_category(detail_url),
-                    "actors": crawler.get_actors(detail_url),
-                    "cover_url": crawler.get_cover_url(detail_url),
-                    "trailer_url": crawler.get_trailer_url(detail_url),
-                    "image_urls": crawler.get_image_urls(detail_url),
-                }
-                crawler_results[crawler_name.lower()] = data
+                for field in FIELDS:
+                    if expired():
+                        break
+                    data[field] = getattr(crawler, f"get_{field}")(detail_url)
             except Exception as e:
                 logger.error(f"爬虫 {crawler_name} 运行出错：{e}")
                 continue
+            crawler_results[crawler_name.lower()] = data
 
         # 按字段优先级填充 merged
         for field, priority_list in self.field_priority.items():
@@ -128,13 +222,124 @@ class CrawlerManager:
                     logger.info(f"字段 {field} 取自 {site}")
                     break
 
-        # 只要有一个字段有值就返回
-        if any(value is not None for value in merged.values()):
-            logger.info("成功聚合字段")
-            return merged
+    def _fill_on_demand(self, keyword: str, merged: Dict[str, Any]):
+        """
+        按需回退：逐字段沿优先级列表取值，站点的搜索与详情页在首次需要时才请求，并在本次刮削内复用。
+        高优先级站点已填满所有字段时，低优先级站点完全不会被联系。
+        """
+        sites = {
+            name.lower(): (name, crawler) for name, crawler in self.crawlers.items()
+        }
+        # 站点 -> 详情页 URL（None 表示未启用、未找到或出错）
+        detail_urls: Dict[str, Optional[str]] = {}
 
-        logger.warning(f"所有爬虫均未找到：{keyword}")
-        return None
+        for field, priority_list in self.field_priority.items():
+            if expired():
+                break
+            for site in priority_list:
+                if site not in detail_urls:
+                    if site in sites and site in self.enabled_crawlers:
+                        name, crawler = sites[site]
+                        if crawler.breaker.available():
+                            detail_urls[site] = self._search(name, crawler, keyword)
+                        else:
+                            logger.info(f"站点 {name} 熔断中，本次跳过。")
+                            detail_urls[site] = None
+                    else:
+                        detail_urls[site] = None
+                detail_url = detail_urls[site]
+                if not detail_url:
+                    continue
+                name, crawler = sites[site]
+                try:
+                    value = getattr(crawler, f"get_{field}")(detail_url)
+                except Exception as e:
+                    logger.error(f"爬虫 {name} 获取字段 {field} 出错：{e}")
+                    continue
+                if value is not None:
+                    merged[field] = value
+                    logger.info(f"字段 {field} 取自 {site}")
+                    break
+
+        contacted = [
+            site
+            for site in detail_urls
+            if site in sites and site in self.enabled_crawlers
+        ]
+        logger.debug(f"按需回退：本次联系了 {len(contacted)} 个站点 {contacted}")
+
+    def _fill_by_plan(self, keyword: str, merged: Dict[str, Any]):
+        """
+        按能力声明规划：把每个站点看作一个“能覆盖若干字段、代价为 SEARCH_COST 次请求”的集合，
+        用贪心加权集合覆盖每次选出 Σ(未填字段的 reliability) / 代价 最高的站点，搜索并解析它能提供的未填字段，
+        再根据实际结果（未找到、字段为空）对剩余字段重新选择，直到字段填满或没有可用站点。
+        优先级列表只决定某字段可以取自哪些站点，以及得分相同时的先后；没有任何站点提供的字段不会发起请求。
+        """
+        sites = {
+            name.lower(): (name, crawler) for name, crawler in self.crawlers.items()
+        }
+        # 字段 -> 可提供该字段的站点（按优先级顺序）
+        candidates: Dict[str, List[str]] = {}
+        for field, priority_list in self.field_priority.items():
+            usable = [
+                site
+                for site in priority_list
+                if site in sites
+                and site in self.enabled_crawlers
+                and sites[site][1].provides(field)
+            ]
+            if usable:
+                candidates[field] = usable
+            else:
+                logger.debug(f"字段 {field} 没有启用的站点提供，跳过")
+        # 同分时按站点在优先级列表中首次出现的顺序
+        order: List[str] = []
+        for usable in candidates.values():
+            order.extend(site for site in usable if site not in order)
+
+        tried: Set[str] = set()
+        while not expired():
+            open_fields = [field for field in candidates if merged.get(field) is None]
+            best, best_score = None, 0.0
+            for site in order:
+                if site in tried:
+                    continue
+                crawler = sites[site][1]
+                gain = sum(
+                    crawler.capability(field).reliability
+                    for field in open_fields
+                    if site in candidates[field]
+                )
+                score = gain / max(crawler.SEARCH_COST, 1)
+                if score > best_score:
+                    best, best_score = site, score
+            if best is None:
+                break
+            tried.add(best)
+            name, crawler = sites[best]
+            if not crawler.breaker.available():
+                logger.info(f"站点 {name} 熔断中，本次跳过。")
+                continue
+            fields = [field for field in open_fields if best in candidates[field]]
+            logger.debug(
+                f"规划：联系 {name}（{crawler.SEARCH_COST} 次请求，字段 {fields}）"
+            )
+            detail_url = self._search(name, crawler, keyword)
+            if not detail_url:
+                continue
+            for field in fields:
+                if expired():
+                    break
+                try:
+                    value = getattr(crawler, f"get_{field}")(detail_url)
+                except Exception as e:
+                    logger.error(f"爬虫 {name} 获取字段 {field} 出错：{e}")
+                    continue
+                if value is not None:
+                    merged[field] = value
+                    logger.info(f"字段 {field} 取自 {best}")
+
+        logger.debug(f"规划：本次联系了 {len(tried)} 个站点 {sorted(tried)}")
 
 
 if __name__ == "__main__":
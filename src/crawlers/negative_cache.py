@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.config import config
+from src.utils import logger
+
+
+class NegativeCache:
+    """
+    “站点上没有该番号”的缓存，按 (站点, 番号) 记录：
+    - 只记录站点明确答复“未找到”的情况（搜索结果为空、详情页 404），网络错误、验证页、熔断、预算用尽不记录；
+    - 第 n 次未找到后，间隔 ttl_hours × 2^(n-1) 小时（不超过 max_days 天）再重新搜索；
+    - 之后某次找到则删除记录。
+    保存为追加写入的 JSONL，同一键以最后一行为准。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            configured = config.get("scraper.negative_cache.path", "")
+            path = (
+                Path(configured)
+                if configured
+                else Path(config.get("base.output_path", "javoutp")) / "not_found.jsonl"
+            )
+        self.path = path
+        self.enabled = bool(config.get("scraper.negative_cache.enabled", True))
+        self.ttl = float(config.get("scraper.negative_cache.ttl_hours", 24)) * 3600
+        self.max_ttl = float(config.get("scraper.negative_cache.max_days", 90)) * 86400
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[Tuple[str, str], Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        if self._entries is not None:
+            return self._entries
+        entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = (record["site"], record["number"])
+                    except (ValueError, KeyError):
+                        continue
+                    if record.get("misses"):
+                        entries[key] = record
+                    else:
+                        entries.pop(key, None)
+        self._entries = entries
+        return entries
+
+    def _append(self, record: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def is_missing(self, site: str, number: str) -> bool:
+        """是否为已知缺失且仍在重新检查的间隔内（此时应跳过该站点）。"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            record = self._load().get((site, number))
+        return record is not None and time.time() < record["next_check"]
+
+    def record_miss(self, site: str, number: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = self._load()
+            misses = entries.get((site, number), {}).get("misses", 0) + 1
+            interval = min(self.ttl * 2 ** (misses - 1), self.max_ttl)
+            now = time.time()
+            record = {
+                "site": site,
+                "number": number,
+                "misses": misses,
+                "checked_at": now,
+                "next_check": now + interval,
+            }
+            entries[(site, number)] = record
+            self._append(record)
+        logger.debug(
+            f"站点 {site} 未找到 {number}（第 {misses} 次），{interval / 3600:.0f} 小时内不再搜索"
+        )
+
+    def record_found(self, site: str, number: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            entries = self._load()
+            if (site, number) not in entries:
+                return
+            del entries[(site, number)]
+            self._append({"site": site, "number": number, "misses": 0})
+
+
+negative_cache = NegativeCache()
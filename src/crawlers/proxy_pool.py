@@ -0,0 +1,205 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import requests
+
+from src.deadline import remaining
+from src.utils import logger
+
+# 健康度统计的平滑系数（指数移动平均，越大越看重最近的请求）
+ALPHA = 0.2
+# 按错误率剔除前至少需要的请求数
+MIN_SAMPLES = 3
+
+
+class ProxyEndpoint:
+    """
+    代理池中的一个出口（proxy 为 None 表示直连）：独立的 Session（Cookie 互不影响）、
+    独立的请求间隔，以及按延迟、错误率、验证页比例计算的健康度。
+    """
+
+    def __init__(self, proxy: Optional[str], headers: Dict[str, str], interval: float):
+        self.proxy = proxy
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        if proxy:
+            self.session.proxies.update({"http": proxy, "https": proxy})
+        self.interval = interval
+        self.next_slot = 0.0
+        self.last_used = 0.0
+        self.disabled_until = 0.0
+        self.reset()
+
+    def reset(self):
+        """清空健康度统计（重新启用时从头观察）。"""
+        self.samples = 0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.challenge_rate = 0.0
+
+    @property
+    def label(self) -> str:
+        return self.proxy or "直连"
+
+    def score(self) -> float:
+        """0~1，越大越健康：成功率 × 未遇验证页比例 × 延迟折算（1 秒约 0.83、5 秒约 0.5）。"""
+        return (
+            (1 - self.error_rate)
+            * (1 - self.challenge_rate)
+            / (1 + self.latency / 5)
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "proxy": self.label,
+            "healthy": self.disabled_until <= time.monotonic(),
+            "score": round(self.score(), 3),
+            "latency": round(self.latency, 3),
+            "error_rate": round(self.error_rate, 3),
+            "challenge_rate": round(self.challenge_rate, 3),
+            "samples": self.samples,
+        }
+
+
+class ProxyPool:
+    """
+    单个站点的代理池（scraper.proxy / scraper.groups.<site>.proxy 可配置为列表）：
+    - 每个代理的请求间隔不小于 1/rate 秒，请求分散到各个健康的代理上，总吞吐随代理数增加；
+    - 优先使用当前可立即发出请求、健康度最高的代理，同分时取最久未用的（即轮转）；
+    - 遇到验证页的代理立即剔除，错误率超过 eject_error_rate 的代理剔除，cooldown 秒后重新启用并重新统计；
+    - 所有代理都被剔除时，使用最早到期的一个，站点级的失败交由熔断器处理。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        proxies: Sequence[Optional[str]],
+        headers: Dict[str, str],
+        rate: float = 0,
+        eject_error_rate: float = 0.5,
+        cooldown: float = 600,
+    ):
+        self.name = name
+        self.endpoints = [
+            ProxyEndpoint(proxy, headers, 0.0) for proxy in (proxies or [None])
+        ]
+        self._lock = threading.Lock()
+        self.apply_settings(rate, eject_error_rate, cooldown)
+
+    def apply_settings(self, rate: float, eject_error_rate: float, cooldown: float):
+        """更新请求速率与剔除参数（初始化及配置热加载时调用），已剔除的代理按原定时间恢复。"""
+        interval = 1 / rate if rate and rate > 0 else 0.0
+        with self._lock:
+            for endpoint in self.endpoints:
+                endpoint.interval = interval
+            self.eject_error_rate = float(eject_error_rate)
+            self.cooldown = float(cooldown)
+
+    @classmethod
+    def from_config(
+        cls,
+        options: Optional[Dict[str, Any]],
+        name: str,
+        proxy: Union[str, List[str], None],
+        headers: Dict[str, str],
+    ) -> "ProxyPool":
+        """options 为 scraper.proxy_pool 配置；proxy 为单个代理地址或地址列表。"""
+        options = options or {}
+
+        def option(key: str, default: float) -> float:
+            # 0 是有效值（如 eject_error_rate: 0 表示出错即剔除），只有未配置时才使用默认值
+            value = options.get(key)
+            return default if value is None else value
+
+        if isinstance(proxy, str):
+            proxy = [proxy]
+        proxies = [p for p in (proxy or []) if p]
+        return cls(
+            name,
+            proxies,
+            headers,
+            rate=float(option("rate", 0)),
+            eject_error_rate=option("eject_error_rate", 0.5),
+            cooldown=option("cooldown", 600),
+        )
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _healthy(self, now: float) -> List[ProxyEndpoint]:
+        return [ep for ep in self.endpoints if ep.disabled_until <= now]
+
+    def has_alternative(self, endpoint: ProxyEndpoint) -> bool:
+        """除 endpoint 外是否还有健康的代理（只有一个出口时始终为 False）。"""
+        with self._lock:
+            return any(ep is not endpoint for ep in self._healthy(time.monotonic()))
+
+    def best(self) -> ProxyEndpoint:
+        """当前健康度最高的代理（不占用请求配额），供 yt-dlp 等不经过代理池的下载使用。"""
+        with self._lock:
+            candidates = self._healthy(time.monotonic()) or self.endpoints
+            return max(candidates, key=lambda ep: ep.score())
+
+    def acquire(self) -> ProxyEndpoint:
+        """选出本次请求使用的代理并占用一个请求配额；需要等待间隔时在锁外等待（不超过当前视频的剩余预算）。"""
+        with self._lock:
+            now = time.monotonic()
+            candidates = self._healthy(now)
+            if not candidates:
+                candidates = [min(self.endpoints, key=lambda ep: ep.disabled_until)]
+            endpoint = min(
+                candidates,
+                key=lambda ep: (max(ep.next_slot, now), -ep.score(), ep.last_used),
+            )
+            start = max(endpoint.next_slot, now)
+            endpoint.next_slot = start + endpoint.interval
+            endpoint.last_used = start
+        wait = start - now
+        left = remaining()
+        if left is not None:
+            wait = min(wait, left)
+        if wait > 0:
+            time.sleep(wait)
+        return endpoint
+
+    def report(
+        self,
+        endpoint: ProxyEndpoint,
+        latency: float,
+        ok: bool,
+        challenge: bool = False,
+    ):
+        """记录一次请求的结果并更新健康度；需要剔除时记录日志。"""
+        with self._lock:
+            endpoint.samples += 1
+            endpoint.latency += ALPHA * (latency - endpoint.latency)
+            endpoint.error_rate += ALPHA * ((0.0 if ok else 1.0) - endpoint.error_rate)
+            endpoint.challenge_rate += ALPHA * (
+                (1.0 if challenge else 0.0) - endpoint.challenge_rate
+            )
+            if len(self.endpoints) < 2 or endpoint.disabled_until > time.monotonic():
+                return
+            if challenge:
+                reason = "遇到验证页"
+            elif (
+                endpoint.samples >= MIN_SAMPLES
+                and endpoint.error_rate > self.eject_error_rate
+            ):
+                reason = f"错误率 {endpoint.error_rate:.0%}"
+            else:
+                return
+            endpoint.disabled_until = time.monotonic() + self.cooldown
+            endpoint.reset()
+        logger.warning(
+            f"站点 {self.name} 剔除代理 {endpoint.label}（{reason}），{self.cooldown:.0f} 秒后重新启用"
+        )
+
+    def summary(self) -> str:
+        """实时面板显示的健康代理数。"""
+        with self._lock:
+            return f"{len(self._healthy(time.monotonic()))}/{len(self.endpoints)}"
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [ep.snapshot() for ep in self.endpoints]
@@ -0,0 +1,151 @@
+from typing import Dict, Optional
+
+from rich import get_console
+from rich.console import Group
+from rich.live import Live
+from rich.progress import (
+    BarColumn,
+    DownloadColumn,
+    MofNCompleteColumn,
+    Progress,
+    SpinnerColumn,
+    TaskID,
+    TextColumn,
+    TimeRemainingColumn,
+    TransferSpeedColumn,
+)
+from rich.table import Table
+
+from src.metrics import metrics
+
+
+def _human_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+class Dashboard:
+    """
+    基于 rich 的实时面板：总进度（完成/剩余、每分钟条数、预计剩余时间）、刮削中的视频与进行中的请求数、
+    各队列深度、各站点请求数/错误率/熔断状态、各主机下载速率，以及正在下载的预告片进度。
+    所有数据来自线程安全的 metrics，由 Live 的刷新线程定期读取，因此并发执行时显示仍然一致。
+    日志与面板共用同一个 Console，日志行显示在面板上方。
+    """
+
+    def __init__(self):
+        self.active = False
+        self._live: Optional[Live] = None
+        self.progress = Progress(
+            SpinnerColumn(),
+            TextColumn("{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TextColumn("{task.fields[rate]}"),
+            TimeRemainingColumn(),
+        )
+        self.downloads = Progress(
+            TextColumn("{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+        )
+        self._videos = self.progress.add_task("视频", total=None, rate="")
+        self._trailers: Dict[str, TaskID] = {}
+
+    def __enter__(self) -> "Dashboard":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        console = get_console()
+        # 非终端（重定向到文件、cron 等）时不启用，保持普通日志输出
+        if self.active or not console.is_terminal:
+            return
+        self._live = Live(
+            get_renderable=self._render,
+            console=console,
+            refresh_per_second=2,
+            transient=True,
+        )
+        self._live.start()
+        self.active = True
+
+    def stop(self):
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+        self.active = False
+
+    def update_download(
+        self, key: str, description: str, completed: int, total: Optional[int]
+    ):
+        """更新（或新建）一个下载进度条，供 yt-dlp 的 progress_hook 调用。"""
+        task = self._trailers.get(key)
+        if task is None:
+            task = self.downloads.add_task(description, total=total)
+            self._trailers[key] = task
+        self.downloads.update(task, completed=completed, total=total)
+
+    def finish_download(self, key: str):
+        task = self._trailers.pop(key, None)
+        if task is not None:
+            self.downloads.remove_task(task)
+
+    def _render(self):
+        snapshot = metrics.snapshot()
+        counters, gauges = snapshot["counters"], snapshot["gauges"]
+        done = counters.get("videos_done", 0) + counters.get("videos_failed", 0)
+        minutes = max(snapshot["uptime"] / 60, 1e-6)
+        self.progress.update(
+            self._videos,
+            total=gauges.get("videos_total") or None,
+            completed=done,
+            rate=f"{done / minutes:.1f} 条/分钟 · 失败 {counters.get('videos_failed', 0)}",
+        )
+
+        probes = metrics.probes()
+        status = Table.grid(padding=(0, 3))
+        status.add_row(
+            f"刮削中 {gauges.get('videos_active', 0)}",
+            f"进行中请求 {gauges.get('requests_in_flight', 0)}",
+            *(f"{name} {value}" for name, value in probes.items() if name != "breakers"),
+        )
+
+        sites = Table(box=None, header_style="bold", pad_edge=False)
+        for column in ("站点", "请求", "错误率", "熔断"):
+            sites.add_column(column)
+        breakers = probes.get("breakers") or {}
+        names = {key.split(":", 1)[1] for key in counters if key.startswith("requests:")}
+        for name in sorted(names | set(breakers)):
+            requests_count = counters.get(f"requests:{name}", 0)
+            errors = counters.get(f"errors:{name}", 0)
+            rate = f"{errors * 100 / requests_count:.0f}%" if requests_count else "-"
+            sites.add_row(
+                name,
+                str(requests_count),
+                rate,
+                breakers.get(name, {}).get("state", "-"),
+            )
+
+        hosts = Table(box=None, header_style="bold", pad_edge=False)
+        for column in ("主机", "速率", "已下载"):
+            hosts.add_column(column)
+        rates = metrics.rates()
+        for host, total in sorted(snapshot["bytes"].items(), key=lambda kv: -kv[1])[:8]:
+            hosts.add_row(host, f"{_human_bytes(rates.get(host, 0))}/s", _human_bytes(total))
+
+        tables = Table.grid(padding=(0, 6))
+        tables.add_row(sites, hosts)
+        parts = [self.progress, status, tables]
+        if self._trailers:
+            parts.append(self.downloads)
+        return Group(*parts)
+
+
+dashboard = Dashboard()
@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# 当前视频的截止时间（time.monotonic()）；None 表示不限时
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def video_budget(seconds: Optional[float]) -> Iterator[None]:
+    """
+    为一个视频设置端到端的时间预算（秒，0 或 None 表示不限时）。
+    截止时间保存在 contextvar 中，同一线程内的请求、字段解析与下载都会读取它；
+    嵌套使用时取更早的截止时间。
+    """
+    deadline = time.monotonic() + seconds if seconds else None
+    outer = _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """剩余秒数；不限时返回 None。"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def clamp_timeout(timeout: float) -> float:
+    """请求超时不超过剩余预算。"""
+    left = remaining()
+    return timeout if left is None else max(0.1, min(timeout, left))
@@ -0,0 +1,92 @@
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+try:  # Python 3.14+ 标准库
+    from compression import zstd
+except ImportError:
+    zstd = None
+try:  # 可选依赖：pip install zstandard
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from src.models import Video
+from src.utils import logger
+from src.nfo_gen import nfo_gen
+
+
+def open_stream(path: Path, mode: str) -> IO[str]:
+    """
+    按后缀打开文本流：.gz 使用 gzip，.zst 使用 zstd（标准库 compression.zstd 或 zstandard 包），其余为普通文本。
+    mode 为 "r" 或 "w"。
+    """
+    suffix = path.suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if suffix == ".zst":
+        if zstd is not None:
+            return zstd.open(path, mode + "t", encoding="utf-8")
+        if zstandard is not None:
+            return zstandard.open(path, mode + "t", encoding="utf-8")
+        raise RuntimeError("读写 .zst 需要 Python 3.14+ 或安装 zstandard 包")
+    return io.open(path, mode, encoding="utf-8")
+
+
+def iter_nfo_videos(root: Path) -> Iterator[Video]:
+    """逐个解析 root 下所有 NFO（惰性遍历，不在内存中累积）。"""
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(".nfo"):
+                video = nfo_gen.read_nfo(Path(dirpath) / name)
+                if video is not None:
+                    yield video
+
+
+def export_jsonl(videos: Iterable[Video], path: Path) -> int:
+    """将 Video 逐条写为 JSONL（每行一个 Video.to_dict()），返回写入条数。"""
+    count = 0
+    with open_stream(path, "w") as f:
+        for video in videos:
+            f.write(json.dumps(video.to_dict(), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def iter_jsonl(path: Path) -> Iterator[Video]:
+    """逐行读取 JSONL 并还原为 Video；格式错误的行记录警告后跳过。"""
+    with open_stream(path, "r") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield Video.from_dict(json.loads(line))
+            except (ValueError, TypeError) as e:
+                logger.warning(f"跳过无法解析的记录（第 {line_no} 行）：{e}")
+
+
+def import_jsonl(path: Path, write_nfo: bool = True) -> int:
+    """
+    从 JSONL 恢复：对本地仍存在的视频重新生成 NFO（内容未变化的 NFO 不会被改写），全程不访问网络。
+    返回读取的记录数。
+    """
+    count = 0
+    nfo_gen.reset_stats()
+    for video in iter_jsonl(path):
+        count += 1
+        if not write_nfo:
+            continue
+        if not video.file_path or not Path(video.file_path).exists():
+            logger.debug(f"视频文件不存在，跳过 NFO：{video.parsed_number}")
+            continue
+        nfo_gen.generate_nfo(video)
+    if write_nfo:
+        logger.info(
+            f"NFO 统计：写入 {nfo_gen.stats['written']} 个，内容未变化跳过 {nfo_gen.stats['skipped']} 个。"
+        )
+    return count
@@ -1,20 +1,26 @@
+import json
+import time
+from contextlib import nullcontext
 import typer
 from pathlib import Path
+from typing import List, Optional
 
 from src.utils import logger
 from src.scanner import Scanner
 from src.scraper import Scraper
-from src.config import config
+from src.watcher import watch as run_watch
+from src.settings import settings
+from src.exporter import export_jsonl, import_jsonl, iter_nfo_videos
+from src.catalog import catalog, ASSETS
+from src.server import serve as run_serve
+from src.dashboard import dashboard
+from src.pipeline import scan_queue
 
 app = typer.Typer(help="AVScraper 命令行工具")
 
-@app.callback(invoke_without_command=True)
-def main():
-    """
-    主入口：读取配置，扫描视频目录并执行元数据刮削。
-    说明：当前 CLI 仅提供默认入口（无子命令），运行后会按 config.yaml 中的 base.scan_path 执行扫描与刮削流程。
-    """
-    # 初始化Scanner和Scraper
+
+def _init_components(ctx: typer.Context):
+    """初始化 Scanner 和 Scraper，失败时退出；应用全局选项（--retry-missing）。"""
     try:
         scanner = Scanner()
         logger.info("扫描器 初始化成功。")
@@ -28,17 +34,149 @@ def main():
     except Exception as e:
         logger.error(f"刮捎器 初始化失败：{e}")
         raise typer.Exit(code=1)
+    scraper.crawler_manager.retry_missing = bool((ctx.obj or {}).get("retry_missing"))
+    return scanner, scraper
+
+
+def _dashboard():
+    """base.dashboard 开启且输出到终端时显示实时面板。"""
+    return dashboard if settings.current.base.dashboard else nullcontext()
+
+
+@app.callback(invoke_without_command=True)
+def main(
+    ctx: typer.Context,
+    retry_missing: bool = typer.Option(
+        False,
+        "--retry-missing",
+        help="忽略未找到缓存，重新搜索此前各站点均未找到的番号（也适用于子命令，如 --retry-missing watch）",
+    ),
+):
+    """
+    主入口：读取配置，扫描视频目录并执行元数据刮削。
+    说明：不带子命令运行时，会按 config.yaml 中的 base.scan_path（单个目录或目录列表）执行一次完整的扫描与刮削流程。
+    """
+    ctx.obj = {"retry_missing": retry_missing}
+    if ctx.invoked_subcommand is not None:
+        return
+
+    # 初始化Scanner和Scraper
+    scanner, scraper = _init_components(ctx)
+
+    # 边扫描边刮削：扫描线程经有界的调度队列交给刮削流程（每次取出整个队列中最优先的一条）
+    current = settings.current
+    entries = scan_queue(scanner, current.base.scan_paths, current.scanner.queue_size)
+    with _dashboard():
+        scraper.scrape_stream(entries)
+
+
+@app.command()
+def watch(ctx: typer.Context):
+    """
+    监听 base.scan_path，只刮削新出现且已写入完成的视频文件（Linux 下使用 inotify，其余平台轮询）。
+    """
+    roots = [Path(p) for p in settings.current.base.scan_paths]
+    missing = [str(p) for p in roots if not p.is_dir()]
+    if not roots or missing:
+        logger.error(f"扫描路径不存在：{missing or settings.current.base.scan_paths}")
+        raise typer.Exit(code=1)
+    scanner, scraper = _init_components(ctx)
+    with _dashboard():
+        run_watch(scanner, scraper, roots)
+
+
+@app.command()
+def serve(
+    ctx: typer.Context,
+    host: Optional[str] = typer.Option(None, help="监听地址，默认为 serve.host"),
+    port: Optional[int] = typer.Option(None, help="监听端口，默认为 serve.port"),
+):
+    """
+    常驻运行并提供本地 HTTP/JSON 接口：查询番号元数据（内存缓存、并发合并请求）与提交刮削任务。
+    """
+    scanner, scraper = _init_components(ctx)
+    current = settings.current.serve
+    run_serve(scanner, scraper, host or current.host, port or current.port)
+
+
+@app.command("export")
+def export_(
+    output: Path = typer.Argument(
+        ..., help="导出文件路径；以 .gz / .zst 结尾时自动压缩"
+    ),
+    source: Optional[Path] = typer.Option(
+        None, help="读取 NFO 的目录，默认为 base.output_path"
+    ),
+):
+    """
+    将已刮削的元数据（NFO）流式导出为 JSONL，每行一个 Video 记录，内存占用与库的规模无关。
+    """
+    source = source or Path(settings.current.base.output_path)
+    if not source.is_dir():
+        logger.error(f"目录不存在：{source}")
+        raise typer.Exit(code=1)
+    count = export_jsonl(iter_nfo_videos(source), output)
+    logger.info(f"已导出 {count} 条记录到：{output}")
+
+
+@app.command("import")
+def import_(
+    input_path: Path = typer.Argument(..., help="JSONL 文件路径（支持 .gz / .zst）"),
+    nfo: bool = typer.Option(True, help="是否为本地存在的视频重新生成 NFO"),
+):
+    """
+    从 JSONL 离线恢复元数据，不访问任何站点。
+    """
+    if not input_path.is_file():
+        logger.error(f"文件不存在：{input_path}")
+        raise typer.Exit(code=1)
+    count = import_jsonl(input_path, write_nfo=nfo)
+    logger.info(f"已导入 {count} 条记录。")
 
-    # 扫描配置路径
-    scan_path = config.get("base.scan_path")
-    if scan_path:
-        path_obj = Path(scan_path)
-        logger.info(f"开始扫描配置路径：{path_obj.absolute()}")
-        file_map, added_count = scanner.scan_directory(path_obj)
-        logger.info(f"扫描完成。新增了 {added_count} 个视频。")
 
-    # 刮削待处理视频的元数据
-    scraper.scrape_all(file_map)
+@app.command()
+def query(
+    actor: Optional[str] = typer.Option(None, help="演员名（忽略大小写，精确匹配）"),
+    studio: Optional[str] = typer.Option(None, help="片商"),
+    series: Optional[str] = typer.Option(None, help="系列"),
+    genre: Optional[str] = typer.Option(None, help="类别"),
+    has: List[str] = typer.Option(
+        [], help=f"已有的资源，可重复：{'/'.join(ASSETS)}"
+    ),
+    missing: List[str] = typer.Option(
+        [], help=f"缺失的资源，可重复：{'/'.join(ASSETS)}"
+    ),
+    limit: int = typer.Option(0, help="最多输出条数，0 为不限"),
+    as_json: bool = typer.Option(False, "--json", help="以 JSONL 输出完整记录"),
+):
+    """
+    从本地目录（刮削时自动记录）的倒排索引中查询，不遍历输出目录、不解析 NFO。
+    例：query --actor 某演员 --missing trailer
+    """
+    start = time.perf_counter()
+    try:
+        results = catalog.query(
+            actor=actor,
+            studio=studio,
+            series=series,
+            genre=genre,
+            has=has,
+            missing=missing,
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(code=1)
+    elapsed = (time.perf_counter() - start) * 1000
+    for record in results[:limit] if limit else results:
+        parts = catalog.parts_of(record)
+        if as_json:
+            data = record.to_dict()
+            if len(parts) > 1:
+                data["parts"] = parts
+            typer.echo(json.dumps(data, ensure_ascii=False))
+        else:
+            typer.echo(f"{record.parsed_number}\t{record.title or ''}\t{' | '.join(parts)}")
+    logger.info(f"共 {len(results)} 条（目录 {len(catalog)} 条，耗时 {elapsed:.1f} ms）")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Tuple
+
+# 计算传输速率的滑动窗口（秒）
+RATE_WINDOW = 10.0
+
+
+class Metrics:
+    """
+    线程安全的运行指标：
+    - counters：累计计数（videos_done、requests:<站点>、errors:<站点> 等）；
+    - gauges：当前值（进行中的请求数、刮削中的视频数等），可增可减；
+    - 按主机统计的下载字节数与最近 RATE_WINDOW 秒的速率；
+    - probes：注册的回调（队列深度、熔断器状态等），读取时才调用。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.gauges: Dict[str, int] = defaultdict(int)
+        self.bytes_total: Dict[str, int] = defaultdict(int)
+        self._bytes_window: Dict[str, Deque[Tuple[float, int]]] = defaultdict(deque)
+        self._probes: Dict[str, Callable[[], Any]] = {}
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def set(self, name: str, value: int):
+        with self._lock:
+            self.gauges[name] = value
+
+    def add(self, name: str, delta: int):
+        with self._lock:
+            self.gauges[name] += delta
+
+    @contextmanager
+    def tracking(self, name: str) -> Iterator[None]:
+        """在 with 块执行期间把 gauge name 加一（如刮削中的视频数）。"""
+        self.add(name, 1)
+        try:
+            yield
+        finally:
+            self.add(name, -1)
+
+    def add_bytes(self, host: str, amount: int):
+        if amount <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.bytes_total[host] += amount
+            window = self._bytes_window[host]
+            window.append((now, amount))
+            # 写入时就丢弃过期的记录：serve 模式、无终端的 watch 模式不会调用 rates()
+            self._prune(window, now - RATE_WINDOW)
+
+    @staticmethod
+    def _prune(window: Deque[Tuple[float, int]], cutoff: float):
+        while window and window[0][0] < cutoff:
+            window.popleft()
+
+    def rates(self) -> Dict[str, float]:
+        """各主机最近 RATE_WINDOW 秒的平均速率（字节/秒）。"""
+        cutoff = time.monotonic() - RATE_WINDOW
+        with self._lock:
+            result = {}
+            for host, window in self._bytes_window.items():
+                self._prune(window, cutoff)
+                result[host] = sum(n for _, n in window) / RATE_WINDOW
+            return result
+
+    def register(self, name: str, probe: Callable[[], Any]):
+        """注册一个按需读取的指标（如队列深度）。"""
+        with self._lock:
+            self._probes[name] = probe
+
+    def probe(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            probe = self._probes.get(name)
+        if probe is None:
+            return default
+        try:
+            return probe()
+        except Exception:
+            return default
+
+    def probes(self) -> Dict[str, Any]:
+        with self._lock:
+            names = list(self._probes)
+        return {name: self.probe(name) for name in names}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime": time.monotonic() - self.started_at,
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "bytes": dict(self.bytes_total),
+            }
+
+
+metrics = Metrics()
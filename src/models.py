@@ -1,3 +1,5 @@
+import json
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
@@ -45,3 +47,177 @@ class Video:
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Video":
+        """to_dict 的逆操作；未知字段忽略，时间字段从 ISO 格式还原。"""
+        kwargs = {k: data.get(k) for k in cls.__dataclass_fields__ if k in data}
+        for key in ("created_at", "updated_at"):
+            value = kwargs.get(key)
+            if isinstance(value, str):
+                kwargs[key] = datetime.fromisoformat(value)
+            elif value is None:
+                kwargs.pop(key, None)
+        if kwargs.get("scrape_status") is None:
+            kwargs.pop("scrape_status", None)
+        return cls(**kwargs)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _as_names(value) -> tuple:
+    """将演员/类别字段统一为驻留字符串元组；兼容 list、JSON 字符串、逗号分隔字符串。"""
+    if not value:
+        return ()
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+            value = parsed if isinstance(parsed, list) else value.split(",")
+        except ValueError:
+            value = value.split(",")
+    return tuple(sys.intern(str(v).strip()) for v in value if v and str(v).strip())
+
+
+def _timestamp(value) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return value
+
+
+class CompactVideo:
+    """
+    Video 的紧凑表示，用于在内存中批量持有大量记录（如目录索引、批量导入导出）。
+    - 使用 __slots__，没有实例 __dict__；
+    - 演员、片商、系列、导演、类别、爬虫名等高度重复的字符串做驻留（sys.intern），同名只占一份内存；
+    - 演员/类别为元组；封面/预告片/剧照拆成“来源爬虫 + 地址”的独立字段，不再以 [爬虫名, url...] 列表存放；
+    - 时间字段为浮点时间戳而不是 datetime 对象。
+    与 Video 之间可通过 from_video / to_video 互相转换，to_dict 的结构与 Video.to_dict 一致。
+    """
+
+    __slots__ = (
+        "parsed_number",
+        "file_path",
+        "title",
+        "description",
+        "release_date",
+        "director",
+        "studio",
+        "series",
+        "category",
+        "actors",
+        "cover_source",
+        "cover",
+        "trailer_source",
+        "trailer",
+        "image_source",
+        "images",
+        "scrape_status",
+        "error_msg",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(
+        self,
+        parsed_number: str,
+        file_path: Optional[str] = None,
+        title: Optional[str] = None,
+        description: Optional[str] = None,
+        release_date: Optional[str] = None,
+        director: Optional[str] = None,
+        studio: Optional[str] = None,
+        series: Optional[str] = None,
+        category=None,
+        actors=None,
+        cover_url=None,
+        trailer_url=None,
+        image_urls=None,
+        scrape_status: str = "PENDING",
+        error_msg: Optional[str] = None,
+        created_at=None,
+        updated_at=None,
+    ):
+        self.parsed_number = parsed_number
+        self.file_path = file_path
+        self.title = title
+        self.description = description
+        self.release_date = _intern(release_date)
+        self.director = _intern(director)
+        self.studio = _intern(studio)
+        self.series = _intern(series)
+        self.category = _as_names(category)
+        self.actors = _as_names(actors)
+        self.cover_source, self.cover = self._split_asset(cover_url)
+        self.trailer_source, self.trailer = self._split_asset(trailer_url)
+        if image_urls and not isinstance(image_urls, str) and len(image_urls) > 1:
+            self.image_source = _intern(image_urls[0])
+            self.images = tuple(image_urls[1:])
+        else:
+            self.image_source, self.images = None, ()
+        self.scrape_status = sys.intern(scrape_status or "PENDING")
+        self.error_msg = error_msg
+        self.created_at = _timestamp(created_at)
+        self.updated_at = _timestamp(updated_at)
+
+    @staticmethod
+    def _split_asset(value):
+        if value and not isinstance(value, str) and len(value) >= 2:
+            return _intern(value[0]), value[1]
+        return None, None
+
+    @classmethod
+    def from_video(cls, video: Video) -> "CompactVideo":
+        return cls(**{k: getattr(video, k) for k in Video.__dataclass_fields__})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CompactVideo":
+        """直接从 to_dict 结构构建，不经过 Video。"""
+        return cls(**{k: data.get(k) for k in Video.__dataclass_fields__ if k in data})
+
+    @property
+    def cover_url(self) -> Optional[list]:
+        return [self.cover_source, self.cover] if self.cover else None
+
+    @property
+    def trailer_url(self) -> Optional[list]:
+        return [self.trailer_source, self.trailer] if self.trailer else None
+
+    @property
+    def image_urls(self) -> Optional[list]:
+        return [self.image_source, *self.images] if self.images else None
+
+    def to_dict(self) -> dict:
+        return {
+            "parsed_number": self.parsed_number,
+            "file_path": self.file_path,
+            "title": self.title,
+            "description": self.description,
+            "release_date": self.release_date,
+            "director": self.director,
+            "studio": self.studio,
+            "series": self.series,
+            "category": list(self.category) or None,
+            "actors": list(self.actors) or None,
+            "cover_url": self.cover_url,
+            "trailer_url": self.trailer_url,
+            "image_urls": self.image_urls,
+            "scrape_status": self.scrape_status,
+            "error_msg": self.error_msg,
+            "created_at": (
+                datetime.fromtimestamp(self.created_at).isoformat()
+                if self.created_at is not None
+                else None
+            ),
+            "updated_at": (
+                datetime.fromtimestamp(self.updated_at).isoformat()
+                if self.updated_at is not None
+                else None
+            ),
+        }
+
+    def to_video(self) -> Video:
+        return Video.from_dict(self.to_dict())
@@ -0,0 +1,216 @@
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 下不可用，reflink 模式回退为拷贝
+    fcntl = None
+
+from src.utils import logger
+from src.scanner import sample_fingerprint
+from src.settings import Settings, settings
+# linux/fs.h: FICLONE = _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def _copy_range(fin: int, fout: int, offset: int, count: int) -> int:
+    """
+    在两个文件描述符之间拷贝一段数据，返回实际拷贝的字节数。
+    优先使用 copy_file_range（同一文件系统上可能走服务器端拷贝/reflink），其次 sendfile，最后回退为普通读写。
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = os.copy_file_range(fin, fout, count, offset, offset)
+            if copied > 0:
+                return copied
+        except OSError:
+            pass
+    if hasattr(os, "sendfile"):
+        try:
+            os.lseek(fout, offset, os.SEEK_SET)
+            return os.sendfile(fout, fin, offset, count)
+        except OSError:
+            pass
+    data = os.pread(fin, count, offset)
+    return os.pwrite(fout, data, offset)
+
+
+def copy_file(src: Path, dst: Path, chunk_size: int, verify: bool = True):
+    """
+    分块拷贝 src 到 dst，支持断点续传与拷贝后校验。
+    数据先写入 dst.part，完成并校验通过后再原子重命名为 dst；中断后再次调用会从 .part 的末尾继续。
+    """
+    part_path = dst.with_name(dst.name + ".part")
+    total = src.stat().st_size
+    offset = part_path.stat().st_size if part_path.exists() else 0
+    if offset > total:
+        offset = 0
+    if offset:
+        logger.info(f"继续未完成的拷贝 {src.name}：已完成 {offset}/{total} 字节")
+
+    with open(src, "rb") as fin, open(part_path, "r+b" if offset else "wb") as fout:
+        fout.truncate(offset)
+        next_report = offset + total // 10
+        while offset < total:
+            copied = _copy_range(
+                fin.fileno(), fout.fileno(), offset, min(chunk_size, total - offset)
+            )
+            if copied <= 0:
+                raise OSError(f"拷贝中断：{src}（{offset}/{total} 字节）")
+            offset += copied
+            if offset >= next_report and total:
+                logger.debug(f"拷贝进度 {src.name}：{offset * 100 // total}%")
+                next_report = offset + total // 10
+        os.fsync(fout.fileno())
+
+    if verify and (
+        part_path.stat().st_size != total
+        or sample_fingerprint(part_path) != sample_fingerprint(src)
+    ):
+        part_path.unlink()
+        raise OSError(f"拷贝校验失败：{src} -> {dst}")
+    shutil.copystat(src, part_path)
+    os.replace(part_path, dst)
+
+
+def _same_device(src: Path, directory: Path) -> bool:
+    """src 与目标目录是否位于同一设备（可以直接 rename）。"""
+    return src.stat().st_dev == directory.stat().st_dev
+
+
+def move_file(
+    src: Path, dst: Path, chunk_size: int = 64 * 1024 * 1024, verify: bool = True
+):
+    """
+    移动文件：同一设备上直接 rename（瞬间完成），跨设备时分块拷贝、校验后再删除源文件。
+    目标已存在时抛出 FileExistsError，避免覆盖已归档的视频。
+    """
+    if dst.exists():
+        if os.path.samefile(src, dst):
+            return
+        raise FileExistsError(f"目标文件已存在：{dst}")
+    if _same_device(src, dst.parent):
+        os.rename(src, dst)
+        return
+    copy_file(src, dst, chunk_size, verify)
+    src.unlink()
+
+
+def _same_content(src: Path, dst: Path) -> bool:
+    """两个文件大小相同且抽样指纹一致（视为同一份内容）。"""
+    return (
+        src.stat().st_size == dst.stat().st_size
+        and sample_fingerprint(src) == sample_fingerprint(dst)
+    )
+
+
+def reflink_file(src: Path, dst: Path):
+    """通过 FICLONE 创建写时复制的克隆（Btrfs/XFS 等支持），不占用额外空间。"""
+    if fcntl is None:
+        raise OSError("当前平台不支持 reflink")
+    with open(src, "rb") as fin, open(dst, "xb") as fout:
+        try:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+        except OSError:
+            fout.close()
+            dst.unlink()
+            raise
+
+
+def organize_file(
+    src: Path,
+    dst: Path,
+    mode: str = "move",
+    chunk_size: int = 64 * 1024 * 1024,
+    verify: bool = True,
+):
+    """
+    按归档方式把 src 放到 dst。链接方式失败（跨设备、文件系统不支持、权限不足）时回退为拷贝，源文件保留。
+    """
+    if mode == "move":
+        move_file(src, dst, chunk_size, verify)
+        return
+    if dst.exists():
+        # 重复运行时目标已是同一文件（链接）或内容相同的副本（拷贝/reflink 回退），视为已完成
+        if os.path.samefile(src, dst) or _same_content(src, dst):
+            return
+        raise FileExistsError(f"目标文件已存在：{dst}")
+    if dst.is_symlink():
+        raise FileExistsError(f"目标为失效的符号链接：{dst}")
+    try:
+        if mode == "hardlink":
+            os.link(src, dst)
+        elif mode == "symlink":
+            os.symlink(src.absolute(), dst)
+        elif mode == "reflink":
+            reflink_file(src, dst)
+        else:
+            raise ValueError(f"未知的归档方式：{mode}")
+        return
+    except (OSError, NotImplementedError) as e:
+        logger.warning(f"无法以 {mode} 方式归档 {src.name}（{e}），回退为拷贝。")
+    copy_file(src, dst, chunk_size, verify)
+
+
+class MoveQueue:
+    """
+    有界的后台 I/O 队列：刮削线程提交移动任务后立即返回，由独立的工作线程按 base.organize_mode 执行归档。
+    队列满时 submit 会阻塞，避免刮削远远跑在磁盘 I/O 前面。
+    """
+
+    def __init__(self):
+        current = settings.current
+        self._queue: "queue.Queue[Tuple[Path, Path, str]]" = queue.Queue(
+            maxsize=current.mover.queue_size
+        )
+        self._threads = []
+        self.apply_settings(current)
+
+    def apply_settings(self, current: Settings):
+        """
+        从配置快照更新归档参数（配置热加载时调用）。新参数从下一个任务开始生效；
+        工作线程数只增不减，队列容量需重启后生效。
+        """
+        self.workers = current.mover.workers
+        self.chunk_size = current.mover.chunk_mb * 1024 * 1024
+        self.verify = current.mover.verify
+        self.mode = current.base.organize_mode
+        if self._threads:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        for i in range(len(self._threads), self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"mover-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            try:
+                src, dst, label = task
+                organize_file(src, dst, self.mode, self.chunk_size, self.verify)
+                logger.info(f"已归档视频文件到（{self.mode}）：{dst}")
+            except Exception as e:
+                logger.error(f"移动视频文件失败 {label}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def submit(self, src: Path, dst: Path, label: str = ""):
+        """提交一个移动任务；label 用于日志（通常为番号）。"""
+        self._ensure_started()
+        self._queue.put((src, dst, label))
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def join(self):
+        """等待已提交的移动任务全部完成。"""
+        if self._threads:
+            self._queue.join()
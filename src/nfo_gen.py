@@ -1,15 +1,45 @@
+import glob
+import hashlib
+import os
 import sys
 from pathlib import Path
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 import yt_dlp
+from src.config import config
 from src.models import Video
-from src.utils import logger
+from src.utils import logger, atomic_write_bytes
 from src.crawlers.base import BaseCrawler
+from src.artwork_store import artwork_store
+from src.deadline import expired, remaining
+from src.metrics import metrics
+from src.dashboard import dashboard
 import xml.etree.ElementTree as ET
 
 
+# yt-dlp 各下载文件上次回调时的已下载字节数，用于计算增量计入 metrics
+_hook_progress: Dict[str, int] = {}
+
+
 def progress_hook(d):
+    if expired():
+        # 时间预算用尽：中止下载，yt-dlp 保留 .part，下次运行时续传
+        raise yt_dlp.utils.DownloadCancelled("时间预算已用尽")
+    key = d.get("filename") or ""
+    host = urlparse((d.get("info_dict") or {}).get("url") or "").netloc or "trailer"
+    downloaded = d.get("downloaded_bytes") or 0
+    metrics.add_bytes(host, downloaded - _hook_progress.get(key, 0))
+    _hook_progress[key] = downloaded
     if d["status"] == "downloading":
+        if dashboard.active:
+            # 面板运行时由进度条显示，避免 \r 写入打乱面板
+            dashboard.update_download(
+                key,
+                f"预告片 {Path(key).name}",
+                downloaded,
+                d.get("total_bytes") or d.get("total_bytes_estimate"),
+            )
+            return
         percent = d.get("_percent_str", "").strip()
         eta = d.get("_eta_str", "").strip()
         speed = d.get("_speed_str", "").strip()
@@ -17,11 +47,22 @@ def progress_hook(d):
         sys.stdout.write(f"\r下载进度: {percent} | 速度: {speed} | ETA: {eta}    ")
         sys.stdout.flush()
     elif d["status"] == "finished":
-        sys.stdout.write("\n")
+        _hook_progress.pop(key, None)
+        if dashboard.active:
+            dashboard.finish_download(key)
+        else:
+            sys.stdout.write("\n")
         logger.info("下载完成，正在处理...")
 
 
 class NFOGenerator:
+    def __init__(self):
+        # 本轮运行的 NFO 写入统计：written 实际写入，skipped 内容未变化而跳过
+        self.stats = {"written": 0, "skipped": 0}
+
+    def reset_stats(self):
+        self.stats = {"written": 0, "skipped": 0}
+
     def generate_nfo(self, video: Video):
         if not video.file_path or not video.title:
             logger.warning(f"跳过生成 NFO {video.parsed_number}: 缺少路径或标题")
@@ -58,15 +99,103 @@ class NFOGenerator:
                 actor = ET.SubElement(root, "actor")
                 ET.SubElement(actor, "name").text = actor_name.strip()
 
-        # 写入
-        tree = ET.ElementTree(root)
-        ET.indent(tree, space="  ", level=0)
+        # 远程图片与预告片地址（Kodi 标准标签）；source 属性记录来源爬虫，便于离线导入后仍能选择对应爬虫下载
+        if video.cover_url:
+            thumb = ET.SubElement(
+                root, "thumb", aspect="poster", source=video.cover_url[0]
+            )
+            thumb.text = video.cover_url[1]
+        if video.image_urls and len(video.image_urls) > 1:
+            fanart = ET.SubElement(root, "fanart", source=video.image_urls[0])
+            for url in video.image_urls[1:]:
+                ET.SubElement(fanart, "thumb").text = url
+        if video.trailer_url:
+            trailer = ET.SubElement(root, "trailer", source=video.trailer_url[0])
+            trailer.text = video.trailer_url[1]
+
+        # 先在内存中渲染，与已有文件内容一致时不再写入，避免改动 mtime 触发媒体库重新扫描
+        ET.indent(root, space="  ", level=0)
+        content = ET.tostring(root, encoding="utf-8", xml_declaration=True)
         try:
-            tree.write(nfo_path, encoding="utf-8", xml_declaration=True)
+            if nfo_path.exists() and nfo_path.stat().st_size == len(content):
+                with open(nfo_path, "rb") as f:
+                    existing = hashlib.sha256(f.read()).digest()
+                if existing == hashlib.sha256(content).digest():
+                    self.stats["skipped"] += 1
+                    logger.debug(f"NFO 内容未变化，跳过写入: {nfo_path}")
+                    return
+            atomic_write_bytes(nfo_path, content)
+            self.stats["written"] += 1
             logger.info(f"已生成 NFO: {nfo_path}")
         except Exception as e:
             logger.error(f"写入 NFO 失败 {video.parsed_number}: {e}")
 
+    def read_nfo(self, nfo_path: Path) -> Optional[Video]:
+        """
+        解析 generate_nfo 生成的 NFO，还原为 Video（离线导出时使用，不发起任何请求）。
+        file_path 指向与 NFO 同名的视频文件（不存在时为 None）；解析失败返回 None。
+        """
+        try:
+            root = ET.parse(nfo_path).getroot()
+        except (ET.ParseError, OSError) as e:
+            logger.warning(f"无法解析 NFO {nfo_path}: {e}")
+            return None
+
+        def text(tag: str) -> Optional[str]:
+            node = root.find(tag)
+            return node.text if node is not None and node.text else None
+
+        def with_source(node, urls: List[str]) -> Optional[List[str]]:
+            if node is None or not urls:
+                return None
+            return [node.get("source", "")] + urls
+
+        parsed_number = text("name") or nfo_path.stem
+        extensions = {
+            ext.lower()
+            for ext in config.get(
+                "scanner.extensions", [".mp4", ".mkv", ".avi", ".wmv", ".mov"]
+            )
+        }
+        video_path = next(
+            (
+                str(candidate)
+                for candidate in nfo_path.parent.glob(f"{glob.escape(nfo_path.stem)}.*")
+                if candidate.suffix.lower() in extensions
+            ),
+            None,
+        )
+        thumb = root.find("thumb")
+        fanart = root.find("fanart")
+        trailer = root.find("trailer")
+        return Video(
+            parsed_number=parsed_number,
+            file_path=video_path,
+            title=text("title"),
+            description=text("plot"),
+            release_date=text("releasedate"),
+            director=text("director"),
+            studio=text("studio"),
+            series=text("set"),
+            category=[n.text for n in root.findall("genre") if n.text] or None,
+            actors=[n.text for n in root.findall("actor/name") if n.text] or None,
+            cover_url=with_source(
+                thumb, [thumb.text] if thumb is not None and thumb.text else []
+            ),
+            trailer_url=with_source(
+                trailer, [trailer.text] if trailer is not None and trailer.text else []
+            ),
+            image_urls=with_source(
+                fanart,
+                (
+                    [n.text for n in fanart.findall("thumb") if n.text]
+                    if fanart is not None
+                    else []
+                ),
+            ),
+            scrape_status="SUCCESS",
+        )
+
     def download_cover(self, crawler: BaseCrawler, video: Video):
         """
         下载视频封面并保存为 JPG 文件。
@@ -74,31 +203,48 @@ class NFOGenerator:
         - 如果视频在自己的文件夹中，folder.jpg 最好。
         - 如果混合存放，filename-poster.jpg 或 filename.jpg
         - 这里使用 filename.jpg (封面)
+        图片先进入内容寻址仓库，视频目录中的封面是指向仓库文件的硬链接；多分段视频的各分段共享同一份封面。
         """
         if not video.file_path or not video.cover_url:
             return
+        if expired():
+            logger.warning(f"时间预算用尽，封面留待下次运行 {video.parsed_number}")
+            return
         try:
             cover_path = Path(video.file_path).with_suffix(".jpg")
-            # 简单检查避免重复下载
-            if cover_path.exists():
+            url = video.cover_url[1]
+            # 本地校验（不发请求）：已是完整的同一张图片则跳过；截断或内容不符的文件会被修复
+            if not self._ensure_asset(crawler, url, cover_path):
                 logger.info(f"封面已存在 {video.parsed_number}，跳过下载。")
                 return
-
-            logger.info(f"正在下载封面 {video.parsed_number}...")
-            # 更新请求头
-            Referer = crawler.session.headers["Referer"]
-            crawler.session.headers["Referer"] = crawler.detail_page
-            resp = crawler._request(video.cover_url[1])
-            crawler.session.headers["Referer"] = Referer
-            resp.raise_for_status()
-
-            with open(cover_path, "wb") as f:
-                f.write(resp.content)
             logger.info(f"已保存封面: {cover_path}")
 
         except Exception as e:
             logger.error(f"下载封面失败 {video.parsed_number}: {e}")
 
+    def _ensure_asset(self, crawler: BaseCrawler, url: str, dest: Path) -> bool:
+        """
+        确保 dest 为 url 对应的完整图片，返回是否做了更新（False 表示已是最新，跳过）。
+        - 图片仓库中有记录且 dest 与之一致：不发起任何请求；
+        - dest 是仓库中没有记录的旧文件：HEAD 比对长度，一致则接管入库，否则重新下载；
+        - 其余情况从仓库获取（必要时下载或续传）并链接到 dest。
+        """
+        if artwork_store.is_current(url, dest) and not artwork_store.revalidate:
+            return False
+        if (
+            dest.exists()
+            and artwork_store.lookup(url) is None
+            and artwork_store.adopt(crawler, url, dest)
+        ):
+            return False
+        blob = artwork_store.fetch(crawler, url)
+        if blob is None:
+            raise RuntimeError(f"下载失败：{url}")
+        if dest.exists() and os.path.samefile(blob, dest):
+            return False
+        artwork_store.place(blob, dest)
+        return True
+
     def download_trailer(self, crawler: BaseCrawler, video: Video):
         """
         下载视频预告片并保存为 MP4 文件。
@@ -120,6 +266,13 @@ class NFOGenerator:
             if final_trailer_path.exists():
                 logger.info(f"预告片已存在 {video.parsed_number}，跳过下载。")
                 return
+            # yt-dlp 不经过 BaseCrawler._request，回放模式下无法离线提供
+            if crawler.cassette.mode == "replay":
+                logger.info(f"回放模式，跳过预告片下载 {video.parsed_number}。")
+                return
+            if expired():
+                logger.warning(f"时间预算用尽，预告片留待下次运行 {video.parsed_number}")
+                return
 
             logger.info(f"正在下载预告片 {video.parsed_number}...")
 
@@ -134,6 +287,9 @@ class NFOGenerator:
                 # 忽略 SSL 错误，防止某些站点证书问题
                 "nocheckcertificate": True,
             }
+            left = remaining()
+            if left is not None:
+                ytdlp_opts["socket_timeout"] = max(1, left)
             # 设置cookie
             manual_cookies = crawler.headers["Cookie"]
             if manual_cookies:
@@ -143,8 +299,14 @@ class NFOGenerator:
             if proxy:
                 ytdlp_opts["Proxy"] = proxy
 
-            with yt_dlp.YoutubeDL(ytdlp_opts) as ydl:
-                ydl.download([video.trailer_url[1]])
+            try:
+                with yt_dlp.YoutubeDL(ytdlp_opts) as ydl:
+                    ydl.download([video.trailer_url[1]])
+            finally:
+                # 中止或出错时回调不会收到 finished，清理该预告片的进度条与计数
+                for key in [k for k in _hook_progress if Path(k).name.startswith(video_path.stem)]:
+                    _hook_progress.pop(key, None)
+                    dashboard.finish_download(key)
 
             logger.info(f"已保存预告片: {final_trailer_path}")
 
@@ -157,6 +319,8 @@ class NFOGenerator:
         剧照路径规则：
         - 在视频文件同级目录创建 backdrops/ 文件夹。
         - 文件名按顺序编号：1.jpg、2.jpg...（后缀尽量沿用 URL 的后缀，缺省为 .jpg）。
+        - 视频不在以番号命名的独立目录中（多个视频混放）时，文件名加番号前缀：ABC-123-1.jpg，避免相互覆盖。
+        与封面相同，剧照均为指向内容寻址仓库的硬链接。
         """
         if not video.file_path or not video.image_urls:
             return
@@ -165,26 +329,33 @@ class NFOGenerator:
             # image_urls 的第 0 项为爬虫名标识（用于下游选择对应爬虫实例），真实图片 URL 从第 1 项开始
             urls = urls[1:]
             video_path = Path(video.file_path)
-            video_path = video_path.parent / "backdrops"
-            video_path.mkdir(parents=True, exist_ok=True)
+            prefix = (
+                ""
+                if video_path.parent.name == video.parsed_number
+                else f"{video.parsed_number}-"
+            )
+            stills_dir = video_path.parent / "backdrops"
+            stills_dir.mkdir(parents=True, exist_ok=True)
             for idx, url in enumerate(urls, start=1):
+                if expired():
+                    logger.warning(
+                        f"时间预算用尽，剩余 {len(urls) - idx + 1} 张剧照留待下次运行 {video.parsed_number}"
+                    )
+                    break
                 parsed = urlparse(url)
                 suffix = Path(parsed.path).suffix or ".jpg"
-                still_path = video_path / f"{idx}{suffix}"
-                if still_path.exists():
+                still_path = stills_dir / f"{prefix}{idx}{suffix}"
+                try:
+                    updated = self._ensure_asset(crawler, url, still_path)
+                except Exception as e:
+                    logger.error(f"下载剧照失败 {video.parsed_number} 第 {idx} 张: {e}")
+                    continue
+                if updated:
+                    logger.info(f"已保存剧照 {video.parsed_number} 第 {idx} 张")
+                else:
                     logger.info(
                         f"剧照已存在 {video.parsed_number} 第 {idx} 张，跳过下载。"
                     )
-                    continue
-                logger.info(f"正在下载剧照 {video.parsed_number} 第 {idx} 张...")
-
-                Referer = crawler.session.headers["Referer"]
-                crawler.session.headers["Referer"] = crawler.detail_page
-                resp = crawler._request(url)
-                resp.raise_for_status()
-                crawler.session.headers["Referer"] = Referer
-                with open(still_path, "wb") as f:
-                    f.write(resp.content)
             logger.info(f"剧照下载完成 {video.parsed_number}")
         except Exception as e:
             logger.error(f"下载剧照失败 {video.parsed_number}: {e}")
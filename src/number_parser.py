@@ -0,0 +1,129 @@
+import re
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# 默认规则表（按优先级排列）：name 为规则名，pattern 为正则（只能使用无名分组），
+# format 为规范化模板，{0}/{1}... 依次对应 pattern 中的分组，结果统一转为大写。
+DEFAULT_RULES: List[Dict[str, str]] = [
+    # FC2-PPV-1234567 / FC2PPV_1234567 / FC2-1234567
+    {
+        "name": "fc2",
+        "pattern": r"fc2[-_ ]?(?:ppv[-_ ]?)?(\d{5,8})",
+        "format": "FC2-PPV-{0}",
+    },
+    # HEYZO-1234 / HEYZO_HD_1234
+    {
+        "name": "heyzo",
+        "pattern": r"heyzo[-_ ]*(?:hd[-_ ]*)?(\d{4})",
+        "format": "HEYZO-{0}",
+    },
+    # HEYDOUGA-4017-123
+    {
+        "name": "heydouga",
+        "pattern": r"heydouga[-_ ]?(\d{4})[-_ ]?(\d{3,5})",
+        "format": "HEYDOUGA-{0}-{1}",
+    },
+    # 日期型无码番号：010120-001（Caribbean）、010120_001（1Pondo / 10musume / Pacopacomama）
+    {"name": "date", "pattern": r"(\d{6})([-_])(\d{2,3})", "format": "{0}{1}{2}"},
+    # Tokyo-Hot：n1234 / k1234，需要 tokyo-hot 上下文（紧跟在其后、或之后出现），或文件名只有番号本身，
+    # 避免把 my trip k2019.mp4 之类的普通文件名识别为番号（开头的 (?=[nkt]) 让无关位置快速失败）
+    {
+        "name": "tokyo_hot",
+        "pattern": r"(?=[nkt])(?:tokyo[-_ ]?hot[-_ .\])]*(?=[nk]\d{4}(?!\d))"
+        r"|(?<![a-z0-9])(?=[nk]\d{4}(?!\d).*tokyo[-_ ]?hot)"
+        r"|^(?=[nk]\d{4}(?:\.[a-z0-9]+)?$))([nk])(\d{4})(?!\d)",
+        "format": "{0}{1}",
+    },
+    # 带数字前缀的素人番号：300MIUM-123、259LUXU-1234
+    {
+        "name": "prefixed",
+        "pattern": r"(\d{3}[a-z]{3,5})-?(\d{3,4})",
+        "format": "{0}-{1}",
+    },
+    # 常规番号：ABC-123、abc1234
+    {"name": "standard", "pattern": r"([a-z]{2,6})-?(\d{3,5})", "format": "{0}-{1}"},
+]
+
+# 网站水印的顶级域名
+_TLDS = r"(?:com|net|org|cc|tv|xyz|me|la|vip)(?![a-z0-9])"
+
+# 文件名中常见的干扰片段：编码、分辨率、音轨、网站水印等，匹配前以等长空格替换，保证位置不变。
+# 水印只在有明确上下文时识别（域名后跟 @，或以 www. 开头），避免把 ABC-123.Latest 之类的普通片段当作域名
+JUNK_PATTERN = re.compile(
+    r"www\.[a-z0-9-]+\." + _TLDS + r"@?|[a-z0-9-]+\." + _TLDS + r"@"
+    r"|(?<![a-z0-9])(?:[xh]\.?26[45]|hevc|avc|aac\d?|ac3|dts|flac|\d{3,4}[pi]|[248]k"
+    r"|[fu]?hd|hdr\d*|\d{2,3}fps|10bit)(?![a-z0-9])",
+    re.IGNORECASE,
+)
+
+
+class NumberMatch(NamedTuple):
+    code: str  # 规范化后的番号（大写）
+    rule: str  # 命中的规则名
+    start: int  # 番号在原文件名中的起始位置
+    end: int  # 番号在原文件名中的结束位置（用于识别其后的分段后缀）
+
+
+class NumberParser:
+    """
+    基于规则表的番号提取引擎。
+    所有规则编译为一个合并的正则（每条规则一个命名分组），一次扫描即可确定命中的规则；
+    同一位置上多条规则均可匹配时，按规则表顺序优先。
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None):
+        self.rules = list(rules or DEFAULT_RULES)
+        parts = []
+        # 命名分组名 -> (规则名, 格式模板, 第一个内部分组的序号, 内部分组数)
+        self._slots: Dict[str, tuple] = {}
+        group_index = 1
+        for i, rule in enumerate(self.rules):
+            try:
+                name, pattern, fmt = rule["name"], rule["pattern"], rule["format"]
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except (KeyError, TypeError, re.error) as e:
+                raise ValueError(f"番号规则配置错误（第 {i + 1} 条）：{e}") from e
+            if compiled.groupindex:
+                raise ValueError(f"番号规则 {name} 不能使用命名分组")
+            slot = f"r{i}"
+            parts.append(f"(?P<{slot}>{pattern})")
+            self._slots[slot] = (name, fmt, group_index + 1, compiled.groups)
+            group_index += compiled.groups + 1
+        self.pattern = re.compile(
+            r"(?<![a-z0-9])(?:" + "|".join(parts) + r")(?!\d)", re.IGNORECASE
+        )
+
+    def parse(self, filename: str) -> Optional[NumberMatch]:
+        """从文件名中提取番号，未识别时返回 None。"""
+        cleaned = JUNK_PATTERN.sub(lambda m: " " * len(m.group()), filename)
+        match = self.pattern.search(cleaned)
+        if not match:
+            return None
+        return self._build(match)
+
+    def parse_many(self, filenames: Iterable[str]) -> Iterator[Optional[NumberMatch]]:
+        """
+        批量提取：按输入顺序逐个产出结果（未识别为 None）。
+        惰性迭代、不缓存输入，适合对数百万个文件名做一次性处理。
+        """
+        junk_sub = JUNK_PATTERN.sub
+        search = self.pattern.search
+        build = self._build
+
+        def blank(m):
+            return " " * len(m.group())
+
+        for filename in filenames:
+            match = search(junk_sub(blank, filename))
+            yield build(match) if match else None
+
+    def extract(self, filename: str) -> Optional[str]:
+        """只返回规范化后的番号。"""
+        result = self.parse(filename)
+        return result.code if result else None
+
+    def _build(self, match: re.Match) -> NumberMatch:
+        # 外层命名分组最后闭合，lastgroup 即命中规则的分组名
+        slot = match.lastgroup
+        name, fmt, first, count = self._slots[slot]
+        code = fmt.format(*match.groups()[first - 1 : first - 1 + count]).upper()
+        return NumberMatch(code, name, match.start(slot), match.end(slot))
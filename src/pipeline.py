@@ -0,0 +1,67 @@
+import threading
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+from src.metrics import metrics
+from src.scheduler import Scheduler
+from src.utils import logger
+
+
+def scan_queue(
+    scanner, roots: Sequence[Path], queue_size: int
+) -> Iterator[Tuple[str, List[str]]]:
+    """
+    边扫描边刮削：后台线程同时遍历各扫描根目录，把识别到的视频放入容量为 queue_size 的调度队列（Scheduler）；
+    调用方每次取出队列中当前最优先的一条 (parsed_number, [file_path, ...])。
+    - 第一个目录扫完即可开始刮削，不必等整棵目录树遍历结束；
+    - 刮削慢于扫描时队列被填满，扫描线程阻塞等待（背压），内存中最多保留 queue_size 条待处理记录；
+    - 每次取出时都在整个队列上重新按 scheduler 配置选择，遍历后期才发现的新文件可以越过已在队列中的积压，
+      各根目录之间的轮转也在整个队列上进行；
+    - 各根目录共用同一个番号集合，同一番号只产出一次。
+    调用方提前结束迭代（异常、Ctrl+C）时扫描线程随之停止。
+    """
+    scheduler = Scheduler(roots)
+    ready = threading.Condition()
+    stop = threading.Event()
+    done = False
+
+    def produce():
+        nonlocal done
+        try:
+            count = 0
+            for parsed_number, paths in scanner.iter_roots(roots):
+                with ready:
+                    while len(scheduler) >= queue_size and not stop.is_set():
+                        ready.wait(timeout=0.5)
+                    if stop.is_set():
+                        return
+                    scheduler.push(parsed_number, paths)
+                    ready.notify_all()
+                count += 1
+                # 实时面板的总数随扫描进度增长
+                metrics.add("videos_total", 1)
+            logger.info(f"扫描完成，新增了 {count} 个视频。")
+        except Exception as e:
+            logger.error(f"扫描失败：{e}")
+        finally:
+            with ready:
+                done = True
+                ready.notify_all()
+
+    thread = threading.Thread(target=produce, name="scan-producer", daemon=True)
+    thread.start()
+    try:
+        while True:
+            with ready:
+                while not len(scheduler) and not done:
+                    ready.wait()
+                if not len(scheduler):
+                    return
+                entry = scheduler.pop()
+                ready.notify_all()
+            yield entry
+    finally:
+        stop.set()
+        with ready:
+            ready.notify_all()
+        thread.join(timeout=1)
@@ -1,74 +1,377 @@
+import hashlib
 import os
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Optional
-from src.config import config
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from src.utils import logger
+from src.number_parser import NumberParser
+from src.settings import Settings, settings
+
+# 从文件名中识别分辨率的规则（用于重复番号的择优策略）
+RESOLUTION_PATTERN = re.compile(
+    r"(?<![a-z0-9])(?:(\d{3,4})[pi]|([48])k)(?![a-z0-9])", re.IGNORECASE
+)
+
+
+# 番号之后的分段后缀：-CD1 / _part2 / .pt3 / disc1，或紧跟的单个字母（ABC-123A、ABC-123-B）
+PART_PATTERN = re.compile(
+    r"^(?:[-_. ]*(?:cd|part|pt|disc|disk)[-_. ]?(\d{1,2})(?!\d)|[-_]?([a-f])(?![a-z0-9]))",
+    re.IGNORECASE,
+)
+
+
+def sample_fingerprint(path: Path, block_size: int = 1024 * 1024) -> str:
+    """
+    计算文件的抽样指纹：文件大小 + 头部/中部/尾部各一个数据块的哈希。
+    只读取至多 3 个数据块，多 GB 的视频也能在毫秒级完成；
+    用于判断两个文件是否为同一份内容，而不是做严格的完整性校验。
+    """
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        if size <= block_size * 3:
+            digest.update(f.read())
+        else:
+            for offset in (0, size // 2 - block_size // 2, size - block_size):
+                f.seek(offset)
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
 
 
 class Scanner:
     def __init__(self):
-        self.min_size_mb = config.get("scanner.min_size_mb", 100)
-        self.extensions = set(
-            config.get("scanner.extensions", [".mp4", ".mkv", ".avi", ".wmv", ".mov"])
-        )
-        # 匹配常见番号的正则 (例如: ABC-123, abc-123, ABC1234)
-        # 2-5个字母，可选连字符，3-5个数字
-        self.code_pattern = re.compile(r"([a-zA-Z]{2,5}-?\d{3,5})", re.IGNORECASE)
+        self._rules = None
+        self.apply_settings(settings.current)
+        # 最近一次扫描中落选的重复文件：{parsed_number: [file_path, ...]}
+        self.duplicates: Dict[str, List[str]] = {}
+
+    def apply_settings(self, current: Settings):
+        """从配置快照更新扫描参数（初始化及配置热加载时调用）。"""
+        self.min_size_mb = current.scanner.min_size_mb
+        self.extensions = set(current.scanner.extensions)
+        # 并行遍历的线程数：网络文件系统（SMB/NFS）上瓶颈在延迟而非 CPU，适当调大可显著提速
+        self.workers = current.scanner.workers
+        # 排除规则：按目录名或完整路径做通配匹配（如 backdrops、输出目录）
+        self.exclude = list(current.scanner.exclude)
+        # 输出目录始终排除，避免把已归档的视频再次扫描回来
+        self.output_path = Path(current.base.output_path).absolute()
+        # 重复番号的择优策略：size（体积最大）或 resolution（文件名中的分辨率最高，再比体积）
+        self.duplicate_policy = current.scanner.duplicate_policy
+        # 番号提取规则表：未配置 scanner.rules 时使用内置规则（常规/FC2/HEYZO/日期型/Tokyo-Hot 等）；
+        # 规则变化时才重新编译，正在进行的扫描继续使用旧的解析器对象
+        if current.scanner.rules != self._rules:
+            self.number_parser = NumberParser([dict(r) for r in current.scanner.rules])
+            self._rules = current.scanner.rules
 
-    def scan_directory(self, path: Path) -> int:
+    def scan_directory(self, path: Path) -> Tuple[Dict[str, List[str]], int]:
         """
         递归扫描目录中的视频文件，提取番号并统计数量。
-        返回 (file_map, count)：file_map 为 {parsed_number: file_path} 映射，count 为识别到的条目数。
-        注意：函数签名当前标注为 int，但实际返回的是二元组；这里以实现为准（后续可再统一类型标注）。
+        返回 (file_map, count)：file_map 为 {parsed_number: [file_path, ...]} 映射，count 为识别到的条目数。
+        列表按分段顺序排列（CD1/CD2、A/B...），普通视频只有一个元素。
+        同一番号（同一分段）存在多个文件时按 scanner.duplicate_policy 择优保留一个，其余记录在 self.duplicates 中并输出报告。
+        """
+        # 一次性返回完整结果，不需要边扫边产出：所有番号都在遍历结束后统一择优
+        file_map = dict(self.iter_roots([path], stream=False))
+        return file_map, len(file_map)
+
+    def iter_directory(self, path: Path) -> Iterator[Tuple[str, List[str]]]:
+        """
+        与 scan_directory 相同的扫描，但以生成器逐条产出 (parsed_number, [file_path, ...])，
+        不必等整棵目录树遍历结束（择优规则见 iter_roots）。
+        """
+        return self.iter_roots([path])
+
+    def iter_roots(
+        self, roots: Sequence[Path], stream: bool = True
+    ) -> Iterator[Tuple[str, List[str]]]:
+        """
+        同时扫描多个根目录，在各根目录之间轮流产出视频（每次各取一条），
+        某个根目录下大量积压的文件不会让其他根目录的新文件排在整棵树遍历之后。
+        - 目录中只有一个文件、且不带分段后缀的番号立即产出；之后在其他目录再次出现时记为重复；
+        - 带分段后缀（CD1、-A...）或在同一目录中有多个文件的番号暂缓产出，
+          其他目录中的分段与副本并入同一组，遍历结束后统一分段与择优再产出，
+          不会因为先后顺序丢掉另一目录中的 CD2 或留下较差的副本。
+        stream=False 时所有番号都暂缓到遍历结束（跨目录的重复也按 duplicate_policy 择优），供一次性取完整结果的调用方使用。
         """
+        self.duplicates = {}
+        # 已产出的番号 -> 文件路径；暂缓产出的番号 -> 各目录中的全部文件
+        emitted: Dict[str, str] = {}
+        deferred: Dict[str, List[str]] = {}
+        walkers = [
+            self._iter_tree(Path(root), emitted, deferred, stream) for root in roots
+        ]
+        try:
+            while walkers:
+                for walker in list(walkers):
+                    entry = next(walker, None)
+                    if entry is None:
+                        walkers.remove(walker)
+                    else:
+                        yield entry
+        finally:
+            for walker in walkers:
+                walker.close()
+        for code, paths in deferred.items():
+            parts = self._group_parts(code, paths)
+            self._log_found(code, parts)
+            yield code, parts
+        self._report_duplicates()
+
+    def _iter_tree(
+        self,
+        path: Path,
+        emitted: Dict[str, str],
+        deferred: Dict[str, List[str]],
+        stream: bool,
+    ) -> Iterator[Tuple[str, List[str]]]:
+        """遍历一个根目录，产出可以立即确定的视频，其余并入 deferred（规则见 iter_roots）。"""
         if not path.exists():
             logger.error(f"路径不存在：{path}")
-            return 0
+            return
 
         logger.info(f"正在扫描目录：{path}")
-        count = 0
+        for _, videos in self._walk_dirs(path):
+            for code, paths in self._group_by_code(videos).items():
+                if code in deferred:
+                    deferred[code].extend(paths)
+                elif code in emitted:
+                    for file_path in paths:
+                        logger.warning(
+                            f"番号 {code} 已在其他目录中出现并先行处理（{emitted[code]}），跳过：{file_path}"
+                        )
+                    self.duplicates.setdefault(code, []).extend(paths)
+                elif (
+                    stream
+                    and len(paths) == 1
+                    and self._extract_part(Path(paths[0]).name) is None
+                ):
+                    emitted[code] = paths[0]
+                    self._log_found(code, paths)
+                    yield code, paths
+                else:
+                    deferred[code] = list(paths)
+
+    def _log_found(self, code: str, parts: List[str]):
+        if len(parts) > 1:
+            logger.debug(f"发现新视频：{code}（共 {len(parts)} 个分段）{parts}")
+        else:
+            logger.debug(f"发现新视频：{code} ({parts[0]})")
+
+    def _report_duplicates(self):
+        if self.duplicates:
+            total = sum(len(v) for v in self.duplicates.values())
+            logger.warning(
+                f"共有 {len(self.duplicates)} 个番号存在重复文件，{total} 个文件未被选用。"
+            )
+
+    def group_files(self, paths: Iterable[Path]) -> Dict[str, List[str]]:
+        """
+        将一批文件路径（如监听模式下新出现的文件）按番号分组，返回与 scan_directory 相同结构的 file_map。
+        无法识别番号的文件会被忽略。
+        """
+        return {
+            code: self._group_parts(code, files)
+            for code, files in self._group_by_code(paths).items()
+        }
+
+    def _group_by_code(self, paths: Iterable[Path]) -> Dict[str, List[str]]:
+        """按番号归并文件路径（不做分段与择优），无法识别番号的文件会被忽略。"""
+        raw: Dict[str, List[str]] = {}
+        for file_path in paths:
+            code = self._extract_code(Path(file_path).name)
+            if not code:
+                logger.warning(f"无法从文件中提取番号：{Path(file_path).name}")
+                continue
+            raw.setdefault(code, []).append(str(file_path))
+        return raw
+
+    def _group_parts(self, code: str, paths: List[str]) -> List[str]:
+        """
+        将同一番号的文件按分段后缀分组，返回按分段顺序排列的路径列表。
+        - 数字分段（CD1、part2...）直接生效；
+        - 字母分段（A/B...）至少出现两个不同字母才视为分段，避免把 ABC-123-C（常见的“中文字幕”标记）误判为分段；
+        - 同时存在无分段文件与分段文件时，保留分段组，无分段文件作为重复文件报告。
+        """
+        buckets: Dict[Optional[Tuple[int, int]], List[str]] = {}
+        for file_path in paths:
+            buckets.setdefault(self._extract_part(Path(file_path).name), []).append(
+                file_path
+            )
+
+        letters = [key for key in buckets if key and key[0] == 1]
+        if len(letters) < 2:
+            for key in letters:
+                buckets.setdefault(None, []).extend(buckets.pop(key))
 
-        # 复用 get_file_map 的扫描/提取逻辑，返回给后续刮削流程使用
-        # TODO：重复番号会覆盖之前的记录（目前“后出现者覆盖前出现者”）；如需保留多个文件，需改为 {code: [paths]} 或引入去重/选择策略。
-        file_map = self.get_file_map(path)
-        for code, file_path_str in file_map.items():
-            count += 1
-            logger.debug(f"发现新视频：{code} ({file_path_str})")
+        parts = sorted(key for key in buckets if key is not None)
+        if not parts:
+            return [self._select_best(code, buckets[None])]
 
-        return file_map, count
+        selected = [self._select_best(code, buckets[key]) for key in parts]
+        unsegmented = buckets.get(None, [])
+        for file_path in unsegmented:
+            logger.warning(f"番号 {code} 已按分段整理，跳过未分段文件 {file_path}")
+        if unsegmented:
+            self.duplicates.setdefault(code, []).extend(unsegmented)
+        return selected
 
-    def get_file_map(self, path: Path) -> dict[str, str]:
+    def get_file_map(self, path: Path) -> Dict[str, List[str]]:
         """
-        扫描目录并返回 {parsed_number: file_path} 的映射。
-        用于在运行时重新关联文件路径。
+        扫描目录并返回 {parsed_number: [file_path, ...]} 的映射。
+        同一番号的所有文件都会保留，按扫描到的顺序排列。
         """
-        file_map = {}
+        file_map: Dict[str, List[str]] = {}
         if not path.exists():
             return file_map
 
-        for root, _, files in os.walk(path):
-            for file in files:
-                file_path = Path(root) / file
+        for file_path in self._walk(path):
+            file = file_path.name
+            code = self._extract_code(file)
+            if not code:
+                logger.warning(f"无法从文件中提取番号：{file}")  # 减少日志噪音，可选
+                continue
+            file_map.setdefault(code, []).append(str(file_path))
 
-                if not self._is_video_file(file_path):
-                    continue
+        return file_map
 
-                code = self._extract_code(file)
-                if not code:
-                    logger.warning(
-                        f"无法从文件中提取番号：{file}"
-                    )  # 减少日志噪音，可选
-                    continue
+    def _extract_part(self, filename: str) -> Optional[Tuple[int, int]]:
+        """
+        识别番号之后的分段后缀，返回可排序的分段键：(0, 序号) 表示数字分段，(1, 序号) 表示字母分段；
+        无分段时返回 None。
+        """
+        match = self.number_parser.parse(filename)
+        if not match:
+            return None
+        part = PART_PATTERN.match(filename[match.end :])
+        if not part:
+            return None
+        if part.group(1):
+            return (0, int(part.group(1)))
+        return (1, ord(part.group(2).upper()) - ord("A") + 1)
 
-                # 若存在重复番号：后出现者会覆盖前出现者（当前实现以“最后一次扫描到的路径”为准）
-                file_map[code] = str(file_path)
+    def _select_best(self, code: str, paths: List[str]) -> str:
+        """
+        从同一番号的多个文件中选出保留的一个，其余追加到 self.duplicates 并逐个报告。
+        先用抽样指纹区分“完全相同的副本”和“不同版本”，便于用户决定如何清理。
+        """
+        if len(paths) == 1:
+            return paths[0]
 
-        return file_map
+        candidates: List[Tuple[Tuple[int, int], str, Optional[str]]] = []
+        for file_path in paths:
+            try:
+                fingerprint = sample_fingerprint(Path(file_path))
+                size = Path(file_path).stat().st_size
+            except OSError as e:
+                logger.warning(f"无法读取文件 {file_path}: {e}")
+                fingerprint, size = None, -1
+            resolution = self._guess_resolution(Path(file_path).name)
+            if self.duplicate_policy == "resolution":
+                key = (resolution, size)
+            else:
+                key = (size, resolution)
+            candidates.append((key, file_path, fingerprint))
+
+        candidates.sort(key=lambda item: item[0], reverse=True)
+        _, best, best_fingerprint = candidates[0]
+        self.duplicates.setdefault(code, []).extend(
+            file_path for _, file_path, _ in candidates[1:]
+        )
+        for _, file_path, fingerprint in candidates[1:]:
+            kind = (
+                "内容相同的副本"
+                if fingerprint and fingerprint == best_fingerprint
+                else "不同版本"
+            )
+            logger.warning(
+                f"番号 {code} 存在重复文件（{kind}），保留 {best}，跳过 {file_path}"
+            )
+        return best
+
+    def _guess_resolution(self, filename: str) -> int:
+        """从文件名中猜测分辨率（纵向像素），识别不到时返回 0。"""
+        best = 0
+        for lines, k in RESOLUTION_PATTERN.findall(filename):
+            value = int(lines) if lines else int(k) * 540
+            best = max(best, value)
+        return best
+
+    def _walk(self, path: Path):
+        """逐个产出目录树中符合条件的视频文件路径。"""
+        for _, videos in self._walk_dirs(path):
+            yield from videos
+
+    def _walk_dirs(self, path: Path) -> Iterator[Tuple[Path, List[Path]]]:
+        """
+        并行遍历目录树，按广度优先的固定顺序产出 (目录, 视频文件列表)。
+        每个子目录作为一个任务提交到线程池，使用 os.scandir + DirEntry.stat()，
+        避免 os.walk + Path.stat() 在高延迟文件系统上逐个串行等待。
+        目录在线程池中并行读取，但按提交顺序取结果、目录内条目按名称排序，
+        因此产出顺序（以及重复文件择优时的先后）与线程调度无关。
+        """
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="scanner"
+        ) as pool:
+            pending = deque([(path, pool.submit(self._scan_dir, path))])
+            while pending:
+                directory, future = pending.popleft()
+                subdirs, videos = future.result()
+                for subdir in subdirs:
+                    pending.append((subdir, pool.submit(self._scan_dir, subdir)))
+                if videos:
+                    yield directory, videos
+
+    def _scan_dir(self, path: Path) -> Tuple[List[Path], List[Path]]:
+        """
+        扫描单个目录（不递归），返回 (子目录列表, 视频文件列表)。
+        在线程池中执行；读取失败的目录记录日志后视为空目录。
+        """
+        subdirs: List[Path] = []
+        videos: List[Path] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            entry_path = Path(entry.path)
+                            if not self._is_excluded(entry_path):
+                                subdirs.append(entry_path)
+                        elif entry.is_file() and self._is_video_entry(entry):
+                            videos.append(Path(entry.path))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"无法读取目录 {path}: {e}")
+        return sorted(subdirs), sorted(videos)
+
+    def _is_excluded(self, path: Path) -> bool:
+        if path.absolute() == self.output_path:
+            return True
+        return any(
+            fnmatch(path.name, pattern) or fnmatch(path.as_posix(), pattern)
+            for pattern in self.exclude
+        )
+
+    def _is_video_entry(self, entry: os.DirEntry) -> bool:
+        """与 _is_video_file 相同的判定，但复用 DirEntry 自带的 stat 结果。"""
+        stem, suffix = os.path.splitext(entry.name)
+        if suffix.lower() not in self.extensions or stem.endswith("-trailer"):
+            return False
+        try:
+            size_mb = entry.stat().st_size / (1024 * 1024)
+        except OSError:
+            return False
+        return size_mb >= self.min_size_mb
 
     def _is_video_file(self, file_path: Path) -> bool:
         if file_path.suffix.lower() not in self.extensions:
             return False
+        # 本工具下载的预告片（*-trailer.mp4）不是待刮削的正片
+        if file_path.stem.endswith("-trailer"):
+            return False
 
         try:
             size_mb = file_path.stat().st_size / (1024 * 1024)
@@ -80,9 +383,8 @@ class Scanner:
         return True
 
     def _extract_code(self, filename: str) -> Optional[str]:
-        # 简单提取
-        match = self.code_pattern.search(filename)
+        match = self.number_parser.parse(filename)
         if match:
-            # 转换为大写
-            return match.group(1).upper()
+            logger.debug(f"番号 {match.code} 命中规则 {match.rule}：{filename}")
+            return match.code
         return None
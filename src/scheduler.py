@@ -0,0 +1,123 @@
+import heapq
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils import logger
+from src.settings import settings
+from src.crawlers.negative_cache import negative_cache
+
+
+class Scheduler:
+    """
+    刮削队列的调度：决定 file_map 中各番号的处理顺序。
+    1. scheduler.priority_paths 中的目录（或通配）下的文件最先处理，按列表顺序分层；
+    2. 同一层内按 scheduler.order 排序；
+    3. scheduler.fair 开启时，同一层内在各扫描根目录之间轮流取，积压很多的目录不会让其他目录的新文件一直等待。
+    既可以一次排好整个 file_map（schedule），也可以作为优先队列使用：push 随时加入，pop 每次取出当前最优先的一条，
+    边扫描边刮削时后加入的新文件可以越过先加入的积压。
+    """
+
+    def __init__(self, roots: Optional[Sequence[Path]] = None):
+        current = settings.current
+        self.order = current.scheduler.order
+        self.fair = current.scheduler.fair
+        self.priority_paths = [
+            str(Path(p).expanduser().absolute()) for p in current.scheduler.priority_paths
+        ]
+        self.roots = [
+            Path(p).absolute()
+            for p in (roots if roots is not None else current.base.scan_paths)
+        ]
+        self.enabled_sites = current.scraper.enabled_crawlers
+        # 层 -> 根目录 -> 堆 [(排序键, 加入顺序, 番号, 路径列表)]
+        self._heaps: Dict[int, Dict[Optional[Path], List[Tuple]]] = {}
+        # 根目录 -> 最近一次被取出的序号，轮转时优先取最久未被取的根目录
+        self._served: Dict[Optional[Path], int] = {}
+        self._seq = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _tier(self, path: str) -> int:
+        for idx, pattern in enumerate(self.priority_paths):
+            if path == pattern or path.startswith(pattern.rstrip(os.sep) + os.sep):
+                return idx
+            if fnmatch(path, pattern):
+                return idx
+        return len(self.priority_paths)
+
+    def _root(self, path: Path) -> Optional[Path]:
+        for root in self.roots:
+            if path == root or root in path.parents:
+                return root
+        return None
+
+    def _cost(self, parsed_number: str) -> int:
+        """预计需要搜索的站点数：已知没有该番号的站点不会被请求。"""
+        return sum(
+            1
+            for site in self.enabled_sites
+            if not negative_cache.is_missing(site, parsed_number)
+        )
+
+    def _sort_key(self, parsed_number: str, paths: List[str]) -> Tuple:
+        if self.order == "cheapest":
+            return (self._cost(parsed_number),)
+        stats = []
+        for p in paths:
+            try:
+                stats.append(os.stat(p))
+            except OSError:
+                pass
+        if self.order == "mtime":
+            return (-max((st.st_mtime for st in stats), default=0),)
+        if self.order == "size":
+            return (-sum(st.st_size for st in stats),)
+        return ()
+
+    def push(self, parsed_number: str, paths: List[str]):
+        """加入一条待刮削的视频（排序键在加入时计算）。"""
+        if isinstance(paths, str):
+            paths = [paths]
+        first = Path(paths[0]).absolute()
+        tier = self._tier(str(first))
+        root = self._root(first) if self.fair else None
+        key = self._sort_key(parsed_number, paths) if self.order != "none" else ()
+        heap = self._heaps.setdefault(tier, {}).setdefault(root, [])
+        heapq.heappush(heap, (key, self._seq, parsed_number, paths))
+        self._seq += 1
+        self._size += 1
+
+    def pop(self) -> Tuple[str, List[str]]:
+        """取出当前最优先的一条：最高的优先层中，最久未被取的根目录里排序最靠前的视频。"""
+        tier = min(self._heaps)
+        roots = self._heaps[tier]
+        root = min(roots, key=lambda r: self._served.get(r, -1))
+        heap = roots[root]
+        _, _, parsed_number, paths = heapq.heappop(heap)
+        if not heap:
+            del roots[root]
+            if not roots:
+                del self._heaps[tier]
+        self._served[root] = self._seq
+        self._seq += 1
+        self._size -= 1
+        return parsed_number, paths
+
+    def schedule(self, file_map: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """返回按调度顺序排列的新 file_map（dict 保持插入顺序）。"""
+        if len(file_map) < 2:
+            return file_map
+        for parsed_number, paths in file_map.items():
+            self.push(parsed_number, paths)
+        ordered: Dict[str, List[str]] = {}
+        while self._size:
+            parsed_number, _ = self.pop()
+            ordered[parsed_number] = file_map[parsed_number]
+        logger.debug(
+            f"调度顺序（{self.order}{'，按根目录轮转' if self.fair else ''}）：{list(ordered)[:10]}..."
+        )
+        return ordered
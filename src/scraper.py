@@ -1,15 +1,21 @@
 import time
 import random
-from typing import Optional
+from dataclasses import replace
+from typing import Iterable, Optional, Tuple
 from pathlib import Path
-import shutil
 import json
 
 
 from src.config import config
+from src.settings import BaseSettings, ScraperSettings, Settings, settings
 from src.utils import logger
 from src.models import Video
 from src.nfo_gen import nfo_gen
+from src.mover import MoveQueue
+from src.catalog import catalog
+from src.deadline import video_budget
+from src.scheduler import Scheduler
+from src.metrics import metrics
 from src.crawlers.manager import CrawlerManager
 
 
@@ -17,52 +23,121 @@ class Scraper:
     def __init__(self):
         # 初始化爬虫管理
         self.crawler_manager = CrawlerManager(config)
+        # 后台移动队列：视频文件的移动/跨盘拷贝不阻塞刮削
+        self.mover = MoveQueue()
+        settings.on_reload(self._apply_settings)
+        # 实时面板读取的队列深度与熔断状态
+        metrics.register("移动队列", self.mover.qsize)
+        metrics.register("breakers", self.crawler_manager.breaker_stats)
+
+    def _apply_settings(self, old: Settings, new: Settings):
+        """配置热加载：更新归档队列与爬虫的超时/重试参数。"""
+        self.mover.apply_settings(new)
+        self.crawler_manager.apply_settings(new)
+
+    def scrape_all(self, file_map: dict[str, list[str]]):
+        """
+        刮削所有视频。
+        file_map 的值为按分段排序的路径列表：多分段视频（CD1/CD2、A/B）只搜索一次元数据、只下载一次图片，
+        每个分段各自生成同名的 .nfo 与封面（封面为图片仓库中同一文件的硬链接）。
+        """
+        # 按 scheduler 配置排序：优先目录、最新/最大/最便宜优先，并在各扫描根目录之间轮转
+        file_map = Scheduler().schedule(file_map)
+        metrics.add("videos_total", len(file_map))
+        self.scrape_stream(file_map.items())
 
-    def scrape_all(self, file_map: dict[str, str]):
-        """刮削所有视频。"""
-
-        for parsed_number, file_path in file_map.items():
-            # 构建视频文件信息
-            video = Video(
-                parsed_number=parsed_number,
-                file_path=file_path,
-                scrape_status="PENDING",
+    def scrape_stream(self, entries: Iterable[Tuple[str, list[str]]]):
+        """
+        按给定顺序逐个刮削 (parsed_number, [file_path, ...])（如 pipeline.scan_queue 边扫描边按调度顺序产出的条目），
+        全部完成后统一收尾。调用方负责排序并计入 videos_total。
+        """
+        # 本次运行使用同一份配置快照，热加载只影响下一次运行
+        base = settings.current.base
+        scraper_settings = settings.current.scraper
+        nfo_gen.reset_stats()
+        for parsed_number, file_paths in entries:
+            self._scrape_entry(parsed_number, file_paths, base, scraper_settings)
+
+        # 等待后台移动任务全部完成
+        self.mover.join()
+        if base.catalog:
+            catalog.save_snapshot()
+        for name, stats in self.crawler_manager.breaker_stats().items():
+            if stats["transitions"] or stats["rejected"]:
+                logger.info(
+                    f"站点 {name} 熔断统计：当前 {stats['state']}，状态变化 {stats['transitions']}，跳过请求 {stats['rejected']} 次。"
+                )
+        if base.generate_nfo:
+            logger.info(
+                f"NFO 统计：写入 {nfo_gen.stats['written']} 个，内容未变化跳过 {nfo_gen.stats['skipped']} 个。"
             )
 
+    def _scrape_entry(
+        self,
+        parsed_number: str,
+        file_paths: list[str],
+        base: BaseSettings,
+        scraper_settings: ScraperSettings,
+    ):
+        """刮削单个番号（含全部分段），并按配置归档、生成 NFO、下载图片与预告片。"""
+        # 兼容旧的 {番号: 文件路径} 形式
+        if isinstance(file_paths, str):
+            file_paths = [file_paths]
+        # 构建视频文件信息
+        video = Video(
+            parsed_number=parsed_number,
+            file_path=file_paths[0],
+            scrape_status="PENDING",
+        )
+
+        # 单个视频的端到端时间预算：搜索、字段解析与下载共用，用尽后未完成的部分留待下次运行；
+        # 整个视频期间独占爬虫（serve 模式下与并发查询互斥），下载时的 Referer 始终是本视频的详情页
+        with video_budget(scraper_settings.video_budget), metrics.tracking(
+            "videos_active"
+        ), self.crawler_manager.lock:
             logger.info(f"视频 {video.parsed_number} ，开始刮削。")
             # TODO：当前以 scrape_video 返回 None 作为失败信号；如需区分“未找到/网络失败/解析失败”等原因，建议统一用 scrape_status+error_msg 或抛出/包装异常来表达。
             scraped_video = self.scrape_video(video)
             if scraped_video is None:
-                continue
-            video = scraped_video
+                metrics.incr("videos_failed")
+                return
+            # 每个分段一个 Video 副本，共享同一份元数据
+            parts = [replace(scraped_video, file_path=p) for p in file_paths]
+            video = parts[0]
             # 读取配置文件 是否移动文件
-            it = self._move_video_to_output(video)
-            if config.get("base.move_files", False):
-                next(it)
+            moves = [self._move_video_to_output(part) for part in parts]
+            if base.move_files:
+                for it in moves:
+                    next(it, None)
             # 是否生成NFO
-            if config.get("base.generate_nfo", False):
-                nfo_gen.generate_nfo(video)
+            if base.generate_nfo:
+                for part in parts:
+                    nfo_gen.generate_nfo(part)
             # 是否下载封面
-            if config.get("base.download_cover", False):
-                nfo_gen.download_cover(
-                    self.crawler_manager.crawlers[video.cover_url[0]], video
+            if base.download_cover and video.cover_url:
+                # 各分段的封面都指向图片仓库中的同一份文件，只有第一次需要下载
+                for part in parts:
+                    nfo_gen.download_cover(
+                        self.crawler_manager.crawlers[video.cover_url[0]], part
+                    )
+            # 是否下载剧照（各分段位于同一目录，共享 backdrops/）
+            if base.download_stills and video.image_urls:
+                nfo_gen.download_stills(
+                    self.crawler_manager.crawlers[video.image_urls[0]], video
                 )
-            # 是否下载预告片
-            if config.get("base.download_trailer", False) and video.trailer_url:
+            # 是否下载预告片（耗时最长，放在最后）
+            if base.download_trailer and video.trailer_url:
                 nfo_gen.download_trailer(
                     self.crawler_manager.crawlers[video.trailer_url[0]], video
                 )
-            # 是否下载剧照
-            if config.get("base.download_stills", False):
-                nfo_gen.download_stills(
-                    self.crawler_manager.crawlers[video.image_urls[0]], video
-                )
 
-            if config.get("base.move_files", False):
-                try:
-                    next(it)
-                except StopIteration:
-                    pass
+            if base.move_files:
+                for it in moves:
+                    next(it, None)
+            # 记入本地目录（query 子命令使用）
+            if base.catalog:
+                catalog.add(video, [part.file_path for part in parts])
+            metrics.incr("videos_done")
 
     def scrape_all_pending(self, file_map: dict[str, str]):
         """刮削所有状态为 PENDING (待处理) 的视频。"""
@@ -131,8 +206,7 @@ class Scraper:
         return self._sanitize_for_path(str(actors)) or "未知演员"
 
     def _get_output_directory(self, video: Video) -> Path:
-        base_output = config.get("base.output_path", "javoutp")
-        root = Path(base_output)
+        root = Path(settings.current.base.output_path)
         actor_name = self._get_primary_actor_name(video)
         number_dir = self._sanitize_for_path(video.parsed_number)
         return root / actor_name / number_dir
@@ -156,10 +230,7 @@ class Scraper:
             video.file_path = str(target_path)
             return
 
-        try:
-            video.file_path = str(target_path)
-            yield
-            shutil.move(str(src_path), str(target_path))
-            logger.info(f"已移动视频文件到：{target_path}")
-        except Exception as e:
-            logger.error(f"移动视频文件失败 {video.parsed_number}: {e}")
+        video.file_path = str(target_path)
+        yield
+        # 交给后台队列执行：同盘 rename，跨盘分块拷贝 + 校验
+        self.mover.submit(src_path, target_path, video.parsed_number)
@@ -0,0 +1,273 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from src.utils import logger
+from src.scanner import Scanner
+from src.settings import settings
+from src.catalog import catalog
+from src.deadline import video_budget
+from src.metrics import metrics
+
+
+@dataclass
+class Job:
+    """提交的刮削任务：path 为扫描目录，files 为指定的视频文件（二选一）。"""
+
+    id: int
+    path: Optional[str] = None
+    files: List[str] = field(default_factory=list)
+    status: str = "queued"
+    videos: int = 0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class LookupService:
+    """
+    常驻的查询服务：复用同一个 Scraper（爬虫会话、首页 Cookie、详情页缓存常驻内存）。
+    - 查询结果按番号缓存在内存（LRU + TTL），本地目录中已有的记录直接返回；
+    - 同一番号的并发查询合并为一次站点请求（single-flight），其余调用方等待同一结果；
+    - 刮削任务在单独的工作线程中按提交顺序执行。
+    """
+
+    def __init__(self, scanner: Scanner, scraper):
+        self.scanner = scanner
+        self.scraper = scraper
+        current = settings.current.serve
+        self.cache_size = current.cache_size
+        self.cache_ttl = current.cache_ttl
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory": 0, "catalog": 0, "site": 0, "shared": 0, "missing": 0}
+
+        self._job_ids = itertools.count(1)
+        self.jobs: Dict[int, Job] = {}
+        self._jobs: "queue.Queue[Job]" = queue.Queue()
+        threading.Thread(target=self._job_worker, name="serve-jobs", daemon=True).start()
+        metrics.register("任务队列", self._jobs.qsize)
+
+    # ---- 查询 ----
+
+    def normalize(self, keyword: str) -> str:
+        """把 abc123 / ABC-123.mp4 等写法规范化为番号；无法识别时原样大写。"""
+        return self.scanner.number_parser.extract(keyword) or keyword.strip().upper()
+
+    def _cached(self, number: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(number)
+        if entry is None:
+            return None
+        stored_at, data = entry
+        if time.monotonic() - stored_at > self.cache_ttl:
+            del self._cache[number]
+            return None
+        self._cache.move_to_end(number)
+        return data
+
+    def _remember(self, number: str, data: Dict[str, Any]):
+        self._cache[number] = (time.monotonic(), data)
+        self._cache.move_to_end(number)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def lookup(
+        self, keyword: str, refresh: bool = False
+    ) -> Tuple[str, Optional[Dict[str, Any]], str]:
+        """返回 (番号, 元数据或 None, 来源：memory/catalog/site/shared)。"""
+        number = self.normalize(keyword)
+        with self._lock:
+            if not refresh:
+                data = self._cached(number)
+                if data is not None:
+                    self.stats["memory"] += 1
+                    return number, data, "memory"
+                record = catalog.get(number)
+                if record is not None:
+                    data = record.to_dict()
+                    self._remember(number, data)
+                    self.stats["catalog"] += 1
+                    return number, data, "catalog"
+            future = self._inflight.get(number)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[number] = future
+
+        if not leader:
+            with self._lock:
+                self.stats["shared"] += 1
+            return number, future.result(), "shared"
+
+        try:
+            with video_budget(settings.current.scraper.video_budget):
+                data = self.scraper.crawler_manager.scrape(number)
+            future.set_result(data)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(number, None)
+                if future.done() and not future.exception():
+                    if data is not None:
+                        self._remember(number, data)
+                    self.stats["site" if data is not None else "missing"] += 1
+        return number, data, "site"
+
+    # ---- 刮削任务 ----
+
+    def submit(self, path: Optional[str], files: List[str]) -> Job:
+        job = Job(id=next(self._job_ids), path=path, files=list(files))
+        self.jobs[job.id] = job
+        self._jobs.put(job)
+        return job
+
+    def _job_worker(self):
+        while True:
+            job = self._jobs.get()
+            job.status = "running"
+            try:
+                if job.path:
+                    file_map, _ = self.scanner.scan_directory(Path(job.path))
+                else:
+                    file_map = self.scanner.group_files([Path(p) for p in job.files])
+                job.videos = len(file_map)
+                self.scraper.scrape_all(file_map)
+                job.status = "done"
+            except Exception as e:
+                logger.error(f"刮削任务 {job.id} 失败：{e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /lookup?number=ABC-123[&refresh=1]   查询元数据
+    POST /jobs  {"path": "..."} 或 {"files": [...]} 提交刮削任务
+    GET  /jobs 与 /jobs/<id>                   任务状态
+    GET  /health                               缓存命中等统计
+    """
+
+    service: LookupService
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["lookup"]:
+            keyword = (params.get("number") or [""])[0]
+            if not keyword:
+                self._send(400, {"error": "缺少参数 number"})
+                return
+            refresh = (params.get("refresh") or ["0"])[0] in ("1", "true")
+            try:
+                number, data, source = self.service.lookup(keyword, refresh)
+            except Exception as e:
+                self._send(502, {"error": str(e)})
+                return
+            if data is None:
+                self._send(404, {"number": number, "error": "未找到"})
+                return
+            self._send(200, {"number": number, "source": source, "data": data})
+        elif parts == ["jobs"]:
+            self._send(200, [job.to_dict() for job in self.service.jobs.values()])
+        elif len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            job = self.service.jobs.get(int(parts[1]))
+            if job is None:
+                self._send(404, {"error": "任务不存在"})
+                return
+            self._send(200, job.to_dict())
+        elif parts == ["health"]:
+            self._send(
+                200,
+                {
+                    "cached": len(self.service._cache),
+                    "inflight": len(self.service._inflight),
+                    "jobs_queued": self.service._jobs.qsize(),
+                    "lookups": self.service.stats,
+                    "breakers": self.service.scraper.crawler_manager.breaker_stats(),
+                    "proxies": self.service.scraper.crawler_manager.proxy_stats(),
+                },
+            )
+        else:
+            self._send(404, {"error": "未知路径"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._send(404, {"error": "未知路径"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send(400, {"error": "请求体不是合法的 JSON"})
+            return
+        if not isinstance(payload, dict):
+            self._send(400, {"error": "请求体应为 JSON 对象"})
+            return
+        path = payload.get("path")
+        files = payload.get("files") or []
+        # files 为字符串时 list(files) 会拆成单个字符，必须显式拒绝
+        if (path is not None and not isinstance(path, str)) or not (
+            isinstance(files, list) and all(isinstance(f, str) for f in files)
+        ):
+            self._send(400, {"error": "path 应为字符串，files 应为路径列表"})
+            return
+        if not path and not files:
+            self._send(400, {"error": "需要 path 或 files"})
+            return
+        if path and not Path(path).is_dir():
+            self._send(400, {"error": f"目录不存在：{path}"})
+            return
+        job = self.service.submit(path, files)
+        self._send(202, job.to_dict())
+
+
+def serve(scanner: Scanner, scraper, host: str, port: int):
+    """启动本地 HTTP/JSON 服务，直到 Ctrl+C；期间 config.yaml 变化会热加载。"""
+    service = LookupService(scanner, scraper)
+    handler = type("Handler", (RequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    def reload_loop():
+        while True:
+            time.sleep(2)
+            settings.reload_if_changed()
+
+    settings.on_reload(lambda old, new: scanner.apply_settings(new))
+    threading.Thread(target=reload_loop, name="serve-reload", daemon=True).start()
+    logger.info(f"服务已启动：http://{host}:{port}/lookup?number=ABC-123")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("服务已停止。")
+    finally:
+        server.server_close()
@@ -0,0 +1,302 @@
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional, Tuple
+
+from src.config import Config, config
+from src.number_parser import NumberParser
+from src.utils import logger
+
+# 归档方式：move 移动；hardlink/symlink/reflink 在输出目录建立链接，源文件保持不动（适合做种/NAS）
+ORGANIZE_MODES = ("move", "hardlink", "symlink", "reflink")
+FALLBACK_MODES = ("full", "need", "plan")
+# 刮削队列排序：mtime 最新优先；size 最大优先；cheapest 预计请求最少优先；none 保持扫描顺序
+SCHEDULER_ORDERS = ("mtime", "size", "cheapest", "none")
+DUPLICATE_POLICIES = ("size", "resolution")
+
+
+@dataclass(frozen=True)
+class BaseSettings:
+    # base.scan_path 可以是单个目录或目录列表
+    scan_paths: Tuple[str, ...]
+    output_path: str
+    move_files: bool
+    organize_mode: str
+    generate_nfo: bool
+    download_cover: bool
+    download_trailer: bool
+    download_stills: bool
+    catalog: bool
+    dashboard: bool
+
+
+@dataclass(frozen=True)
+class ProxyPoolSettings:
+    # 每个代理每秒最多发出的请求数，0 为不限
+    rate: float
+    eject_error_rate: float
+    cooldown: float
+
+
+@dataclass(frozen=True)
+class ScraperSettings:
+    timeout: float
+    max_retries: int
+    # 单个视频的时间预算（秒），0 为不限
+    video_budget: float
+    fallback_mode: str
+    enabled_crawlers: Tuple[str, ...]
+    # 字段 -> 按优先级排列的站点
+    priority: Mapping[str, Tuple[str, ...]]
+    proxy_pool: ProxyPoolSettings
+
+
+@dataclass(frozen=True)
+class ScannerSettings:
+    min_size_mb: float
+    workers: int
+    duplicate_policy: str
+    queue_size: int
+    exclude: Tuple[str, ...]
+    extensions: Tuple[str, ...]
+    # 番号提取规则（scanner.rules），为空时使用内置规则表
+    rules: Tuple[Mapping[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class MoverSettings:
+    workers: int
+    queue_size: int
+    chunk_mb: int
+    verify: bool
+
+
+@dataclass(frozen=True)
+class WatchSettings:
+    use_inotify: bool
+    poll_interval: float
+    settle_seconds: float
+
+
+@dataclass(frozen=True)
+class SchedulerSettings:
+    order: str
+    fair: bool
+    priority_paths: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class ServeSettings:
+    host: str
+    port: int
+    cache_size: int
+    cache_ttl: float
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    配置的只读快照：加载时一次性完成类型转换与校验，热路径上直接读取属性，不再逐次解析点分隔的键。
+    """
+
+    base: BaseSettings
+    scraper: ScraperSettings
+    scanner: ScannerSettings
+    mover: MoverSettings
+    watch: WatchSettings
+    serve: ServeSettings
+    scheduler: SchedulerSettings
+
+    @classmethod
+    def from_config(cls, cfg: Config) -> "Settings":
+        """从 Config 构建并校验；有错误时抛出 ValueError，列出所有错误项。"""
+        errors: List[str] = []
+
+        def number(key: str, default: Any, kind=int, minimum: float = 0) -> Any:
+            value = cfg.get(key, default)
+            try:
+                value = kind(value)
+            except (TypeError, ValueError):
+                errors.append(f"{key} 应为数字：{value!r}")
+                return default
+            if value < minimum:
+                errors.append(f"{key} 不能小于 {minimum}：{value!r}")
+                return default
+            return value
+
+        def choice(key: str, default: str, options: Tuple[str, ...]) -> str:
+            value = cfg.get(key, default)
+            if value not in options:
+                errors.append(f"{key} 配置错误：{value!r}（可选：{'/'.join(options)}）")
+                return default
+            return value
+
+        def names(key: str, default: List[str]) -> Tuple[str, ...]:
+            value = cfg.get(key, default)
+            if isinstance(value, str) or not isinstance(value, (list, tuple)):
+                errors.append(f"{key} 应为列表：{value!r}")
+                return tuple(default)
+            return tuple(str(item) for item in value)
+
+        eject_error_rate = number("scraper.proxy_pool.eject_error_rate", 0.5, float)
+        if eject_error_rate > 1:
+            errors.append(
+                f"scraper.proxy_pool.eject_error_rate 不能大于 1：{eject_error_rate!r}"
+            )
+            eject_error_rate = 0.5
+
+        scan_paths = cfg.get("base.scan_path") or []
+        if isinstance(scan_paths, str):
+            scan_paths = [scan_paths]
+
+        rules = cfg.get("scanner.rules") or []
+        if not isinstance(rules, list) or not all(isinstance(r, dict) for r in rules):
+            errors.append(f"scanner.rules 应为规则列表：{rules!r}")
+            rules = []
+        try:
+            NumberParser(rules)
+        except ValueError as e:
+            errors.append(f"scanner.rules：{e}")
+            rules = []
+
+        priority = cfg.get("scraper.priority", {}) or {}
+        if not isinstance(priority, dict):
+            errors.append(f"scraper.priority 应为字段到站点列表的映射：{priority!r}")
+            priority = {}
+
+        settings = cls(
+            base=BaseSettings(
+                scan_paths=tuple(str(p) for p in scan_paths),
+                output_path=str(cfg.get("base.output_path", "javoutp")),
+                move_files=bool(cfg.get("base.move_files", False)),
+                organize_mode=choice("base.organize_mode", "move", ORGANIZE_MODES),
+                generate_nfo=bool(cfg.get("base.generate_nfo", False)),
+                download_cover=bool(cfg.get("base.download_cover", False)),
+                download_trailer=bool(cfg.get("base.download_trailer", False)),
+                download_stills=bool(cfg.get("base.download_stills", False)),
+                catalog=bool(cfg.get("base.catalog", True)),
+                dashboard=bool(cfg.get("base.dashboard", True)),
+            ),
+            scraper=ScraperSettings(
+                timeout=number("scraper.timeout", 30, float, 0.1),
+                max_retries=number("scraper.max_retries", 3, int, 1),
+                video_budget=number("scraper.video_budget", 300, float, 0),
+                fallback_mode=choice("scraper.fallback_mode", "full", FALLBACK_MODES),
+                enabled_crawlers=tuple(
+                    name.lower() for name in names("scraper.enabled_crawlers", [])
+                ),
+                priority=MappingProxyType(
+                    {
+                        field: names(f"scraper.priority.{field}", [])
+                        for field in priority
+                    }
+                ),
+                proxy_pool=ProxyPoolSettings(
+                    rate=number("scraper.proxy_pool.rate", 0, float),
+                    eject_error_rate=eject_error_rate,
+                    cooldown=number("scraper.proxy_pool.cooldown", 600, float),
+                ),
+            ),
+            scanner=ScannerSettings(
+                min_size_mb=number("scanner.min_size_mb", 100, float),
+                workers=number("scanner.workers", 8, int, 1),
+                duplicate_policy=choice(
+                    "scanner.duplicate_policy", "size", DUPLICATE_POLICIES
+                ),
+                queue_size=number("scanner.queue_size", 256, int, 1),
+                exclude=names("scanner.exclude", ["backdrops"]),
+                extensions=tuple(
+                    ext.lower()
+                    for ext in names(
+                        "scanner.extensions", [".mp4", ".mkv", ".avi", ".wmv", ".mov"]
+                    )
+                ),
+                rules=tuple(MappingProxyType(dict(rule)) for rule in rules),
+            ),
+            mover=MoverSettings(
+                workers=number("mover.workers", 2, int, 1),
+                queue_size=number("mover.queue_size", 8, int, 1),
+                chunk_mb=number("mover.chunk_mb", 64, int, 1),
+                verify=bool(cfg.get("mover.verify", True)),
+            ),
+            watch=WatchSettings(
+                use_inotify=bool(cfg.get("watch.use_inotify", True)),
+                poll_interval=number("watch.poll_interval", 30, float, 0.1),
+                settle_seconds=number("watch.settle_seconds", 10, float),
+            ),
+            serve=ServeSettings(
+                host=str(cfg.get("serve.host", "127.0.0.1")),
+                port=number("serve.port", 8710, int, 1),
+                cache_size=number("serve.cache_size", 10000, int, 1),
+                cache_ttl=number("serve.cache_ttl", 3600, float, 1),
+            ),
+            scheduler=SchedulerSettings(
+                order=choice("scheduler.order", "mtime", SCHEDULER_ORDERS),
+                fair=bool(cfg.get("scheduler.fair", True)),
+                priority_paths=names("scheduler.priority_paths", []),
+            ),
+        )
+        if errors:
+            raise ValueError("配置校验失败：\n  " + "\n  ".join(errors))
+        return settings
+
+
+class SettingsStore:
+    """
+    持有当前的 Settings 快照。读取方每次取 current 得到一份完整、一致的快照；
+    reload_if_changed 在 config.yaml 的 mtime 变化时重新加载并校验，成功后整体替换引用（原子），
+    失败时记录错误并继续使用旧快照；config.yaml 被删除时同样保留当前配置（不重新生成默认配置）。
+    监听/常驻模式在主循环中定期调用。
+    """
+
+    def __init__(self, cfg: Config):
+        self._config = cfg
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Settings, Settings], None]] = []
+        self._mtime = self._config_mtime()
+        self.current = Settings.from_config(cfg)
+
+    def _config_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self._config.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def on_reload(self, callback: Callable[[Settings, Settings], None]):
+        """注册热加载回调，参数为 (旧快照, 新快照)。"""
+        self._listeners.append(callback)
+
+    def reload_if_changed(self) -> bool:
+        """config.yaml 有变化时重新加载，返回是否应用了新配置。"""
+        mtime = self._config_mtime()
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            if mtime is None:
+                # Config() 在文件不存在时会写出默认配置，这里不能用它覆盖用户正在编辑的文件
+                logger.warning("config.yaml 不存在，继续使用当前配置。")
+                return False
+            try:
+                fresh = Config(Path(self._config.config_path))
+                settings = Settings.from_config(fresh)
+            except Exception as e:
+                logger.error(f"重新加载配置失败，继续使用当前配置：{e}")
+                return False
+            old, self.current = self.current, settings
+            # 仍直接读取 Config 的模块同步看到新值
+            self._config.data = fresh.data
+        logger.info("检测到 config.yaml 变化，已重新加载配置。")
+        for callback in self._listeners:
+            try:
+                callback(old, settings)
+            except Exception as e:
+                logger.error(f"应用新配置失败：{e}")
+        return True
+
+
+settings = SettingsStore(config)
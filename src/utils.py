@@ -1,4 +1,7 @@
 import logging
+import os
+import tempfile
+from pathlib import Path
 from rich.logging import RichHandler
 from src.config import config
 
@@ -19,3 +22,28 @@ def setup_logger(name: str = "avscraper"):
 
 
 logger = setup_logger()
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """
+    原子写入：先写入同目录下的临时文件并 fsync，再 rename 覆盖目标文件。
+    读取方（如 Emby/Jellyfin）只会看到旧文件或完整的新文件，不会读到写了一半的内容。
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        # mkstemp 创建的文件权限为 0600，这里沿用目标文件的权限（新文件为 0644），避免媒体服务器无法读取
+        mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+        os.chmod(tmp_path, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,237 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from src.settings import Settings, settings
+from src.utils import logger
+from src.scanner import Scanner
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """
+    轮询实现：定期遍历目录，返回上次遍历之后新出现的视频文件。
+    适用于不支持 inotify 的平台，以及 SMB/NFS 等收不到 inotify 事件的网络挂载。
+    """
+
+    def __init__(self, scanner: Scanner, root: Path, interval: float):
+        self.scanner = scanner
+        self.root = root
+        self.interval = interval
+        self._seen: Set[Path] = set(self._list_files())
+        self._next_scan = time.monotonic() + self.interval
+
+    def _list_files(self) -> List[Path]:
+        # 不按最小体积过滤：正在写入的文件可能暂时小于 min_size_mb
+        result = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [
+                d for d in dirnames if not self.scanner._is_excluded(Path(dirpath) / d)
+            ]
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() in self.scanner.extensions:
+                    result.append(Path(dirpath) / name)
+        return result
+
+    def poll(self, timeout: float) -> Set[Path]:
+        wait = self._next_scan - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            if time.monotonic() < self._next_scan:
+                return set()
+        self._next_scan = time.monotonic() + self.interval
+        current = set(self._list_files())
+        new_files = current - self._seen
+        self._seen = current
+        return new_files
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    基于 Linux inotify 的实现（通过 ctypes 调用 libc，无需额外依赖）。
+    递归监听目录树，新建/移入的子目录会自动加入监听，排除规则与 Scanner 一致。
+    """
+
+    def __init__(self, scanner: Scanner, root: Path):
+        self.scanner = scanner
+        self.root = root
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 失败：{os.strerror(errno)}")
+        self._watches: Dict[int, Path] = {}
+        self._add_tree(root)
+
+    def _add_watch(self, path: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            logger.warning(f"无法监听目录 {path}: {os.strerror(errno)}")
+            return
+        self._watches[wd] = path
+
+    def _add_tree(self, path: Path) -> Set[Path]:
+        """监听 path 及其所有子目录，返回其中已存在的视频文件（目录整体移入时需要补发）。"""
+        files: Set[Path] = set()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [
+                d for d in dirnames if not self.scanner._is_excluded(Path(dirpath) / d)
+            ]
+            self._add_watch(Path(dirpath))
+            for name in filenames:
+                if os.path.splitext(name)[1].lower() in self.scanner.extensions:
+                    files.add(Path(dirpath) / name)
+        return files
+
+    def poll(self, timeout: float) -> Set[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed: Set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning(
+                    "inotify 事件队列溢出，部分新文件可能需要等待下次全量扫描。"
+                )
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            parent = self._watches.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.scanner._is_excluded(
+                    path
+                ):
+                    changed |= self._add_tree(path)
+            elif path.suffix.lower() in self.scanner.extensions:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Debouncer:
+    """
+    写入完成判定：文件大小在 settle_seconds 内保持不变才视为下载/复制完成。
+    """
+
+    def __init__(self, settle_seconds: float):
+        self.settle_seconds = settle_seconds
+        # path -> (上次观察到的大小, 大小最后一次变化的时间)
+        self._pending: Dict[Path, Tuple[int, float]] = {}
+
+    def __contains__(self, path: Path) -> bool:
+        return path in self._pending
+
+    def touch(self, path: Path):
+        if path not in self._pending:
+            self._pending[path] = (-1, time.monotonic())
+
+    def ready(self) -> List[Path]:
+        now = time.monotonic()
+        done = []
+        for path, (last_size, since) in list(self._pending.items()):
+            try:
+                size = path.stat().st_size
+            except OSError:
+                # 文件已被删除或移走
+                del self._pending[path]
+                continue
+            if size != last_size:
+                self._pending[path] = (size, now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                done.append(path)
+        return done
+
+
+def create_watcher(scanner: Scanner, root: Path):
+    """优先使用 inotify，不可用时回退为轮询。"""
+    interval = settings.current.watch.poll_interval
+    if settings.current.watch.use_inotify and sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(scanner, root)
+            logger.info(f"使用 inotify 监听目录：{root}")
+            return watcher
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify 不可用，回退为轮询：{e}")
+    logger.info(f"使用轮询监听目录：{root}（间隔 {interval} 秒）")
+    return PollingWatcher(scanner, root, interval)
+
+
+def watch(scanner: Scanner, scraper, roots: List[Path]):
+    """
+    监听目录（可以是多个根目录）并增量刮削新文件。
+    只处理启动之后新出现的视频文件；同一 Scraper 实例在整个监听期间复用，爬虫会话与缓存保持常驻。
+    """
+    watchers = [create_watcher(scanner, root) for root in roots]
+    debouncer = Debouncer(settings.current.watch.settle_seconds)
+
+    def apply_settings(old: Settings, new: Settings):
+        scanner.apply_settings(new)
+        debouncer.settle_seconds = new.watch.settle_seconds
+        for watcher in watchers:
+            if isinstance(watcher, PollingWatcher):
+                watcher.interval = new.watch.poll_interval
+
+    settings.on_reload(apply_settings)
+    try:
+        while True:
+            # config.yaml 变化时热加载（扫描参数、写入判定时间、超时重试、归档线程数、字段优先级等）
+            settings.reload_if_changed()
+            for watcher in watchers:
+                for path in watcher.poll(timeout=1.0 / len(watchers)):
+                    if path not in debouncer:
+                        logger.debug(f"检测到新文件：{path}")
+                    debouncer.touch(path)
+
+            ready = [path for path in debouncer.ready() if scanner._is_video_file(path)]
+            if not ready:
+                continue
+            file_map = scanner.group_files(ready)
+            if file_map:
+                logger.info(f"新文件写入完成，开始刮削 {len(file_map)} 个视频。")
+                scraper.scrape_all(file_map)
+    except KeyboardInterrupt:
+        logger.info("已停止监听。")
+    finally:
+        for watcher in watchers:
+            watcher.close()
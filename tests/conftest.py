@@ -0,0 +1,63 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# src.config 在导入时读取（或生成）当前目录下的 config.yaml，测试在临时目录中运行，不影响仓库
+os.chdir(tempfile.mkdtemp(prefix="avscraper-tests-"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        self.server.hits.append(self.path)
+        route = self.server.routes.get(self.path.split("?")[0], (200, {}, b"<html></html>"))
+        # 列表表示依次返回的多个响应，最后一个之后保持不变
+        if isinstance(route, list):
+            route = route.pop(0) if len(route) > 1 else route[0]
+        status, headers, body = route
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+@pytest.fixture
+def http_server():
+    """
+    本地 HTTP 服务：server.routes[path] = (状态码, 响应头, 响应体) 或其列表，server.hits 记录请求路径。
+    作为代理使用时 path 为完整 URL。
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.routes = {}
+    server.hits = []
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def crawler_config(base_url: str, **overrides):
+    config = {
+        "base_url": base_url + "/",
+        "search_url": base_url + "/{}",
+        "headers": {"User-Agent": "tests", "Cookie": ""},
+        "timeout": 2,
+        "max_retries": 2,
+        "proxy": None,
+        "breaker": None,
+        "cassette": None,
+        "proxy_pool": None,
+    }
+    config.update(overrides)
+    return config
@@ -0,0 +1,34 @@
+import json
+
+from src.artwork_store import ArtworkStore
+from src.crawlers.javbus import Javbus
+from src.nfo_gen import nfo_gen
+
+from tests.conftest import crawler_config
+
+IMAGE = bytes(range(256)) * 1200
+
+
+def test_truncated_cover_is_repaired(http_server, tmp_path, monkeypatch):
+    store = ArtworkStore(tmp_path / "store")
+    monkeypatch.setattr("src.nfo_gen.artwork_store", store)
+    crawler = Javbus(crawler_config(http_server.url))
+    http_server.routes["/cover.jpg"] = (200, {}, IMAGE)
+    url = http_server.url + "/cover.jpg"
+    dest = tmp_path / "ABC-123" / "ABC-123.jpg"
+
+    assert nfo_gen._ensure_asset(crawler, url, dest)
+    # 封面是仓库文件的硬链接：截断封面的同时也截断了仓库文件
+    with open(dest, "r+b") as f:
+        f.truncate(10)
+    assert store.lookup(url) is None
+
+    assert nfo_gen._ensure_asset(crawler, url, dest)
+    assert dest.read_bytes() == IMAGE
+    assert store.lookup(url).read_bytes() == IMAGE
+    last = json.loads(store.index_path.read_text(encoding="utf-8").splitlines()[-1])
+    assert last["length"] == len(IMAGE)
+    # 修复后不再请求
+    hits = len(http_server.hits)
+    assert not nfo_gen._ensure_asset(crawler, url, dest)
+    assert len(http_server.hits) == hits
@@ -0,0 +1,86 @@
+import pytest
+
+from src.crawlers.breaker import CLOSED, OPEN
+from src.crawlers.javbus import Javbus
+
+from tests.conftest import crawler_config
+
+CHALLENGE = (403, {"cf-mitigated": "challenge"}, b"Just a moment...")
+
+
+def test_challenge_without_proxies_opens_breaker(http_server):
+    crawler = Javbus(crawler_config(http_server.url))
+    http_server.routes["/ABC-123"] = CHALLENGE
+
+    assert crawler.search("ABC-123") is None
+    # 直连只有一个出口：不能“换代理重试”，应立即按站点遇到验证页处理
+    assert crawler.last_request_ok is False
+    assert crawler.breaker.state == OPEN
+    assert http_server.hits.count("/ABC-123") == 1
+
+
+def test_challenge_rotates_to_another_proxy(http_server):
+    # 代理服务器以绝对 URL 收到请求；这里用两个“代理”都指向同一个本地服务，第一次返回验证页
+    crawler = Javbus(
+        crawler_config(
+            "http://example.test",
+            proxy=[http_server.url, http_server.url + "/"],
+            max_retries=3,
+        )
+    )
+    http_server.routes["http://example.test/p1"] = [
+        CHALLENGE,
+        (200, {}, b"<html><h3>ok</h3></html>"),
+    ]
+
+    response = crawler._request("http://example.test/p1")
+
+    assert response is not None and response.status_code == 200
+    assert crawler.breaker.state == CLOSED
+    assert [ep["healthy"] for ep in crawler.proxy_pool.snapshot()].count(False) == 1
+
+
+def test_unexpected_error_releases_half_open_probe(http_server, monkeypatch):
+    crawler = Javbus(crawler_config(http_server.url))
+    crawler.breaker.record_failure("测试", challenge=True)
+    crawler.breaker.cooldown = 0
+
+    def broken(*args, **kwargs):
+        raise OSError("录制写盘失败")
+
+    monkeypatch.setattr(crawler.proxy_pool, "acquire", broken)
+    with pytest.raises(OSError):
+        crawler._request(http_server.url + "/p1")
+    monkeypatch.undo()
+
+    # 探测名额已归还：下一次请求仍可作为探测发出并使站点恢复
+    assert crawler._request(http_server.url + "/p1") is not None
+    assert crawler.breaker.state == CLOSED
+
+
+def test_soup_cache_hit_marks_request_ok(http_server):
+    crawler = Javbus(crawler_config(http_server.url))
+    http_server.routes["/ABC-123"] = (200, {}, b"<html><h3>ABC-123</h3></html>")
+
+    assert crawler.search("ABC-123") is not None
+    # 无关请求失败后，命中缓存的搜索不应沿用失败标记（否则无法记入未找到缓存的判断会出错）
+    crawler.last_request_ok = False
+    assert crawler.search("ABC-123") is not None
+    assert crawler.last_request_ok is True
+    assert http_server.hits.count("/ABC-123") == 1
+
+
+def test_cassette_miss_releases_half_open_probe(http_server, tmp_path):
+    crawler = Javbus(
+        crawler_config(
+            http_server.url, cassette={"mode": "replay", "path": str(tmp_path)}
+        )
+    )
+    crawler.breaker.record_failure("测试", challenge=True)
+    crawler.breaker.cooldown = 0
+
+    assert crawler._request(http_server.url + "/p1") is None
+
+    # 回放缺失不占用探测名额：下一次请求仍会被放行
+    assert crawler.breaker.allow()
+    assert http_server.hits == []
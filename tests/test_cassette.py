@@ -0,0 +1,43 @@
+import requests
+
+from src.crawlers.cassette import Cassette
+from src.crawlers.javbus import Javbus
+
+from tests.conftest import crawler_config
+
+PAGE = "<html><h3>ABC-123 标题</h3></html>".encode("utf-8")
+
+
+def test_record_then_replay_without_network(http_server, tmp_path):
+    http_server.routes["/ABC-123"] = (200, {"Content-Type": "text/html; charset=utf-8"}, PAGE)
+    recorder = Javbus(
+        crawler_config(http_server.url, cassette={"mode": "record", "path": str(tmp_path)})
+    )
+    url = recorder.search("ABC-123")
+    assert recorder.get_title(url) == "ABC-123 标题"
+    hits = len(http_server.hits)
+
+    player = Javbus(
+        crawler_config(http_server.url, cassette={"mode": "replay", "path": str(tmp_path)})
+    )
+    assert player.search("ABC-123") == url
+    assert player.get_title(url) == "ABC-123 标题"
+    # 回放（含初始化时访问首页）不发起任何网络请求
+    assert len(http_server.hits) == hits
+    # 没有录制的请求返回 None，同样不联网
+    assert player.search("XYZ-001") is None
+    assert len(http_server.hits) == hits
+
+
+def test_replay_follows_recording_order(http_server, tmp_path):
+    http_server.routes["/p"] = [(500, {}, b"first"), (200, {}, b"second")]
+    url = http_server.url + "/p"
+    recorder = Cassette(tmp_path, "record")
+    player = Cassette(tmp_path, "replay")
+    for _ in range(2):
+        recorder.record("GET", url, None, requests.get(url))
+
+    # 按录制顺序回放，超出录制次数后重复最后一次
+    replayed = [player.play("GET", url, None) for _ in range(3)]
+    assert [r.status_code for r in replayed] == [500, 200, 200]
+    assert [r.content for r in replayed] == [b"first", b"second", b"second"]
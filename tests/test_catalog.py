@@ -0,0 +1,44 @@
+from src.catalog import Catalog
+from src.models import Video
+
+
+def test_multi_part_video_records_every_part(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    parts = [str(tmp_path / f"ABC-123-cd{i}.mp4") for i in (1, 2)]
+    catalog = Catalog(path)
+    catalog.add(
+        Video("ABC-123", file_path=parts[0], title="t", actors=["某演员"]), parts
+    )
+    catalog.add(Video("XYZ-001", file_path=str(tmp_path / "XYZ-001.mp4")))
+
+    # 重新从 JSONL 加载，再从索引快照加载，分段信息都应保留
+    for _ in range(2):
+        reloaded = Catalog(path)
+        record = reloaded.get("ABC-123")
+        assert reloaded.parts_of(record) == parts
+        assert reloaded.query(actor="某演员") == [record]
+        single = reloaded.get("XYZ-001")
+        assert reloaded.parts_of(single) == [single.file_path]
+
+
+def test_re_adding_single_file_drops_old_parts(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    catalog = Catalog(path)
+    catalog.add(Video("ABC-123", file_path="a-cd1.mp4"), ["a-cd1.mp4", "a-cd2.mp4"])
+    catalog.add(Video("ABC-123", file_path="a.mp4"))
+
+    assert catalog.parts_of(catalog.get("ABC-123")) == ["a.mp4"]
+    assert Catalog(path).parts_of(catalog.get("ABC-123")) == ["a.mp4"]
+
+
+def test_save_snapshot_without_new_records_keeps_index(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    Catalog(path).add(Video("ABC-123", actors=["某演员"]))
+    Catalog(path).load()
+
+    # 本次运行没有刮削成功任何视频：目录从未加载，不能写出空快照
+    Catalog(path).save_snapshot()
+
+    reloaded = Catalog(path)
+    assert reloaded.query(actor="某演员") == [reloaded.get("ABC-123")]
+    assert len(reloaded) == 1
@@ -0,0 +1,61 @@
+import time
+
+from src import artwork_store as artwork_module
+from src.artwork_store import ArtworkStore
+from src.crawlers.breaker import CLOSED
+from src.crawlers.javbus import Javbus
+from src.deadline import expired, remaining, video_budget
+
+from tests.conftest import crawler_config
+
+IMAGE = bytes(range(256)) * 1200
+
+
+def test_nested_budget_uses_earlier_deadline():
+    assert remaining() is None
+    with video_budget(10):
+        with video_budget(0.05):
+            assert remaining() <= 0.05
+        with video_budget(60):
+            assert remaining() <= 10
+        with video_budget(0):
+            assert remaining() <= 10
+    assert remaining() is None
+
+
+def test_expired_budget_stops_retries(http_server):
+    crawler = Javbus(crawler_config(http_server.url, max_retries=50))
+    http_server.routes["/p1"] = (500, {}, b"error")
+    http_server.hits.clear()
+
+    started = time.monotonic()
+    with video_budget(0.3):
+        assert crawler._request(http_server.url + "/p1") is None
+        # 预算用尽后不再发起新的请求
+        hits = len(http_server.hits)
+        assert expired()
+        assert crawler._request(http_server.url + "/p1") is None
+        assert len(http_server.hits) == hits
+
+    assert time.monotonic() - started < 2
+    assert 0 < hits < 50
+    # 预算用尽不代表站点故障，不计入熔断
+    assert crawler.breaker.state == CLOSED and crawler.breaker.failures == 0
+
+
+def test_expired_budget_stops_download_and_keeps_part(http_server, tmp_path, monkeypatch):
+    store = ArtworkStore(tmp_path / "store")
+    crawler = Javbus(crawler_config(http_server.url))
+    http_server.routes["/cover.jpg"] = (200, {}, IMAGE)
+    url = http_server.url + "/cover.jpg"
+    # 第一个数据块写入后预算用尽
+    checks = iter([False] + [True] * 10)
+    monkeypatch.setattr(artwork_module, "expired", lambda: next(checks, True))
+
+    assert store.fetch(crawler, url) is None
+    parts = list((store.root / "partial").glob("*.part"))
+    assert len(parts) == 1 and 0 < parts[0].stat().st_size < len(IMAGE)
+    assert store.lookup(url) is None
+
+    monkeypatch.setattr(artwork_module, "expired", lambda: False)
+    assert store.fetch(crawler, url).read_bytes() == IMAGE
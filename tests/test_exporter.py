@@ -0,0 +1,55 @@
+import gzip
+
+import pytest
+
+from src.exporter import export_jsonl, import_jsonl, iter_jsonl
+from src.models import Video
+from src.nfo_gen import nfo_gen
+
+
+def _videos(tmp_path):
+    video_path = tmp_path / "ABC-123" / "ABC-123.mp4"
+    video_path.parent.mkdir()
+    video_path.write_bytes(b"x")
+    return [
+        Video(
+            "ABC-123",
+            file_path=str(video_path),
+            title="标题",
+            release_date="2020-01-01",
+            actors=["某演员"],
+            category=["剧情"],
+            cover_url=["Javbus", "http://example.test/c.jpg"],
+        ),
+        # 本地文件已不存在：导入时只读取，不生成 NFO
+        Video("XYZ-001", file_path=str(tmp_path / "gone.mp4"), title="t"),
+    ]
+
+
+@pytest.mark.parametrize("name", ["library.jsonl", "library.jsonl.gz"])
+def test_export_import_round_trip(tmp_path, name):
+    videos = _videos(tmp_path)
+    path = tmp_path / name
+
+    assert export_jsonl(iter(videos), path) == 2
+    if name.endswith(".gz"):
+        with open(path, "rb") as f:
+            assert f.read(2) == b"\x1f\x8b"
+
+    assert [v.to_dict() for v in iter_jsonl(path)] == [v.to_dict() for v in videos]
+
+    nfo_path = tmp_path / "ABC-123" / "ABC-123.nfo"
+    assert import_jsonl(path) == 2
+    assert nfo_path.exists()
+    assert not (tmp_path / "gone.nfo").exists()
+    # 再次导入：内容未变化的 NFO 不会被改写
+    assert import_jsonl(path) == 2
+    assert nfo_gen.stats["written"] == 0 and nfo_gen.stats["skipped"] == 1
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    path = tmp_path / "library.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write('{"parsed_number": "ABC-123"}\n\nnot json\n{"title": "缺少番号"}\n')
+
+    assert [v.parsed_number for v in iter_jsonl(path)] == ["ABC-123"]
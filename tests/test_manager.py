@@ -0,0 +1,152 @@
+import threading
+from dataclasses import replace
+from types import MappingProxyType, SimpleNamespace
+
+import pytest
+
+from src.crawlers import manager as manager_module
+from src.crawlers.base import BaseCrawler, Capability
+from src.crawlers.manager import FIELDS, CrawlerManager
+from src.settings import settings
+
+
+class FakeCrawler:
+    """按字典返回字段的爬虫，记录搜索次数与被请求的字段。"""
+
+    SEARCH_COST = 2
+    capability = BaseCrawler.capability
+    provides = BaseCrawler.provides
+    authenticated = BaseCrawler.authenticated
+
+    def __init__(self, data, capabilities=None, found=True):
+        self.data = data
+        self.CAPABILITIES = capabilities or {field: Capability() for field in FIELDS}
+        self.found = found
+        self.headers = {"Cookie": ""}
+        self.breaker = SimpleNamespace(available=lambda: True)
+        self.last_request_ok = True
+        self.detail_page = None
+        self.searches = 0
+        self.calls = []
+
+    def search(self, keyword):
+        self.searches += 1
+        return f"http://fake/{keyword}" if self.found else None
+
+    def __getattr__(self, name):
+        if not name.startswith("get_"):
+            raise AttributeError(name)
+        field = name[len("get_") :]
+
+        def get(url):
+            self.calls.append(field)
+            return self.data.get(field)
+
+        return get
+
+
+@pytest.fixture
+def make_manager(monkeypatch):
+    monkeypatch.setattr(manager_module.negative_cache, "is_missing", lambda *a: False)
+    monkeypatch.setattr(manager_module.negative_cache, "record_miss", lambda *a: None)
+    monkeypatch.setattr(manager_module.negative_cache, "record_found", lambda *a: None)
+
+    def make(crawlers, mode, priority):
+        current = settings.current
+        monkeypatch.setattr(
+            settings,
+            "current",
+            replace(
+                current,
+                scraper=replace(
+                    current.scraper,
+                    fallback_mode=mode,
+                    enabled_crawlers=tuple(name.lower() for name in crawlers),
+                    priority=MappingProxyType(priority),
+                ),
+            ),
+        )
+        manager = CrawlerManager.__new__(CrawlerManager)
+        manager.crawlers = crawlers
+        manager.lock = threading.RLock()
+        manager.retry_missing = False
+        return manager
+
+    return make
+
+
+@pytest.mark.parametrize("mode", ["full", "need"])
+def test_full_and_need_ignore_capability_declarations(make_manager, mode):
+    # 未登录时声明为不提供，但爬虫自有回退（如 Javdb 从预览区取预告片）
+    javdb = FakeCrawler(
+        {"trailer_url": ["Javdb", "http://fake/trailer.mp4"]},
+        capabilities={"trailer_url": Capability(0.8, requires_auth=True)},
+    )
+    manager = make_manager({"Javdb": javdb}, mode, {"trailer_url": ("javdb",)})
+
+    merged = manager.scrape("ABC-123")
+
+    assert merged["trailer_url"] == ["Javdb", "http://fake/trailer.mp4"]
+    assert "trailer_url" in javdb.calls
+
+
+def test_plan_skips_fields_a_site_does_not_provide(make_manager):
+    javdb = FakeCrawler(
+        {"title": "t", "trailer_url": ["Javdb", "http://fake/trailer.mp4"]},
+        capabilities={
+            "title": Capability(),
+            "trailer_url": Capability(0.8, requires_auth=True),
+        },
+    )
+    manager = make_manager(
+        {"Javdb": javdb}, "plan", {"title": ("javdb",), "trailer_url": ("javdb",)}
+    )
+
+    merged = manager.scrape("ABC-123")
+
+    assert merged["title"] == "t"
+    assert javdb.calls == ["title"]
+
+
+def test_need_mode_skips_lower_priority_sites_when_filled(make_manager):
+    javbus = FakeCrawler({"title": "t", "studio": "s"})
+    javdb = FakeCrawler({"title": "other", "studio": "other"})
+    priority = {"title": ("javbus", "javdb"), "studio": ("javbus", "javdb")}
+    manager = make_manager({"Javbus": javbus, "Javdb": javdb}, "need", priority)
+
+    merged = manager.scrape("ABC-123")
+
+    assert (merged["title"], merged["studio"]) == ("t", "s")
+    assert javdb.searches == 0 and javdb.calls == []
+    assert javbus.searches == 1
+
+
+def test_need_mode_falls_back_per_field(make_manager):
+    javbus = FakeCrawler({"title": "t"})
+    javdb = FakeCrawler({"title": "other", "studio": "s", "actors": ["某演员"]})
+    priority = {
+        "title": ("javbus", "javdb"),
+        "studio": ("javbus", "javdb"),
+        "actors": ("javbus", "javdb"),
+    }
+    manager = make_manager({"Javbus": javbus, "Javdb": javdb}, "need", priority)
+
+    merged = manager.scrape("ABC-123")
+
+    assert merged["title"] == "t"
+    assert merged["studio"] == "s" and merged["actors"] == ["某演员"]
+    # 低优先级站点只为空字段联系一次，搜索结果在本次刮削内复用
+    assert javdb.searches == 1
+    assert javdb.calls == ["studio", "actors"]
+
+
+def test_need_mode_moves_on_when_a_site_has_no_result(make_manager):
+    javbus = FakeCrawler({}, found=False)
+    javdb = FakeCrawler({"title": "t", "studio": "s"})
+    priority = {"title": ("javbus", "javdb"), "studio": ("javbus", "javdb")}
+    manager = make_manager({"Javbus": javbus, "Javdb": javdb}, "need", priority)
+
+    merged = manager.scrape("ABC-123")
+
+    assert (merged["title"], merged["studio"]) == ("t", "s")
+    assert javbus.searches == 1 and javbus.calls == []
@@ -0,0 +1,16 @@
+from src import metrics as metrics_module
+from src.metrics import RATE_WINDOW, Metrics
+
+
+def test_byte_window_is_pruned_without_reading_rates(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(metrics_module.time, "monotonic", lambda: now[0])
+    metrics = Metrics()
+
+    for _ in range(1000):
+        metrics.add_bytes("example.com", 64 * 1024)
+        now[0] += 1
+
+    # 从未调用 rates()（serve 模式没有面板）：窗口内只保留最近 RATE_WINDOW 秒的记录
+    assert len(metrics._bytes_window["example.com"]) <= RATE_WINDOW + 1
+    assert metrics.bytes_total["example.com"] == 1000 * 64 * 1024
@@ -0,0 +1,57 @@
+import json
+import tracemalloc
+
+from src.models import CompactVideo, Video
+
+
+def _record(i: int) -> dict:
+    """模拟从 JSONL 读入的记录：每条记录的字符串都是独立对象。"""
+    video = Video(
+        parsed_number=f"ABC-{i:05d}",
+        file_path=f"/videos/ABC-{i:05d}.mp4",
+        title=f"标题 {i}",
+        release_date="2024-01-01",
+        director=f"导演{i % 20}",
+        studio=f"片商{i % 30}",
+        series=f"系列{i % 50}",
+        category=["剧情", "单体作品", f"类别{i % 40}"],
+        actors=[f"演员{i % 300}", f"演员{(i + 7) % 300}"],
+        cover_url=["Javdb", f"https://img.example/{i}.jpg"],
+        trailer_url=["Javbus", f"https://v.example/{i}.mp4"],
+        image_urls=["Javdb"] + [f"https://img.example/{i}-{n}.jpg" for n in range(5)],
+        scrape_status="SUCCESS",
+    )
+    return json.loads(json.dumps(video.to_dict(), ensure_ascii=False))
+
+
+def _footprint(build, count=2000) -> int:
+    """读入 count 条记录并转换后，只保留转换结果时占用的内存（字节）。"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        held = [build(_record(i)) for i in range(count)]
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(held) == count
+    return size
+
+
+def test_round_trip_matches_video():
+    data = _record(1)
+    compact = CompactVideo.from_dict(data)
+    assert compact.to_dict() == Video.from_dict(data).to_dict()
+    assert compact.to_video().to_dict() == Video.from_dict(data).to_dict()
+
+
+def test_compact_has_no_dict_and_interns_names():
+    a, b = CompactVideo.from_dict(_record(1)), CompactVideo.from_dict(_record(301))
+    assert not hasattr(a, "__dict__")
+    assert a.actors[0] is b.actors[0]
+    assert a.cover_source is b.cover_source
+
+
+def test_compact_uses_less_memory_than_video():
+    video = _footprint(Video.from_dict)
+    compact = _footprint(CompactVideo.from_dict)
+    assert compact < video * 0.8
@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from src import mover
+from src.mover import copy_file, move_file, organize_file
+
+CHUNK = 64 * 1024
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+@pytest.fixture
+def payload():
+    return os.urandom(1024 * 1024 + 123)
+
+
+def test_copy_file_resumes_from_part(tmp_path, payload):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    # .part 中已有的数据不再重新拷贝：用不同的内容占位即可看出是否续传
+    _write(dst.with_name(dst.name + ".part"), b"\0" * 300_000)
+
+    copy_file(src, dst, CHUNK, verify=False)
+
+    data = dst.read_bytes()
+    assert data[:300_000] == b"\0" * 300_000
+    assert data[300_000:] == payload[300_000:]
+    assert not dst.with_name(dst.name + ".part").exists()
+
+
+def test_copy_file_verify_failure_discards_part(tmp_path, payload):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    part = _write(dst.with_name(dst.name + ".part"), b"\0" * 300_000)
+
+    with pytest.raises(OSError, match="校验失败"):
+        copy_file(src, dst, CHUNK, verify=True)
+
+    assert not dst.exists()
+    assert not part.exists()
+    # 丢弃损坏的 .part 后重新拷贝即可成功
+    copy_file(src, dst, CHUNK, verify=True)
+    assert dst.read_bytes() == payload
+
+
+def test_move_file_same_device_renames(tmp_path, payload):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    dst.parent.mkdir()
+    inode = src.stat().st_ino
+
+    move_file(src, dst, CHUNK)
+
+    assert not src.exists()
+    assert dst.stat().st_ino == inode
+
+
+def test_move_file_cross_device_copies_then_removes_source(tmp_path, payload, monkeypatch):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    dst.parent.mkdir()
+    inode = src.stat().st_ino
+    monkeypatch.setattr(mover, "_same_device", lambda *args: False)
+
+    move_file(src, dst, CHUNK)
+
+    assert not src.exists()
+    assert dst.read_bytes() == payload
+    assert dst.stat().st_ino != inode
+
+
+def test_move_file_refuses_to_overwrite(tmp_path, payload):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = _write(tmp_path / "out" / "ABC-123.mp4", b"other")
+
+    with pytest.raises(FileExistsError):
+        move_file(src, dst, CHUNK)
+    assert src.exists()
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "reflink"])
+def test_organize_file_links_and_is_idempotent(tmp_path, payload, mode):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    dst.parent.mkdir()
+
+    organize_file(src, dst, mode, CHUNK)
+    # 重复运行：目标已存在且内容相同，不报错
+    organize_file(src, dst, mode, CHUNK)
+
+    assert src.exists()
+    assert dst.read_bytes() == payload
+    if mode == "hardlink":
+        assert os.path.samefile(src, dst) and not dst.is_symlink()
+    elif mode == "symlink":
+        assert dst.is_symlink()
+
+
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "reflink"])
+def test_organize_file_falls_back_to_copy(tmp_path, payload, monkeypatch, mode):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = tmp_path / "out" / "ABC-123.mp4"
+    dst.parent.mkdir()
+
+    def unsupported(*args, **kwargs):
+        raise OSError(18, "Invalid cross-device link")
+
+    monkeypatch.setattr(mover.os, "link", unsupported)
+    monkeypatch.setattr(mover.os, "symlink", unsupported)
+    monkeypatch.setattr(mover, "reflink_file", unsupported)
+
+    organize_file(src, dst, mode, CHUNK)
+    organize_file(src, dst, mode, CHUNK)
+
+    assert src.exists()
+    assert not dst.is_symlink() and not os.path.samefile(src, dst)
+    assert dst.read_bytes() == payload
+
+
+def test_organize_file_refuses_different_target(tmp_path, payload):
+    src = _write(tmp_path / "src" / "ABC-123.mp4", payload)
+    dst = _write(tmp_path / "out" / "ABC-123.mp4", payload[:-1] + b"x")
+
+    with pytest.raises(FileExistsError):
+        organize_file(src, dst, "hardlink", CHUNK)
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from src.number_parser import NumberParser
+
+CORPUS = Path(__file__).parent / "data" / "filenames.tsv"
+
+
+def _load_corpus():
+    cases = []
+    for line in CORPUS.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        filename, expected = line.split("\t")
+        cases.append((filename, None if expected == "-" else expected))
+    return cases
+
+
+@pytest.mark.parametrize("filename,expected", _load_corpus())
+def test_labeled_corpus(filename, expected):
+    assert NumberParser().extract(filename) == expected
+
+
+def test_parse_many_matches_parse():
+    parser = NumberParser()
+    filenames = [filename for filename, _ in _load_corpus()]
+    assert [m.code if m else None for m in parser.parse_many(filenames)] == [
+        parser.extract(filename) for filename in filenames
+    ]
+
+
+def test_rule_and_span():
+    match = NumberParser().parse("hhd800.com@ABC-123-CD2.mp4")
+    assert match.rule == "standard"
+    assert "hhd800.com@ABC-123-CD2.mp4"[match.start : match.end] == "ABC-123"
@@ -0,0 +1,75 @@
+import os
+import time
+from pathlib import Path
+
+from src.pipeline import scan_queue
+from src.scanner import Scanner
+
+
+def _make_tree(root: Path, prefix: str, count: int, mtime: float = None):
+    for i in range(count):
+        folder = root / f"d{i // 10}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{prefix}-{100 + i}.mp4"
+        path.write_bytes(b"x")
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+
+def _scanner() -> Scanner:
+    scanner = Scanner()
+    scanner.min_size_mb = 0
+    return scanner
+
+
+def test_roots_are_interleaved(tmp_path):
+    _make_tree(tmp_path / "big", "AAA", 200)
+    _make_tree(tmp_path / "small", "BBB", 3)
+
+    codes = [
+        code
+        for code, _ in scan_queue(_scanner(), [tmp_path / "big", tmp_path / "small"], 8)
+    ]
+
+    assert len(codes) == 203
+    # 第二个根目录的视频不会排在第一个根目录的 200 个之后
+    assert max(codes.index(f"BBB-{100 + i}") for i in range(3)) < 10
+
+
+def test_queue_is_bounded_and_deduplicated(tmp_path):
+    _make_tree(tmp_path / "a", "CCC", 30)
+    _make_tree(tmp_path / "b", "CCC", 5)  # 与 a 中的番号重复
+    scanner = _scanner()
+    produced = []
+    iter_roots = scanner.iter_roots
+
+    def counting(roots):
+        for entry in iter_roots(roots):
+            produced.append(entry[0])
+            yield entry
+
+    scanner.iter_roots = counting
+    entries = scan_queue(scanner, [tmp_path / "a", tmp_path / "b"], 4)
+    codes = [next(entries)[0]]
+    time.sleep(0.3)
+    # 刮削停顿时扫描被背压挡住：队列中至多 4 条，另有一条在扫描线程手中等待入队
+    assert len(produced) <= 1 + 4 + 1
+    codes += [code for code, _ in entries]
+
+    assert len(codes) == len(set(codes)) == 30
+
+
+def test_fresh_file_overtakes_queued_backlog(tmp_path):
+    old = time.time() - 86400
+    _make_tree(tmp_path / "root" / "a", "OLD", 50, mtime=old)
+    _make_tree(tmp_path / "root" / "z", "NEW", 1)
+
+    entries = scan_queue(_scanner(), [tmp_path / "root"], 100)
+    first = next(entries)[0]
+    # 等扫描把剩余视频全部放入队列：最后才遍历到的新文件应越过队列中的旧文件
+    time.sleep(0.3)
+    rest = [code for code, _ in entries]
+
+    assert first.startswith("OLD")
+    assert rest[0] == "NEW-100"
+    assert len(rest) == 50
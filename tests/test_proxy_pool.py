@@ -0,0 +1,42 @@
+import os
+from types import SimpleNamespace
+
+import yaml
+
+from src.config import Config
+from src.crawlers.manager import CrawlerManager
+from src.crawlers.proxy_pool import ProxyPool
+from src.settings import SettingsStore
+
+PROXIES = ["http://127.0.0.1:1", "http://127.0.0.1:2"]
+
+
+def test_zero_values_are_respected():
+    pool = ProxyPool.from_config(
+        {"eject_error_rate": 0, "cooldown": 0}, "Javbus", PROXIES, {}
+    )
+
+    assert pool.eject_error_rate == 0
+    assert pool.cooldown == 0
+
+
+def test_proxy_pool_settings_are_hot_reloaded(tmp_path):
+    path = tmp_path / "config.yaml"
+    cfg = Config(path)
+    store = SettingsStore(cfg)
+    pool = ProxyPool.from_config(cfg.get("scraper.proxy_pool"), "Javbus", PROXIES, {})
+    manager = CrawlerManager.__new__(CrawlerManager)
+    manager.config = cfg
+    manager.crawlers = {"Javbus": SimpleNamespace(proxy_pool=pool)}
+
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data["scraper"]["proxy_pool"] = {"rate": 4, "eject_error_rate": 0, "cooldown": 30}
+    path.write_text(yaml.dump(data), encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert store.reload_if_changed()
+    manager.apply_settings(store.current)
+
+    assert [ep.interval for ep in pool.endpoints] == [0.25, 0.25]
+    assert pool.eject_error_rate == 0
+    assert pool.cooldown == 30
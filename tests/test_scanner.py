@@ -0,0 +1,133 @@
+import os
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from src.scanner import Scanner
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    scanner = Scanner()
+    scanner.min_size_mb = 0
+    scanner.workers = 8
+    scanner.exclude = ["backdrops"]
+    scanner.output_path = (tmp_path / "out").absolute()
+    return scanner
+
+
+def _touch(path: Path, size: int = 1):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+def _tree(root: Path):
+    for i in range(40):
+        _touch(root / f"s{i % 5}" / f"t{i % 3}" / f"ABC-{100 + i}.mp4")
+    _touch(root / "s0" / "backdrops" / "DEF-100.mp4")
+    _touch(root / "out" / "DEF-200.mp4")
+    _touch(root / "s1" / "GHI-300-trailer.mp4")
+    _touch(root / "s1" / "notes.txt")
+
+
+def _slow_scan_dir(monkeypatch, scanner):
+    """模拟高延迟文件系统：每个目录随机耗时，打乱线程完成顺序。"""
+    original = scanner._scan_dir
+
+    def scan_dir(path):
+        time.sleep(random.uniform(0, 0.01))
+        return original(path)
+
+    monkeypatch.setattr(scanner, "_scan_dir", scan_dir)
+
+
+def test_parallel_walk_matches_os_walk(scanner, tmp_path):
+    _tree(tmp_path)
+    expected = {
+        str(Path(dirpath) / name)
+        for dirpath, dirnames, filenames in os.walk(tmp_path)
+        if "backdrops" not in dirpath and not dirpath.startswith(str(tmp_path / "out"))
+        for name in filenames
+        if name.endswith(".mp4") and not name.endswith("-trailer.mp4")
+    }
+
+    assert {str(p) for p in scanner._walk(tmp_path)} == expected
+
+
+def test_walk_order_is_deterministic(scanner, tmp_path, monkeypatch):
+    _tree(tmp_path)
+    _slow_scan_dir(monkeypatch, scanner)
+
+    orders = {tuple(scanner._walk(tmp_path)) for _ in range(5)}
+
+    assert len(orders) == 1
+
+
+def test_duplicate_choice_does_not_depend_on_timing(scanner, tmp_path, monkeypatch):
+    # 大小相同的重复文件：保留哪一个只取决于遍历顺序
+    for folder in ("a", "b", "c"):
+        _touch(tmp_path / folder / "ABC-123.mp4", size=10)
+        _touch(tmp_path / "x" / f"ABC-123 {folder}.mp4", size=10)
+    _slow_scan_dir(monkeypatch, scanner)
+
+    kept = {scanner.scan_directory(tmp_path)[0]["ABC-123"][0] for _ in range(5)}
+
+    assert kept == {str(tmp_path / "a" / "ABC-123.mp4")}
+
+
+def test_scan_directory_picks_best_copy_across_directories(scanner, tmp_path):
+    scanner.duplicate_policy = "size"
+    _touch(tmp_path / "a" / "ABC-123.mp4", size=10)
+    _touch(tmp_path / "b" / "ABC-123.mp4", size=5000)
+
+    file_map, _ = scanner.scan_directory(tmp_path)
+
+    assert file_map["ABC-123"] == [str(tmp_path / "b" / "ABC-123.mp4")]
+    assert scanner.duplicates == {"ABC-123": [str(tmp_path / "a" / "ABC-123.mp4")]}
+
+
+def test_streaming_scan_resolves_parts_and_copies_across_directories(scanner, tmp_path):
+    scanner.duplicate_policy = "size"
+    _touch(tmp_path / "a" / "ABC-123-CD1.mp4")
+    _touch(tmp_path / "b" / "ABC-123-CD2.mp4")
+    # 同一目录中有多个副本的番号暂缓产出，其他目录中更大的副本仍可胜出
+    _touch(tmp_path / "a" / "XYZ-001.mp4", size=10)
+    _touch(tmp_path / "a" / "XYZ-001 copy.mp4", size=10)
+    _touch(tmp_path / "b" / "XYZ-001.mp4", size=5000)
+    _touch(tmp_path / "a" / "DEF-100.mp4")
+
+    entries = list(scanner.iter_roots([tmp_path]))
+
+    file_map = dict(entries)
+    assert len(entries) == len(file_map) == 3
+    # 可以立即确定的视频先产出
+    assert entries[0][0] == "DEF-100"
+    assert file_map["ABC-123"] == [
+        str(tmp_path / "a" / "ABC-123-CD1.mp4"),
+        str(tmp_path / "b" / "ABC-123-CD2.mp4"),
+    ]
+    assert file_map["XYZ-001"] == [str(tmp_path / "b" / "XYZ-001.mp4")]
+    assert sorted(scanner.duplicates["XYZ-001"]) == [
+        str(tmp_path / "a" / "XYZ-001 copy.mp4"),
+        str(tmp_path / "a" / "XYZ-001.mp4"),
+    ]
+
+
+def test_duplicates_are_merged_across_parts(scanner, tmp_path):
+    for folder in ("a", "b"):
+        _touch(tmp_path / folder / "ABC-123-CD1.mp4")
+        _touch(tmp_path / folder / "ABC-123-CD2.mp4")
+
+    file_map, _ = scanner.scan_directory(tmp_path)
+
+    assert file_map["ABC-123"] == [
+        str(tmp_path / "a" / "ABC-123-CD1.mp4"),
+        str(tmp_path / "a" / "ABC-123-CD2.mp4"),
+    ]
+    # 每个分段落选的副本都保留在报告中，不会互相覆盖
+    assert sorted(scanner.duplicates["ABC-123"]) == [
+        str(tmp_path / "b" / "ABC-123-CD1.mp4"),
+        str(tmp_path / "b" / "ABC-123-CD2.mp4"),
+    ]
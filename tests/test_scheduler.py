@@ -0,0 +1,111 @@
+import os
+import time
+from dataclasses import replace
+
+import pytest
+
+from src import scheduler as scheduler_module
+from src.scheduler import Scheduler
+from src.settings import settings
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    def apply(**scheduler):
+        current = settings.current
+        monkeypatch.setattr(
+            settings,
+            "current",
+            replace(
+                current,
+                scheduler=replace(current.scheduler, **scheduler),
+                scraper=replace(current.scraper, enabled_crawlers=("javbus", "javdb")),
+            ),
+        )
+
+    return apply
+
+
+def _file(path, size=1, age=0.0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_mtime_order_puts_newest_first(tmp_path, configure):
+    configure(order="mtime", fair=False, priority_paths=())
+    file_map = {
+        "OLD-001": [_file(tmp_path / "OLD-001.mp4", age=300)],
+        "NEW-001": [_file(tmp_path / "NEW-001.mp4", age=0)],
+        "MID-001": [_file(tmp_path / "MID-001.mp4", age=100)],
+    }
+
+    assert list(Scheduler([tmp_path]).schedule(file_map)) == ["NEW-001", "MID-001", "OLD-001"]
+
+
+def test_size_order_counts_all_parts(tmp_path, configure):
+    configure(order="size", fair=False, priority_paths=())
+    file_map = {
+        "ONE-001": [_file(tmp_path / "ONE-001.mp4", size=300)],
+        "TWO-001": [
+            _file(tmp_path / "TWO-001-CD1.mp4", size=200),
+            _file(tmp_path / "TWO-001-CD2.mp4", size=200),
+        ],
+    }
+
+    assert list(Scheduler([tmp_path]).schedule(file_map)) == ["TWO-001", "ONE-001"]
+
+
+def test_cheapest_order_uses_negative_cache(tmp_path, configure, monkeypatch):
+    configure(order="cheapest", fair=False, priority_paths=())
+    monkeypatch.setattr(
+        scheduler_module.negative_cache,
+        "is_missing",
+        lambda site, number: number == "KNOWN-001",
+    )
+    file_map = {
+        "FULL-001": [_file(tmp_path / "FULL-001.mp4")],
+        "KNOWN-001": [_file(tmp_path / "KNOWN-001.mp4")],
+    }
+
+    assert list(Scheduler([tmp_path]).schedule(file_map)) == ["KNOWN-001", "FULL-001"]
+
+
+def test_priority_paths_come_first(tmp_path, configure):
+    configure(order="mtime", fair=True, priority_paths=(str(tmp_path / "urgent"),))
+    file_map = {
+        "NEW-001": [_file(tmp_path / "inbox" / "NEW-001.mp4", age=0)],
+        "OLD-001": [_file(tmp_path / "urgent" / "OLD-001.mp4", age=300)],
+    }
+
+    assert list(Scheduler([tmp_path]).schedule(file_map)) == ["OLD-001", "NEW-001"]
+
+
+def test_fair_order_alternates_between_roots(tmp_path, configure):
+    configure(order="mtime", fair=True, priority_paths=())
+    big, small = tmp_path / "big", tmp_path / "small"
+    file_map = {f"BIG-{i:03d}": [_file(big / f"BIG-{i:03d}.mp4", age=i)] for i in range(5)}
+    file_map.update(
+        {f"NEW-{i:03d}": [_file(small / f"NEW-{i:03d}.mp4", age=1000 + i)] for i in range(2)}
+    )
+
+    order = list(Scheduler([big, small]).schedule(file_map))
+
+    # 积压的根目录不会让另一个根目录一直等待；各根目录内部仍按 mtime 排序
+    assert order == ["BIG-000", "NEW-000", "BIG-001", "NEW-001", "BIG-002", "BIG-003", "BIG-004"]
+
+
+def test_late_arrival_from_idle_root_is_served_next(tmp_path, configure):
+    configure(order="mtime", fair=True, priority_paths=())
+    big, small = tmp_path / "big", tmp_path / "small"
+    scheduler = Scheduler([big, small])
+    for i in range(4):
+        scheduler.push(f"BIG-{i:03d}", [_file(big / f"BIG-{i:03d}.mp4", age=i)])
+    assert [scheduler.pop()[0] for _ in range(2)] == ["BIG-000", "BIG-001"]
+
+    scheduler.push("NEW-000", [_file(small / "NEW-000.mp4", age=1000)])
+
+    assert scheduler.pop()[0] == "NEW-000"
+    assert [scheduler.pop()[0] for _ in range(len(scheduler))] == ["BIG-002", "BIG-003"]
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from src.scanner import Scanner
+from src.server import LookupService, RequestHandler
+
+
+class FakeManager:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.calls = 0
+
+    def scrape(self, number):
+        with self.lock:
+            self.calls += 1
+            time.sleep(0.2)
+            return {"title": number}
+
+    def breaker_stats(self):
+        return {}
+
+    def proxy_stats(self):
+        return {}
+
+
+@pytest.fixture
+def service():
+    return LookupService(Scanner(), SimpleNamespace(crawler_manager=FakeManager()))
+
+
+@pytest.fixture
+def api(service):
+    handler = type("Handler", (RequestHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_concurrent_lookups_share_one_scrape(service):
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.lookup("abc123")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert service.scraper.crawler_manager.calls == 1
+    assert {number for number, _, _ in results} == {"ABC-123"}
+    assert sum(service.stats[k] for k in ("site", "shared", "memory")) == 8
+
+
+@pytest.mark.parametrize(
+    "payload", [{"files": "ABC-123.mp4"}, {"files": [1, 2]}, {"path": ["a"]}, ["a"]]
+)
+def test_jobs_rejects_malformed_payload(api, service, payload):
+    assert _post(api + "/jobs", payload) == 400
+    assert service.jobs == {}
@@ -0,0 +1,61 @@
+import os
+
+import yaml
+
+from src.config import Config
+from src.scanner import Scanner
+from src.settings import SettingsStore
+
+RULE = {"name": "vlog", "pattern": r"holiday_vlog_(\d+)", "format": "VLOG-{0}"}
+
+
+def _rewrite(path, update):
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    update(data)
+    path.write_text(yaml.dump(data), encoding="utf-8")
+    # 保证 mtime 变化（部分文件系统的时间精度较粗）
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_reload_rebuilds_number_parser_when_rules_change(tmp_path):
+    path = tmp_path / "config.yaml"
+    store = SettingsStore(Config(path))
+    scanner = Scanner()
+    scanner.apply_settings(store.current)
+    parser = scanner.number_parser
+    assert scanner.number_parser.extract("holiday_vlog_0042.mp4") is None
+
+    _rewrite(path, lambda data: data["scanner"].update(rules=[RULE]))
+    assert store.reload_if_changed()
+    scanner.apply_settings(store.current)
+    assert scanner.number_parser.extract("holiday_vlog_0042.mp4") == "VLOG-0042"
+
+    # 规则未变化时不重新编译
+    rebuilt = scanner.number_parser
+    _rewrite(path, lambda data: data["scanner"].update(workers=2))
+    assert store.reload_if_changed()
+    scanner.apply_settings(store.current)
+    assert scanner.number_parser is rebuilt is not parser
+
+
+def test_invalid_rules_keep_current_settings(tmp_path):
+    path = tmp_path / "config.yaml"
+    store = SettingsStore(Config(path))
+    before = store.current
+
+    _rewrite(path, lambda data: data["scanner"].update(rules=[{"name": "bad"}]))
+    assert not store.reload_if_changed()
+    assert store.current is before
+
+
+def test_missing_config_keeps_current_settings(tmp_path):
+    path = tmp_path / "config.yaml"
+    store = SettingsStore(Config(path))
+    before = store.current
+
+    path.unlink()
+    assert not store.reload_if_changed()
+    assert store.current is before
+    # 不能用默认配置重新生成用户删除（或正在替换）的文件
+    assert not path.exists()